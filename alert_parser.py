@@ -0,0 +1,145 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+from lxml import html as lxml_html
+from lxml.etree import ParserError, iterwalk
+
+# Google Alerts marks each result up as a schema.org Article
+ARTICLE_ITEMTYPE = "http://schema.org/Article"
+
+# Below this many emails, handing them to worker processes costs more than it saves
+PARALLEL_MIN_EMAILS = 8
+PARSE_WORKERS = int(os.getenv("ALERT_PARSE_WORKERS", os.cpu_count() or 1))
+
+def unwrap_google_url(url):
+    """Return the target of a google.com/url redirect, or the URL unchanged."""
+    parts = urlsplit(url)
+    if parts.path == "/url" and parts.netloc.endswith("google.com"):
+        params = parse_qs(parts.query)
+        target = params.get("url") or params.get("q")
+        if target:
+            return target[0]
+    return url
+
+def is_google_link(url):
+    """Check for Google's own alert management, sharing and support links."""
+    return "google.com/alerts" in url or "support.google.com" in url
+
+def _text(element):
+    """Element text with whitespace collapsed."""
+    return " ".join(element.text_content().split())
+
+def extract_alert_articles(body, alert_topic, email_date):
+    """
+    Extract article entries from the HTML body of a Google Alert email.
+
+    Walks the document once. Results marked up as schema.org Articles give the
+    title from their itemprop="url" link and the snippet from
+    itemprop="description"; links outside any such item fall back to using
+    their parent's text as the snippet. Fields only count inside their own
+    item; the walk leaves an item at its end tag.
+    """
+    try:
+        root = lxml_html.fromstring(body)
+    except (ParserError, ValueError):
+        return []
+
+    entries = []
+    items = []  # (element, entry) of the Article items the walk is inside
+    for event, element in iterwalk(root, events=("start", "end")):
+        if not isinstance(element.tag, str):
+            continue  # Comments and processing instructions
+        if event == "end":
+            if items and items[-1][0] is element:
+                items.pop()
+            continue
+
+        current = items[-1][1] if items else None
+        if element.get("itemtype") == ARTICLE_ITEMTYPE:
+            current = {"title": "", "link": "", "summary": ""}
+            entries.append(current)
+            items.append((element, current))
+        elif element.tag == "a":
+            href = (element.get("href") or "").strip()
+            if not href or is_google_link(href):
+                continue
+            if current is None:
+                title = _text(element)
+                parent = element.getparent()
+                summary = _text(parent).replace(title, "", 1).strip() if parent is not None else ""
+                entries.append({"title": title, "link": unwrap_google_url(href), "summary": summary})
+            elif not current["link"] and element.get("itemprop") == "url":
+                current["title"] = _text(element)
+                current["link"] = unwrap_google_url(href)
+        elif current is not None and element.get("itemprop") == "description":
+            current["summary"] = _text(element)
+
+    articles = []
+    seen = set()
+    for entry in entries:
+        link = entry["link"]
+        # Skip entries without a valid URL or a title, and repeated links
+        if not link.startswith(('http://', 'https://')) or not entry["title"] or link in seen:
+            continue
+        seen.add(link)
+        articles.append({
+            "title": entry["title"],
+            "link": link,
+            "summary": entry["summary"][:2000],
+            "source": alert_topic,
+            "source_type": "Google Alerts",
+            "published_date": email_date,
+            "published_parsed": email_date.timetuple()[:6]
+        })
+    return articles
+
+def _extract_job(job):
+    return extract_alert_articles(*job)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool(max_workers=None):
+    """
+    Get the process-wide parsing pool, creating it on first use.
+
+    Every mailbox thread shares it, so a run never has more than
+    max_workers parser processes. Workers are started with forkserver
+    (spawn where that is missing) rather than forked from a process that
+    is running other threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=max_workers or PARSE_WORKERS, mp_context=context)
+        return _pool
+
+def shutdown_pool():
+    """Stop the parsing pool's worker processes."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+atexit.register(shutdown_pool)
+
+def extract_many(jobs, max_workers=None):
+    """
+    Run extract_alert_articles over (body, alert_topic, email_date) jobs.
+
+    Large batches are spread across the shared process pool, which is
+    sized by the first call's max_workers; results keep job order.
+    """
+    jobs = list(jobs)
+    if len(jobs) < PARALLEL_MIN_EMAILS:
+        return [_extract_job(job) for job in jobs]
+    workers = max_workers or PARSE_WORKERS
+    chunksize = max(1, len(jobs) // (workers * 4))
+    return list(_get_pool(workers).map(_extract_job, jobs, chunksize=chunksize))
@@ -0,0 +1,158 @@
+import os
+import time
+import select
+import socket
+import ssl
+import logging
+import imaplib
+import itertools
+import threading
+
+import utils
+import pipeline
+import profiles
+import google_alerts_fetcher
+import pdf_link_cache
+
+# IDLE settings
+IDLE_KEEPALIVE = int(os.getenv("IDLE_KEEPALIVE", 25 * 60))  # Re-issue IDLE before the 29 minute server cutoff
+RESPONSE_TIMEOUT = 30  # Seconds to wait for the server to answer DONE
+MAX_RECONNECT_DELAY = 300
+PDF_LINK_MEMORY_ENTRIES = 2000  # Resolved PDF links kept in memory while the watcher runs
+
+_idle_tags = itertools.count(1)  # Own tags, so IDLE needs nothing from imaplib's internals
+
+def _wait_readable(imap, timeout):
+    """Wait up to timeout seconds for the server to send something."""
+    sock = imap.socket()
+    if isinstance(sock, ssl.SSLSocket) and sock.pending():
+        return True  # Already decrypted, so select would not see it
+    readable, _, _ = select.select([sock], [], [], timeout)
+    return bool(readable)
+
+def idle_once(imap, timeout):
+    """
+    Run one IDLE cycle on a selected mailbox.
+
+    Returns True as soon as the server reports a new message, or False when
+    the keepalive timeout passes without one. The wait polls the socket
+    before each read, so reads never time out mid-line. An EXISTS that
+    arrived together with the IDLE continuation can sit in imaplib's read
+    buffer until the cycle ends; leaving IDLE still reads it.
+    """
+    tag = b"IDLE%d" % next(_idle_tags)
+    sock = imap.socket()
+    sock.settimeout(RESPONSE_TIMEOUT)  # For the rest of a line once the server has started sending
+    try:
+        imap.send(tag + b" IDLE\r\n")
+        line = imap.readline()
+        if not line.startswith(b"+"):
+            raise imaplib.IMAP4.error(f"IDLE rejected: {line!r}")
+
+        new_mail = False
+        deadline = time.monotonic() + timeout
+        while not new_mail:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not _wait_readable(imap, remaining):
+                break
+            line = imap.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("connection closed during IDLE")
+            new_mail = line.rstrip().upper().endswith(b"EXISTS")
+
+        # Leave IDLE and drain everything up to the tagged completion
+        imap.send(b"DONE\r\n")
+        while True:
+            line = imap.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("connection closed while leaving IDLE")
+            if line.startswith(tag + b" "):
+                if not line[len(tag):].strip().upper().startswith(b"OK"):
+                    raise imaplib.IMAP4.error(f"IDLE failed: {line!r}")
+                break
+            new_mail = new_mail or line.rstrip().upper().endswith(b"EXISTS")
+    except socket.timeout:
+        raise imaplib.IMAP4.abort("timed out during IDLE")
+    finally:
+        sock.settimeout(None)
+    return new_mail
+
+def push_to_notion(articles):
+    """Score new alert articles and send them to Notion as they arrive."""
+    stats = pipeline.Pipeline(
+        [lambda: articles], lambda article, profile: utils.add_to_notion(article, None, profile.database_id),
+        profiles=profiles.load_profiles(utils.load_environment(), google_alerts_fetcher.TOP_ARTICLES_LIMIT),
+    ).run()
+    added = sum(stats["added"].values())
+    logging.info(f"Added {added} of {len(articles)} new Google Alert articles to Notion")
+
+def watch_google_alerts(on_articles=push_to_notion, mailbox="inbox", stop_event=None, keepalive=IDLE_KEEPALIVE):
+    """
+    Keep an IMAP connection open in IDLE and ingest alerts as they land.
+
+    Uses the same UID high-water mark as fetch_google_alerts, so the watcher
+    and scheduled runs never process an email twice. The mark is saved only
+    after on_articles returns. Reconnects with exponential backoff.
+    """
+    env = utils.load_environment()
+    email_address = env["EMAIL"]
+    app_password = env["APP_PASSWORD"]
+    if not email_address or not app_password:
+        logging.error("Gmail credentials missing. EMAIL or APP_PASSWORD not set in environment.")
+        return
+
+    stop_event = stop_event or threading.Event()
+    state_key = f"{email_address}/{mailbox}"
+    delay = 1
+
+    def sync(imap, uidvalidity):
+        articles, mark = google_alerts_fetcher.sync_mailbox(
+            imap, state_key, uidvalidity, utils.get_last_run_time(), env["DEBUG_FETCH"]
+        )
+        if articles:
+            on_articles(articles)
+        if mark:
+            google_alerts_fetcher.save_alert_sync_state({state_key: mark})
+
+    while not stop_event.is_set():
+        imap = None
+        try:
+            imap, uidvalidity = google_alerts_fetcher.connect_imap(email_address, app_password, mailbox)
+            logging.info(f"Watching {state_key} for new Google Alerts")
+            delay = 1
+
+            # Catch up on anything that arrived while disconnected
+            sync(imap, uidvalidity)
+            while not stop_event.is_set():
+                # Sync on new mail and on every keepalive; the UID search doubles as the keepalive command
+                idle_once(imap, keepalive)
+                sync(imap, uidvalidity)
+        except (imaplib.IMAP4.abort, OSError) as e:
+            logging.warning(f"IMAP connection lost: {e}. Reconnecting in {delay}s")
+            stop_event.wait(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+        except Exception as e:
+            logging.error(f"Error while watching Google Alerts: {e}. Reconnecting in {delay}s")
+            stop_event.wait(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+        finally:
+            if imap is not None:
+                try:
+                    imap.logout()
+                except Exception:
+                    pass
+
+def main():
+    """Run the Google Alerts watcher until interrupted."""
+    utils.load_environment()
+    utils.setup_logging()
+
+    logging.info("Starting Google Alerts IDLE watcher...")
+    pdf_link_cache.get_pdf_link_cache().enable_memory_tier(PDF_LINK_MEMORY_ENTRIES)
+    try:
+        watch_google_alerts()
+    except KeyboardInterrupt:
+        logging.info("Watcher stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import sys
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+# Spellings of source_type seen across fetchers, mapped to the one used in Notion
+SOURCE_TYPES = {
+    "rss": "RSS Feed",
+    "rss feed": "RSS Feed",
+    "google alerts": "Google Alerts",
+    "google alert": "Google Alerts",
+}
+
+def intern_source(name, default="Unknown"):
+    """Shared copy of a source name; a run has thousands of articles but few sources."""
+    return sys.intern(name.strip()) if name and name.strip() else default
+
+def canonical_source_type(source_type):
+    if not source_type:
+        return "Unknown"
+    return SOURCE_TYPES.get(source_type.strip().lower(), intern_source(source_type))
+
+def _as_datetime(value):
+    """Published date from a datetime, a struct_time or a (year, month, day, ...) tuple."""
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime(*tuple(value)[:6])
+    except (TypeError, ValueError):
+        return None
+
+class Article(NamedTuple):
+    """
+    One fetched article.
+
+    Immutable and tuple-sized; build it with make_article or from_dict so
+    source names are interned and text holds the lower-cased title and
+    summary that keyword matching reads.
+    """
+    title: str
+    link: str
+    summary: str
+    source: str
+    source_type: str
+    published_date: Optional[datetime]
+    relevancy: Optional[float]
+    text: str
+
+    @classmethod
+    def from_dict(cls, data):
+        """Article from a fetcher's dict; falls back to published_parsed for the date."""
+        return make_article(
+            data.get("title"), data.get("link"), data.get("summary"), data.get("source"), data.get("source_type"),
+            data.get("published_date") or _as_datetime(data.get("published_parsed")), data.get("relevancy"),
+        )
+
+    def with_relevancy(self, relevancy):
+        return self._replace(relevancy=relevancy)
+
+    def to_dict(self):
+        """Dict in the shape the older code paths expect."""
+        data = self._asdict()
+        del data["text"]
+        data["published_parsed"] = self.published_date.timetuple()[:6] if self.published_date else None
+        if data["relevancy"] is None:
+            del data["relevancy"]
+        return data
+
+def article_record(article):
+    """JSON-safe dict of an Article or fetcher dict; Article.from_dict reads it back."""
+    if not isinstance(article, Article):
+        article = Article.from_dict(article)
+    record = article.to_dict()
+    del record["published_date"]  # Carried as published_parsed
+    return record
+
+def make_article(title, link, summary="", source=None, source_type=None, published_date=None, relevancy=None):
+    title = (title or "No Title").strip()
+    summary = summary or ""
+    return Article(
+        title, (link or "").strip(), summary, intern_source(source), canonical_source_type(source_type),
+        _as_datetime(published_date), relevancy, f"{title} {summary}".lower(),
+    )
@@ -0,0 +1,83 @@
+"""
+Benchmark the Google Alert extractor against the previous BeautifulSoup code.
+
+Usage: python benchmarks/bench_alert_parser.py [emails] [repeats]
+
+Parses recorded alert emails from tests/fixtures, replicated to the requested
+number of emails, with the old html.parser walk, the new extractor serially,
+and the new extractor across a process pool.
+"""
+
+import os
+import sys
+import glob
+import time
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import alert_parser
+
+def legacy_parse(body, alert_topic, email_date):
+    """The BeautifulSoup walk previously used by google_alerts_fetcher."""
+    articles = []
+    soup = BeautifulSoup(body, "html.parser")
+    for a in soup.find_all("a", href=True):
+        url = a["href"]
+        if "google.com/alerts" in url or "support.google.com" in url:
+            continue
+        title = a.text.strip()
+        if not title:
+            continue
+        parent = a.find_parent()
+        summary = parent.text.strip() if parent else ""
+        summary = summary.replace(title, "", 1).strip()[:2000]
+        if not url.startswith(('http://', 'https://')):
+            continue
+        articles.append({
+            "title": title,
+            "link": url.strip(),
+            "summary": summary,
+            "source": alert_topic,
+            "source_type": "Google Alerts",
+            "published_date": email_date,
+            "published_parsed": email_date.timetuple()[:6]
+        })
+    return articles
+
+def load_recorded_emails():
+    paths = sorted(glob.glob(os.path.join(ROOT, "tests", "fixtures", "google_alert_*.html")))
+    bodies = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            bodies.append(f.read())
+    return bodies
+
+def timed(label, func, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    count = sum(len(r) for r in result)
+    print(f"{label:<28} {best * 1000:9.1f} ms  {count} articles")
+    return best
+
+def main():
+    emails = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    recorded = load_recorded_emails()
+    email_date = datetime.now()
+    jobs = [(recorded[i % len(recorded)], "Google Alerts: benchmark", email_date) for i in range(emails)]
+
+    print(f"Parsing {emails} emails ({len(recorded)} recorded layouts), best of {repeats}")
+    legacy = timed("BeautifulSoup html.parser", lambda: [legacy_parse(*job) for job in jobs], repeats)
+    serial = timed("extractor, serial", lambda: [alert_parser.extract_alert_articles(*job) for job in jobs], repeats)
+    parallel = timed("extractor, process pool", lambda: alert_parser.extract_many(jobs), repeats)
+    print(f"Speedup: {legacy / serial:.1f}x serial, {legacy / parallel:.1f}x parallel")
+
+if __name__ == "__main__":
+    main()
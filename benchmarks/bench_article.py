@@ -0,0 +1,70 @@
+"""
+Benchmark Article records against the article dicts they replace.
+
+Usage: python benchmarks/bench_article.py [articles]
+
+Builds the requested number of synthetic articles as dicts and as Articles,
+and reports the memory each takes (tracemalloc) and the time to score them
+all.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("NOTION_TOKEN", "benchmark")
+import utils
+from article import make_article
+
+SOURCES = ["Nature Biotechnology", "STAT News", "Google Alerts: CRISPR", "Fierce Biotech", "Cell"]
+WORDS = "crispr longevity brain cancer trial funding gene editing startup platform therapy".split()
+
+def synthetic_fields(n):
+    now = datetime.now()
+    for i in range(n):
+        words = " ".join(WORDS[(i + k) % len(WORDS)] for k in range(6))
+        source = SOURCES[i % len(SOURCES)]
+        yield (f"Study {i}: {words}", f"https://example.org/articles/{i}", f"Summary of {words} " * 3,
+               # Fetchers build new source strings for every entry
+               "".join(source), "Google Alerts" if source.startswith("Google") else "RSS Feed",
+               now - timedelta(minutes=i))
+
+def as_dict(title, link, summary, source, source_type, published):
+    return {"title": title, "link": link, "summary": summary, "source": source, "source_type": source_type,
+            "published_date": published, "published_parsed": published.timetuple()[:6]}
+
+def measure(label, build):
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    result = build()
+    size = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(start, "filename"))
+    tracemalloc.stop()
+    print(f"{label:<16} {size / len(result) if len(result) else 0:8.0f} bytes/article")
+    return result
+
+def timed(label, func):
+    start = time.perf_counter()
+    func()
+    print(f"{label:<36} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print(f"{count} synthetic articles")
+    dicts = measure("dicts", lambda: [as_dict(*fields) for fields in synthetic_fields(count)])
+    articles = measure("Article", lambda: [make_article(*fields) for fields in synthetic_fields(count)])
+
+    timed("score dicts (calculate_relevancy)", lambda: [
+        utils.calculate_relevancy(d.get("title", ""), d.get("summary", ""), d.get("source_type", ""), d.get("source", ""))
+        for d in dicts
+    ])
+    timed("score Articles (precomputed text)", lambda: [
+        utils.relevancy_from_text(a.text, a.source_type, a.source) for a in articles
+    ])
+
+if __name__ == "__main__":
+    main()
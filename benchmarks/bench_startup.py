@@ -0,0 +1,81 @@
+"""
+Benchmark cold start: module import time and first-fetch latency.
+
+Usage: python benchmarks/bench_startup.py [repeats]
+
+Each measurement runs in a fresh interpreter. Import time is the wall time
+of importing an entry point minus that of an empty interpreter. First-fetch
+latency is the time from interpreter start until the first feed, served by
+a local HTTP server, has been fetched and parsed into articles.
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+ENTRY_POINTS = ["app", "rss_fetcher", "google_alerts_fetcher", "rss_to_notion", "alerts_watcher"]
+HEAVY_MODULES = ["requests", "notion_client", "feedparser", "bs4", "lxml", "PyPDF2", "dotenv"]
+
+FEED_ITEMS = 50
+
+def synthetic_feed():
+    items = "".join(
+        f"<item><title>CRISPR study {i}</title><link>https://example.org/{i}</link>"
+        f"<description>Gene editing result {i}</description>"
+        f"<pubDate>Mon, 03 Mar 2025 10:{i % 60:02d}:00 GMT</pubDate></item>"
+        for i in range(FEED_ITEMS)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Bench</title>{items}</channel></rss>'.encode()
+
+class FeedHandler(BaseHTTPRequestHandler):
+    body = synthetic_feed()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+def run_python(code):
+    """Wall time of a fresh interpreter running code, and its output."""
+    env = dict(os.environ, PYTHONPATH=ROOT, NOTION_TOKEN="benchmark", DATABASE_ID="benchmark")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout.strip()
+
+def best(code, repeats):
+    runs = [run_python(code) for _ in range(repeats)]
+    return min(elapsed for elapsed, _ in runs), runs[0][1]
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    baseline, _ = best("pass", repeats)
+    print(f"Empty interpreter: {baseline * 1000:.0f} ms (subtracted below), best of {repeats}")
+
+    check_heavy = f"import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    for module in ENTRY_POINTS:
+        elapsed, heavy = best(f"import {module}; {check_heavy}", repeats)
+        print(f"import {module:<24} {(elapsed - baseline) * 1000:7.1f} ms  heavy modules loaded: {heavy or 'none'}")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/feed.xml"
+    try:
+        elapsed, count = best(
+            f"import rss_fetcher; print(len(rss_fetcher.process_rss_feed({url!r}, 'Bench', None)))", repeats
+        )
+    finally:
+        server.shutdown()
+    print(f"first fetch (rss_fetcher)       {(elapsed - baseline) * 1000:7.1f} ms  {count} articles parsed")
+
+if __name__ == "__main__":
+    main()
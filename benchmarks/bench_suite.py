@@ -0,0 +1,243 @@
+"""
+End-to-end benchmark suite with stored baselines and a regression check.
+
+Usage: python benchmarks/bench_suite.py [--scale small|medium|large] [--only NAME ...]
+                                        [--repeats N] [--save-baseline] [--check] [--threshold 0.25]
+
+Feeds are served by a local feed farm (feed_farm.py) and every input comes
+from the synthetic corpus (corpus.py), so runs need no network and are
+repeatable. Scales:
+
+    small    100 feeds x 20 entries (2,000 entries)
+    medium   1,000 feeds x 100 entries (100,000 entries)
+    large    10,000 feeds x 100 entries (1,000,000 entries)
+
+Each benchmark reports its best throughput over the repeats.
+--save-baseline stores the results for the scale in baselines.json.
+--check exits with status 1 when any benchmark's throughput is more than
+threshold below its baseline. Baselines depend on the machine; the file
+records which one produced them, and a check on another machine warns.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+from typing import NamedTuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("NOTION_TOKEN", "benchmark")
+os.environ.setdefault("DATABASE_ID", "benchmark")
+os.environ["DEBUG_FETCH"] = "false"
+
+import corpus
+from feed_farm import FeedFarm
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_THRESHOLD = 0.25
+
+class Scale(NamedTuple):
+    feeds: int
+    entries: int  # Per feed
+    texts: int  # Articles for the scoring, theme and tag microbenchmarks
+    emails: int
+    pdfs: int
+    serial_feeds: int  # Feeds fetched one by one by the process_rss_feed benchmark
+
+SCALES = {
+    "small": Scale(100, 20, 20_000, 200, 5_000, 20),
+    "medium": Scale(1_000, 100, 100_000, 2_000, 50_000, 50),
+    "large": Scale(10_000, 100, 1_000_000, 20_000, 500_000, 100),
+}
+
+class Context:
+    """Inputs shared by the benchmarks of one run, built once and outside the timings."""
+
+    def __init__(self, scale, farm):
+        self.scale = scale
+        self.farm = farm
+        self._texts = None
+
+    def texts(self):
+        if self._texts is None:
+            self._texts = [corpus.article_text(n) for n in range(self.scale.texts)]
+        return self._texts
+
+# Each benchmark takes the Context and returns (setup, run): setup builds
+# per-repeat state untimed, run(state) does the timed work and returns the
+# number of items it processed.
+
+def bench_relevancy(ctx):
+    import utils
+    texts = ctx.texts()
+
+    def run(_):
+        for title, summary in texts:
+            utils.calculate_relevancy(title, summary)
+        return len(texts)
+    return None, run
+
+def bench_theme(ctx):
+    import utils
+    summaries = [summary for _, summary in ctx.texts()]
+
+    def run(_):
+        for summary in summaries:
+            utils.get_theme(summary)
+        return len(summaries)
+    return None, run
+
+def bench_tags(ctx):
+    import utils
+    summaries = [summary for _, summary in ctx.texts()]
+
+    def run(_):
+        for summary in summaries:
+            utils.get_tags(summary)
+        return len(summaries)
+    return None, run
+
+def bench_process_rss_feed(ctx):
+    import rss_fetcher
+    feeds = ctx.farm.feed_urls(ctx.scale.serial_feeds)
+
+    def run(_):
+        return sum(len(rss_fetcher.process_rss_feed(url, name, None)) for name, url in feeds.items())
+    return None, run
+
+def bench_alert_parser(ctx):
+    import alert_parser
+    jobs = [corpus.alert_email(n) for n in range(ctx.scale.emails)]
+
+    def run(_):
+        return sum(len(articles) for articles in alert_parser.extract_many(jobs))
+    return None, run
+
+def bench_pdf_index(ctx):
+    from pdf_index import CATALOG_NAME, build_pdf_index
+    catalog = "".join(json.dumps(corpus.pdf_catalog_entry(n)) + "\n" for n in range(ctx.scale.pdfs))
+
+    def setup():
+        root = tempfile.mkdtemp(prefix="bench-pdf-index-")
+        with open(os.path.join(root, CATALOG_NAME), "w", encoding="utf-8") as f:
+            f.write(catalog)
+        return root
+
+    def run(root):
+        try:
+            build_pdf_index(root)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        return ctx.scale.pdfs
+    return setup, run
+
+def bench_pipeline(ctx):
+    """Every farm feed through fetch, normalize, dedup, score and select, with a no-op write."""
+    import pipeline
+    import rss_fetcher
+
+    def run(_):
+        sources = rss_fetcher.rss_sources(ctx.farm.feed_urls(), None)
+        stats = pipeline.Pipeline(sources, lambda article, profile: (True, None),
+                                  select=pipeline.top_relevant(30)).run()
+        return sum(stats["fetched"].values())
+    return None, run
+
+BENCHMARKS = {
+    "calculate_relevancy": bench_relevancy,
+    "get_theme": bench_theme,
+    "get_tags": bench_tags,
+    "process_rss_feed": bench_process_rss_feed,
+    "alert_parser": bench_alert_parser,
+    "create_pdf_index": bench_pdf_index,
+    "pipeline": bench_pipeline,
+}
+
+def measure(bench, ctx, repeats):
+    """Best (items, seconds) over repeats."""
+    setup, run = bench(ctx)
+    best = None
+    for _ in range(repeats):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        items = run(state)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[1]:
+            best = (items, elapsed)
+    return best
+
+def machine():
+    return f"{platform.node()} {platform.machine()} {os.cpu_count()} CPUs, Python {platform.python_version()}"
+
+def load_baselines(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def compare(results, baseline, threshold):
+    """Names of benchmarks whose throughput dropped more than threshold below baseline."""
+    return [name for name, rate in results.items()
+            if name in baseline and rate < baseline[name] * (1 - threshold)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="benchmarks to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the scale's baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if throughput regressed past the threshold")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed fractional drop below baseline (default {DEFAULT_THRESHOLD})")
+    parser.add_argument("--baseline-file", default=BASELINE_FILE)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+
+    scale = SCALES[args.scale]
+    baselines = load_baselines(args.baseline_file)
+    stored = baselines.get(args.scale, {})
+    baseline = stored.get("results", {})
+    print(f"Scale {args.scale}: {scale.feeds} feeds x {scale.entries} entries, best of {args.repeats} on {machine()}")
+    if stored and stored.get("machine") != machine():
+        print(f"Warning: baseline was recorded on {stored.get('machine')}")
+
+    results = {}
+    with FeedFarm(scale.feeds, scale.entries) as farm:
+        ctx = Context(scale, farm)
+        for name in args.only or BENCHMARKS:
+            items, elapsed = measure(BENCHMARKS[name], ctx, args.repeats)
+            results[name] = items / elapsed if elapsed else float("inf")
+            change = ""
+            if name in baseline:
+                change = f"{(results[name] / baseline[name] - 1) * 100:+6.1f}% vs baseline"
+            print(f"{name:<20} {items:>9} items {elapsed * 1000:10.1f} ms {results[name]:>13,.0f} items/s  {change}")
+
+    if args.save_baseline:
+        baselines[args.scale] = {"machine": machine(), "recorded": time.strftime("%Y-%m-%d"),
+                                 "results": {**baseline, **{name: round(rate, 1) for name, rate in results.items()}}}
+        with open(args.baseline_file, "w") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"Saved {args.scale} baseline to {args.baseline_file}")
+
+    if args.check:
+        regressed = compare(results, baseline, args.threshold)
+        for name in regressed:
+            print(f"REGRESSION: {name} at {results[name]:,.0f} items/s, baseline {baseline[name]:,.0f} "
+                  f"(more than {args.threshold:.0%} slower)")
+        if not baseline:
+            print(f"No {args.scale} baseline to check against; run with --save-baseline first")
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Deterministic synthetic corpora for the benchmarks.
+
+Feeds, alert emails and PDF catalog entries are generated from their
+number alone, so any size can be produced on demand without storing it
+and every run sees the same text. Vocabulary mixes the keywords scoring,
+themes and tags look for with filler, in roughly the proportions real
+biotech feeds have.
+"""
+
+import random
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from html import escape
+
+KEYWORDS = ("CRISPR", "gene editing", "longevity", "aging", "brain", "neural", "cancer", "tumor", "oncology",
+            "machine learning", "AI", "biotech", "genomics", "clinical trial", "phase 2", "funding", "Series B",
+            "senescence", "cas9", "DNA", "ethics", "deep learning")
+FILLER = ("study", "researchers", "report", "results", "patients", "company", "platform", "data", "new", "shows",
+          "approach", "team", "early", "model", "cells", "treatment", "announced", "university", "effect", "risk",
+          "analysis", "week", "launch", "partnership", "review", "evidence", "program", "target", "dose", "mice")
+PUBLISHERS = ("STAT", "Nature", "Fierce Biotech", "Endpoints", "Cell Press", "MIT Technology Review", "Science")
+TOPICS = ("CRISPR", "longevity", "neurotech", "cancer immunotherapy", "synthetic biology", "AI drug discovery")
+
+START = datetime(2025, 3, 1, 12, 0)
+
+def sentence(rng, words, keyword_rate=0.15):
+    return " ".join(rng.choice(KEYWORDS) if rng.random() < keyword_rate else rng.choice(FILLER)
+                    for _ in range(words))
+
+def article_text(n):
+    """(title, summary) of synthetic article n."""
+    rng = random.Random(n)
+    return sentence(rng, rng.randint(6, 14)).capitalize(), sentence(rng, rng.randint(25, 60)) + "."
+
+def feed_name(feed_no):
+    return f"Synthetic Feed {feed_no:05d}"
+
+def feed_xml(feed_no, entries):
+    """An RSS 2.0 document for feed feed_no with entries items, newest first."""
+    items = []
+    for i in range(entries):
+        n = feed_no * 1_000_000 + i
+        title, summary = article_text(n)
+        published = START - timedelta(minutes=i * 7 + feed_no % 60)
+        items.append(
+            f"<item><title>{escape(title)}</title><link>https://example.org/{feed_no}/{i}</link>"
+            f"<guid>https://example.org/{feed_no}/{i}</guid><description>{escape(summary)}</description>"
+            f"<pubDate>{format_datetime(published)}</pubDate></item>"
+        )
+    return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>{feed_name(feed_no)}</title><link>https://example.org/{feed_no}</link>"
+            f"<description>Synthetic benchmark feed</description>{''.join(items)}</channel></rss>").encode()
+
+def alert_email(email_no, results=8):
+    """(html_body, alert_topic, email_date) of a Google Alert email in the schema.org layout Google sends."""
+    rng = random.Random(-email_no - 1)
+    topic = TOPICS[email_no % len(TOPICS)]
+    rows = []
+    for i in range(results):
+        title, summary = article_text(-(email_no * 100 + i) - 1)
+        url = f"https://news.example.org/{email_no}/{i}"
+        rows.append(
+            '<tr itemscope itemtype="http://schema.org/Article"><td style="padding:8px 24px">'
+            f'<div><span itemprop="name"><a href="https://www.google.com/url?rct=j&amp;sa=t&amp;url={url}'
+            f'&amp;ct=ga" itemprop="url"><font>{escape(title)}</font></a></span></div>'
+            '<div itemprop="publisher" itemscope itemtype="http://schema.org/Organization">'
+            f'<span itemprop="name">{rng.choice(PUBLISHERS)}</span></div>'
+            f'<div><div itemprop="description">{escape(summary)}</div></div>'
+            f'<div><a href="https://www.google.com/alerts/share?ru={url}">Share</a> '
+            f'<a href="https://www.google.com/alerts/feedback?ffu={url}">Flag as irrelevant</a></div></td></tr>'
+        )
+    body = ('<html><head><meta charset="UTF-8"></head><body><table><tbody>'
+            '<tr><td><a href="https://www.google.com/alerts?source=alertsmail">Google Alerts</a></td></tr>'
+            f"<tr><td><div>{escape(topic)}</div></td></tr>{''.join(rows)}"
+            '<tr><td><a href="https://support.google.com/alerts">Help</a></td></tr></tbody></table></body></html>')
+    return body, f"Google Alerts: {topic}", START + timedelta(hours=email_no)
+
+def pdf_catalog_entry(n):
+    """A PDF catalog line as pdf_index.record_pdf writes it."""
+    title, _ = article_text(n)
+    return {"title": title, "link": f"https://example.org/papers/{n}", "source": PUBLISHERS[n % len(PUBLISHERS)],
+            "date": (START - timedelta(hours=n)).strftime("%Y-%m-%d"), "pdf": f"2025/{n:07d}.pdf",
+            "notion_url": f"https://notion.so/{n:032x}", "added": START.isoformat()}
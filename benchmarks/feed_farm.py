@@ -0,0 +1,93 @@
+"""
+A local HTTP server standing in for many RSS publishers.
+
+Usage: python benchmarks/feed_farm.py [feeds] [entries_per_feed] [port]
+
+Serves /feeds/<n>.xml for n below feeds, each a synthetic feed from
+corpus.feed_xml. Documents are generated on first request and kept in a
+bounded cache, so 10,000 feeds of 100 entries (1M entries) can be served
+without building them all up front. Run it standalone to point the real
+entry points at it, or use FeedFarm from other benchmarks.
+"""
+
+import os
+import sys
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus
+
+CACHED_FEEDS = 2048
+
+class FeedFarm:
+    """Serve `feeds` synthetic feeds of `entries` items each from a background thread."""
+
+    def __init__(self, feeds, entries, port=0):
+        self.feeds = feeds
+        self.entries = entries
+        document = lru_cache(maxsize=CACHED_FEEDS)(lambda feed_no: corpus.feed_xml(feed_no, entries))
+        farm = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                name = self.path.rsplit("/", 1)[-1]
+                try:
+                    feed_no = int(name.split(".", 1)[0])
+                except ValueError:
+                    feed_no = -1
+                if not self.path.startswith("/feeds/") or not 0 <= feed_no < farm.feeds:
+                    self.send_error(404)
+                    return
+                body = document(feed_no)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    def url(self, feed_no):
+        return f"http://127.0.0.1:{self.server.server_port}/feeds/{feed_no}.xml"
+
+    def feed_urls(self, limit=None):
+        """{feed name: url}, as RSS_FEEDS holds them."""
+        return {corpus.feed_name(n): self.url(n) for n in range(min(self.feeds, limit or self.feeds))}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    feeds = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    entries = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else 8765
+    farm = FeedFarm(feeds, entries, port)
+    print(f"Serving {feeds} feeds of {entries} entries at {farm.url(0).rsplit('/', 1)[0]}/<0..{feeds - 1}>.xml")
+    print(f"e.g. RSS_FEEDS='{{\"{corpus.feed_name(0)}\": \"{farm.url(0)}\"}}'")
+    try:
+        farm.server.serve_forever()
+    except KeyboardInterrupt:
+        farm.server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import os
+import json
+import uuid
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from article import article_record
+
+# Checkpoint settings
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "checkpoints")
+MAX_AGE = timedelta(hours=int(os.getenv("CHECKPOINT_MAX_AGE_HOURS", 48)))  # Older unfinished runs start over
+
+def new_run_id():
+    """A sortable id, unique across hosts and restarts."""
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+def source_key(index, source):
+    """
+    Name of a pipeline source that stays the same when a run restarts.
+
+    Hashed, so the credentials some sources carry in their arguments never
+    reach the checkpoint file.
+    """
+    func = getattr(source, "func", source)
+    name = (f"{index}:{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', type(func).__name__)}"
+            f"{getattr(source, 'args', ())!r}{sorted((getattr(source, 'keywords', None) or {}).items())!r}")
+    return hashlib.sha1(name.encode()).hexdigest()[:16]
+
+def _read_entries(path):
+    entries = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break  # A line cut short by the crash; nothing after it was written
+    except FileNotFoundError:
+        pass
+    return entries
+
+class RunCheckpoint:
+    """
+    Journal of one run's stage outputs, so a run that crashes can resume.
+
+    Each line of the file records a stage output as it happens: the
+    articles a source fetched and when it finished, each profile's
+    selection and when selection finished, and each article written. A
+    restarted run replays finished sources instead of fetching them,
+    skips fetch and selection entirely once selection finished, and never
+    writes the same article to a profile twice. It also keeps the original
+    run's last run time and start time, so it considers the same articles
+    and the next run picks up from when this one started. State a source
+    leaves behind for save_state, such as alert high-water marks, is
+    journaled through track_state. finish removes the file once the run's
+    state has been saved.
+    """
+
+    def __init__(self, path, run_id, last_run_time, started):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.run_id = run_id
+        self.last_run_time = last_run_time
+        self.started = started
+        self._lock = threading.Lock()
+        self._partial = defaultdict(list)
+        self._fetched = {}
+        self._selected = []
+        self._selection_done = False
+        self._written = set()
+        self._state = {}
+        self._tracked = {}
+        self._file = None
+
+    @classmethod
+    def open(cls, name, last_run_time, directory=CHECKPOINT_DIR, max_age=MAX_AGE):
+        """Resume the unfinished run of the entry point name, or start a new run."""
+        path = os.path.join(directory, f"{name}.jsonl")
+        entries = _read_entries(path)
+        header = entries[0] if entries and entries[0].get("t") == "run" else None
+        if header and datetime.now() - datetime.fromisoformat(header["started"]) <= max_age:
+            previous = header["last_run_time"]
+            checkpoint = cls(path, header["run_id"], datetime.fromisoformat(previous) if previous else None,
+                             datetime.fromisoformat(header["started"]))
+            for entry in entries[1:]:
+                checkpoint._replay(entry)
+            logging.info(f"Resuming run {checkpoint.run_id}: {len(checkpoint._fetched)} sources fetched, "
+                         f"selection {'finished' if checkpoint._selection_done else 'not finished'}, "
+                         f"{len(checkpoint._written)} articles written")
+            checkpoint._file = open(path, "a", encoding="utf-8")
+            return checkpoint
+
+        if header:
+            logging.warning(f"Discarding checkpoint of run {header['run_id']}, started {header['started']}")
+        os.makedirs(directory, exist_ok=True)
+        checkpoint = cls(path, new_run_id(), last_run_time, datetime.now())
+        checkpoint._file = open(path, "w", encoding="utf-8")
+        checkpoint._append({"t": "run", "run_id": checkpoint.run_id, "started": checkpoint.started.isoformat(),
+                            "last_run_time": last_run_time.isoformat() if last_run_time else None}, sync=True)
+        return checkpoint
+
+    def _replay(self, entry):
+        kind = entry.get("t")
+        if kind == "start":
+            self._partial[entry["src"]] = []
+        elif kind == "article":
+            self._partial[entry["src"]].append(entry["a"])
+        elif kind == "source":
+            self._fetched[entry["src"]] = self._partial.pop(entry["src"], [])
+        elif kind == "selecting":
+            self._selected = []  # Selection restarted; an earlier attempt's picks no longer count
+        elif kind == "selected":
+            self._selected.append((entry["p"], entry["a"]))
+        elif kind == "selection":
+            self._selection_done = True
+        elif kind == "written":
+            self._written.add((entry["p"], entry["link"]))
+        elif kind == "state":
+            self._state[entry["k"]] = entry["v"]
+
+    def _append(self, entry, sync=False):
+        # Flushed per line so a crashed process loses nothing; stage ends are also synced to disk
+        with self._lock:
+            if self._file is None:
+                return  # Closed: a stage still running after the run was abandoned
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def fetched(self, key):
+        """Records a finished source fetched before the restart, or None if it must be fetched."""
+        return self._fetched.get(key)
+
+    def source_started(self, key):
+        self._append({"t": "start", "src": key})
+
+    def record_article(self, key, article):
+        self._append({"t": "article", "src": key, "a": article_record(article)})
+
+    def track_state(self, name, mapping):
+        """
+        Journal mapping, a dict sources fill in for a later save_state call.
+
+        Its journaled contents are restored into it now, so a resumed run
+        saves the state of sources it replays instead of fetching. It is
+        journaled again each time a source finishes.
+        """
+        mapping.update(self._state.get(name, {}))
+        self._tracked[name] = mapping
+
+    def source_finished(self, key):
+        for name, mapping in self._tracked.items():
+            if mapping:
+                self._append({"t": "state", "k": name, "v": dict(mapping)})
+        self._append({"t": "source", "src": key}, sync=True)
+
+    def selection(self):
+        """(profile name, record) pairs of a finished selection, or None if selection must run."""
+        return list(self._selected) if self._selection_done else None
+
+    def selection_started(self):
+        self._append({"t": "selecting"})
+
+    def record_selected(self, profile_name, article):
+        self._append({"t": "selected", "p": profile_name, "a": article_record(article)})
+
+    def selection_finished(self):
+        self._append({"t": "selection"}, sync=True)
+
+    def written(self, profile_name, link):
+        return (profile_name, link) in self._written
+
+    def record_written(self, profile_name, link):
+        self._append({"t": "written", "p": profile_name, "link": link})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def finish(self):
+        """The run completed and saved its state: nothing is left to resume."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
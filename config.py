@@ -0,0 +1,53 @@
+import os
+import json
+import logging
+import threading
+from types import MappingProxyType
+
+def _json_setting(name, default):
+    """Parse a JSON environment variable, falling back to default when unset or invalid."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return json.loads(value)
+    except ValueError as e:
+        logging.error(f"Invalid JSON in {name}: {e}")
+        return default
+
+def load_config():
+    """Read .env and the environment into a read-only mapping."""
+    from dotenv import load_dotenv  # Only needed once per process
+    load_dotenv()
+    return MappingProxyType({
+        "NOTION_TOKEN": os.getenv("NOTION_TOKEN"),
+        "DATABASE_ID": os.getenv("DATABASE_ID"),
+        "EMAIL": os.getenv("EMAIL"),
+        "APP_PASSWORD": os.getenv("APP_PASSWORD"),
+        "DEBUG_FETCH": os.getenv("DEBUG_FETCH", "false").lower() == "true",
+        "IMAP_HOST": os.getenv("IMAP_HOST", "imap.gmail.com"),
+        "IMAP_PORT": int(os.getenv("IMAP_PORT", 993)),
+        "IMAP_SSL": os.getenv("IMAP_SSL", "true").lower() == "true",
+        "ALERT_SOURCES": _json_setting("ALERT_SOURCES", []),
+        "RSS_FEEDS": _json_setting("RSS_FEEDS", {}),
+        "PROFILES": _json_setting("PROFILES", []),
+        "SHARDED_FETCH": os.getenv("SHARDED_FETCH", "false").lower() == "true",
+    })
+
+_config = None
+_config_lock = threading.Lock()
+
+def get_config():
+    """Get the process-wide configuration, loading it on first use."""
+    global _config
+    with _config_lock:
+        if _config is None:
+            _config = load_config()
+        return _config
+
+def reload_config():
+    """Load the configuration again, e.g. after the environment changed."""
+    global _config
+    with _config_lock:
+        _config = load_config()
+        return _config
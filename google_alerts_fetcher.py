@@ -1,255 +1,387 @@
 import os
+import json
 import logging
-import time
 import imaplib
 import email
 from email import utils
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
 from typing import Dict, List, Any, Optional
 
 import utils as util_module
+import pipeline
+import profiles
+from imap_utils import compress_message_set, fetch_messages, find_html_part, decode_body_part
+from logs import sampled
 
 # Constants
 TOP_ARTICLES_MIN = 10
 TOP_ARTICLES_LIMIT = 30
 
-def fetch_google_alerts(last_run_time):
-    """Fetch Google Alerts from Gmail inbox."""
-    articles = []
-    
-    # Get environment variables
-    env = util_module.load_environment()
-    email_address = env["EMAIL"]
-    app_password = env["APP_PASSWORD"]
-    
-    # Check for credentials
-    if not email_address or not app_password:
-        logging.error("Gmail credentials missing. EMAIL or APP_PASSWORD not set in environment.")
-        return articles
-    
-    logging.info(f"Attempting to connect to Gmail using account: {email_address}")
-    
+# Fetch only the headers we use plus the MIME structure, then just the HTML part
+HEADER_QUERY = "(BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS (DATE SUBJECT)])"
+
+# UID sync settings
+ALERTS_SENDER = "googlealerts-noreply@google.com"
+SYNC_STATE_FILE = "imap_sync_state.json"
+PROCESSED_LABEL = os.getenv("ALERTS_PROCESSED_LABEL", "Processed Alerts")  # Gmail label
+PROCESSED_KEYWORD = "$AlertProcessed"  # Keyword used on servers without Gmail labels
+
+# High-water marks reached by fetch_google_alerts, waiting to be saved
+_pending_sync_state = {}
+
+def read_alert_headers(msg, last_run_time):
+    """
+    Get (email_date, alert_topic) from a Google Alert email's headers.
+
+    Returns None when the email should be skipped and left unprocessed.
+    """
+    # Get email date
+    date_tuple = utils.parsedate_tz(msg["Date"])
+    if not date_tuple:
+        logging.warning(f"Could not parse date from email: {msg['Subject']}")
+        return None
+
+    email_date = datetime.fromtimestamp(utils.mktime_tz(date_tuple))
+    logging.info("Processing Google Alert email from %s, Subject: %s", email_date, msg["Subject"],
+                 extra=sampled("alert_email"))
+
+    if email_date <= last_run_time:
+        logging.info("Skipping Google Alert email from %s - older than last run time %s", email_date, last_run_time,
+                     extra=sampled("old_alert_email"))
+        return None
+
+    # Try to extract the alert topic from the subject line
+    subject = msg["Subject"] or ""
+    alert_topic = "Google Alerts"
+    # Google Alert emails usually have subjects like "Google Alert - biotech" or "Google Alert - CRISPR"
+    if "Google Alert - " in subject:
+        topic = subject.split("Google Alert - ", 1)[1].strip()
+        alert_topic = f"Google Alerts: {topic}"
+    return email_date, alert_topic
+
+def parse_alert_emails(emails, last_run_time):
+    """
+    Extract articles from (id, headers, html_body) Google Alert emails.
+
+    HTML bodies are parsed together so large backlogs use every core.
+    Returns (id, processed, articles) tuples; processed is False when the
+    email was skipped and should be left unprocessed.
+    """
+    results = []
+    jobs = []
+    for num, msg, body in emails:
+        header_info = read_alert_headers(msg, last_run_time)
+        if header_info is None:
+            results.append((num, False, []))
+        elif body is None:
+            logging.info(f"Email has no HTML part, skipping: {msg['Subject']}")
+            results.append((num, True, []))
+        else:
+            results.append((num, True, None))
+            jobs.append((body, header_info[1], header_info[0]))
+
+    from alert_parser import extract_many  # lxml is only needed once there are emails to parse
+    parsed = iter(extract_many(jobs))
+    results = [(num, processed, next(parsed) if articles is None else articles) for num, processed, articles in results]
+    for num, processed, articles in results:
+        if articles:
+            logging.info("Found %d articles in Google Alert email %s", len(articles), num,
+                         extra=sampled("alert_email_articles"))
+    return results
+
+def fetch_alert_emails(imap, email_ids, uid=False, failed=None):
+    """
+    Fetch Google Alert emails without downloading whole messages.
+
+    Reads BODYSTRUCTURE and the Date/Subject headers first, then pulls only
+    each message's text/html section with BODY.PEEK, batching messages that
+    share a section number into one FETCH. Yields (id, headers, html_body).
+    Ids whose FETCH failed are added to the failed list, if given.
+    """
+    headers = {}
+    sections = {}
+    for num, fields in fetch_messages(imap, email_ids, HEADER_QUERY, uid=uid, failed=failed):
+        if uid:
+            num = fields.get("UID", num)
+        header_bytes = next((v for k, v in fields.items() if k.startswith("BODY[HEADER") and isinstance(v, bytes)), b"")
+        headers[num] = email.message_from_bytes(header_bytes)
+        html_part = find_html_part(fields.get("BODYSTRUCTURE"))
+        if html_part:
+            sections.setdefault(html_part[0], []).append((num, html_part))
+        else:
+            yield num, headers[num], None
+
+    for section, parts in sections.items():
+        part_info = dict(parts)
+        for num, fields in fetch_messages(imap, list(part_info), f"(BODY.PEEK[{section}])", uid=uid, failed=failed):
+            if uid:
+                num = fields.get("UID", num)
+            if num not in part_info:
+                continue
+            _, encoding, charset = part_info[num]
+            payload = fields.get(f"BODY[{section}]")
+            body = decode_body_part(payload, encoding, charset) if isinstance(payload, bytes) else None
+            yield num, headers[num], body
+
+def load_sync_state():
+    """Load the per-mailbox UIDVALIDITY / last processed UID high-water marks."""
     try:
-        # Connect to Gmail
-        imap = imaplib.IMAP4_SSL("imap.gmail.com")
-        login_result = imap.login(email_address, app_password)
-        logging.info(f"Gmail login result: {login_result}")
-        
-        # Select the inbox
-        select_result = imap.select("inbox")
-        logging.info(f"Gmail select inbox result: {select_result}")
-        
-        # Search for Google Alert emails since last run
+        with open(SYNC_STATE_FILE, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_alert_sync_state(marks=None):
+    """
+    Persist the high-water marks reached by the last fetch.
+
+    Call this once fetched articles have been handed to Notion, so a run
+    that fails in between re-fetches the same emails next time.
+    """
+    marks = marks if marks is not None else _pending_sync_state
+    if not marks:
+        return
+    state = load_sync_state()
+    state.update(marks)
+    with open(SYNC_STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2)
+    marks.clear()
+
+def track_sync_state(checkpoint):
+    """Journal the pending high-water marks in the run checkpoint, restoring those of a resumed run."""
+    checkpoint.track_state("alert_sync", _pending_sync_state)
+
+def get_uidvalidity(imap, mailbox):
+    """Read UIDVALIDITY from the untagged SELECT response."""
+    _, data = imap.response("UIDVALIDITY")
+    if data and data[0]:
+        return int(data[0])
+    _, data = imap.status(mailbox, "(UIDVALIDITY)")
+    return int(data[0].decode().rsplit("UIDVALIDITY", 1)[1].strip(" )"))
+
+def mark_processed(imap, uids):
+    """Label processed emails in one STORE instead of deleting them."""
+    message_set = compress_message_set(uids)
+    if "X-GM-EXT-1" in imap.capabilities:
+        imap.uid("STORE", message_set, "+X-GM-LABELS", f'("{PROCESSED_LABEL}")')
+    else:
+        imap.uid("STORE", message_set, "+FLAGS", f"({PROCESSED_KEYWORD})")
+
+def connect_imap(email_address, app_password, mailbox="inbox", host=None, port=None):
+    """Log in and select a mailbox; returns (imap, uidvalidity)."""
+    env = util_module.load_environment()
+    host = host or env["IMAP_HOST"]
+    port = port or env["IMAP_PORT"]
+    if env["IMAP_SSL"]:
+        imap = imaplib.IMAP4_SSL(host, port)
+    else:
+        imap = imaplib.IMAP4(host, port)
+    login_result = imap.login(email_address, app_password)
+    logging.info(f"Gmail login result: {login_result}")
+
+    # Select the mailbox; labels like "[Gmail]/All Mail" need quoting
+    if " " in mailbox and not mailbox.startswith('"'):
+        mailbox = f'"{mailbox}"'
+    select_result = imap.select(mailbox)
+    logging.info(f"Gmail select {mailbox} result: {select_result}")
+    return imap, get_uidvalidity(imap, mailbox)
+
+def sync_mailbox(imap, state_key, uidvalidity, last_run_time, debug_mode=False):
+    """
+    Fetch and parse alert emails above the saved high-water mark.
+
+    Returns (articles, mark), where mark is the state to save once the
+    articles have been written, or None when there is nothing to record.
+    When a FETCH batch fails, the mark stops below its lowest UID so those
+    emails are fetched again next run.
+    """
+    articles = []
+    mailbox_state = load_sync_state().get(state_key, {})
+    last_uid = 0
+    if not debug_mode and mailbox_state.get("uidvalidity") == uidvalidity:
+        last_uid = mailbox_state.get("last_uid", 0)
+
+    if last_uid:
+        # Incremental sync: everything above the high-water mark is new
+        search_criteria = f'(UID {last_uid + 1}:* FROM "{ALERTS_SENDER}")'
+        email_filter_time = datetime.min
+    else:
+        # Bootstrap from the last run time
         since_date = last_run_time.strftime("%d-%b-%Y")
-        search_criteria = f'(SINCE "{since_date}" FROM "googlealerts-noreply@google.com")'
-        logging.info(f"Gmail search criteria: {search_criteria}")
-        
-        search_result = imap.search(None, search_criteria)
-        logging.info(f"Gmail search result status: {search_result[0]}")
-        
-        # Parse emails
-        if search_result[0] != 'OK' or not search_result[1][0]:
-            logging.info(f"No Google Alert emails found matching the criteria: {search_criteria}")
-            imap.logout()
-            return articles
-            
-        email_ids = search_result[1][0].split()
-        logging.info(f"Found {len(email_ids)} Google Alert emails since {since_date}")
-        
-        # Process each email
-        for num in email_ids:
-            _, msg_data = imap.fetch(num, "(RFC822)")
-            msg = email.message_from_bytes(msg_data[0][1])
-            
-            # Get email date
-            date_tuple = utils.parsedate_tz(msg["Date"])
-            if not date_tuple:
-                logging.warning(f"Could not parse date from email: {msg['Subject']}")
-                continue
-                
-            email_date = datetime.fromtimestamp(utils.mktime_tz(date_tuple))
-            logging.info(f"Processing Google Alert email from {email_date}, Subject: {msg['Subject']}")
-            
-            if email_date <= last_run_time:
-                logging.info(f"Skipping Google Alert email from {email_date} - older than last run time {last_run_time}")
-                continue
-            
-            # Try to extract the alert topic from the subject line
-            subject = msg["Subject"] or ""
-            alert_topic = "Google Alerts"
-            # Google Alert emails usually have subjects like "Google Alert - biotech" or "Google Alert - CRISPR"
-            if "Google Alert - " in subject:
-                topic = subject.split("Google Alert - ", 1)[1].strip()
-                alert_topic = f"Google Alerts: {topic}"
-                logging.info(f"Extracted alert topic: {topic}")
-            
-            # Parse email body
-            if msg.is_multipart():
-                for part in msg.walk():
-                    if part.get_content_type() == "text/html":
-                        body = part.get_payload(decode=True).decode()
-                        soup = BeautifulSoup(body, "html.parser")
-                        
-                        # Find all article links in the Google Alert email
-                        links_found = 0
-                        for a in soup.find_all("a", href=True):
-                            url = a["href"]
-                            # Filter out Google's own links and tracking URLs
-                            if "google.com/alerts" in url or "support.google.com" in url:
-                                continue
-                            
-                            links_found += 1
-                            title = a.text.strip()
-                            if not title:
-                                continue
-                                
-                            # Extract summary from parent element
-                            parent = a.find_parent()
-                            summary = parent.text.strip() if parent else ""
-                            # Remove the title from the summary and trim it
-                            summary = summary.replace(title, "", 1).strip()[:2000]
-                            
-                            # Skip if we don't have a valid URL
-                            if not url or not url.startswith(('http://', 'https://')):
-                                logging.warning(f"Skipping Google Alert article with invalid URL: {url}")
-                                continue
-                                
-                            # Skip if we don't have a title
-                            if not title:
-                                logging.warning(f"Skipping Google Alert article with missing title for URL: {url}")
-                                continue
-                            
-                            logging.info(f"Found article in Google Alert: {title[:50]}...")
-                            
-                            # Create an article entry similar to RSS format
-                            articles.append({
-                                "title": title.strip(),
-                                "link": url.strip(),  # Ensure URL is properly stripped
-                                "summary": summary,
-                                "source": alert_topic,
-                                "source_type": "Google Alerts",
-                                "published_date": email_date,
-                                "published_parsed": email_date.timetuple()[:6]
-                            })
-                        
-                        logging.info(f"Found {links_found} links in the email")
-            else:
-                logging.info(f"Email is not multipart, skipping: {subject}")
-            
-            # Mark email as deleted to avoid processing it again
-            imap.store(num, '+FLAGS', '\\Deleted')
-        
-        # Permanently remove emails marked for deletion
-        imap.expunge()
-        imap.logout()
-        logging.info(f"Successfully processed {len(articles)} articles from Google Alerts")
-        for i, article in enumerate(articles[:3]):  # Log first 3 articles for debugging
-            logging.info(f"Google Alert article {i+1}: {article['title'][:50]}... | Date: {article['published_date']}")
-        
-        return articles
-    except Exception as e:
-        logging.error(f"Error fetching Google Alerts: {str(e)}")
-        if 'imap' in locals() and imap:
+        search_criteria = f'(SINCE "{since_date}" FROM "{ALERTS_SENDER}")'
+        email_filter_time = last_run_time
+        if mailbox_state:
+            logging.info(f"UIDVALIDITY changed for {state_key}, falling back to a date search")
+    logging.info(f"Gmail search criteria: {search_criteria}")
+
+    search_result = imap.uid("SEARCH", None, search_criteria)
+    logging.info(f"Gmail search result status: {search_result[0]}")
+
+    # "n:*" always matches the newest message, even when its UID is below n
+    uids = []
+    if search_result[0] == 'OK' and search_result[1][0]:
+        uids = sorted(int(u) for u in search_result[1][0].split() if int(u) > last_uid)
+
+    if not uids:
+        logging.info(f"No Google Alert emails found matching the criteria: {search_criteria}")
+        return articles, None
+
+    logging.info(f"Found {len(uids)} new Google Alert emails for {state_key}")
+
+    # Fetch emails in batches and process each one
+    processed_uids = []
+    failed = []
+    emails = fetch_alert_emails(imap, uids, uid=True, failed=failed)
+    for uid, processed, email_articles in parse_alert_emails(emails, email_filter_time):
+        articles.extend(email_articles)
+        if processed:
+            processed_uids.append(uid)
+
+    if debug_mode:
+        return articles, None
+
+    # Label processed emails in one STORE so they stay in the mailbox
+    if processed_uids:
+        mark_processed(imap, processed_uids)
+    if failed:
+        first_failed = min(int(u) for u in failed)
+        logging.warning(f"{len(failed)} Google Alert emails in {state_key} could not be fetched, "
+                        f"will retry from UID {first_failed}")
+        done = [u for u in uids if u < first_failed]
+        if not done:
+            return articles, None
+        return articles, {"uidvalidity": uidvalidity, "last_uid": max(done)}
+    return articles, {"uidvalidity": uidvalidity, "last_uid": max(uids)}
+
+def get_alert_sources(env=None):
+    """
+    List the mailboxes to read Google Alerts from.
+
+    ALERT_SOURCES is a JSON list of {"email", "app_password", "mailboxes"}
+    entries (optionally "host" and "port"); missing credentials fall back to
+    EMAIL and APP_PASSWORD. Without it, only the EMAIL inbox is read.
+    Returns one dict per (account, mailbox) pair.
+    """
+    env = env or util_module.load_environment()
+    configured = env["ALERT_SOURCES"] or [{}]
+    sources = []
+    for entry in configured:
+        email_address = entry.get("email") or env["EMAIL"]
+        app_password = entry.get("app_password") or env["APP_PASSWORD"]
+        if not email_address or not app_password:
+            logging.error(f"Gmail credentials missing for alert source {entry}, skipping it")
+            continue
+        mailboxes = entry.get("mailboxes") or [entry.get("mailbox", "inbox")]
+        for mailbox in mailboxes:
+            sources.append({
+                "email": email_address,
+                "app_password": app_password,
+                "mailbox": mailbox,
+                "host": entry.get("host"),
+                "port": entry.get("port"),
+            })
+    return sources
+
+def fetch_alert_source(source, last_run_time, debug_mode=False):
+    """
+    Fetch new alert articles from one mailbox over its own connection.
+
+    Returns (state_key, articles, mark). Connection and IMAP errors are
+    raised, so a sharded work unit is retried; fetch_google_alerts logs them.
+    """
+    state_key = f"{source['email']}/{source['mailbox']}"
+    logging.info(f"Attempting to connect to Gmail using account: {state_key}")
+    imap = None
+    try:
+        imap, uidvalidity = connect_imap(source["email"], source["app_password"], source["mailbox"],
+                                         source.get("host"), source.get("port"))
+        articles, mark = sync_mailbox(imap, state_key, uidvalidity, last_run_time, debug_mode)
+        logging.info(f"Fetched {len(articles)} articles from {state_key}")
+        return state_key, articles, mark
+    finally:
+        if imap is not None:
             try:
                 imap.logout()
-            except:
+            except Exception:
                 pass
-        return articles
-
-def add_articles_to_notion(articles, last_run_time):
-    """Add articles to Notion and return statistics."""
-    articles_added = 0
-    added_articles_info = []
-    
-    # Calculate relevancy for all articles
-    for article in articles:
-        if "relevancy" not in article:
-            article["relevancy"] = util_module.calculate_relevancy(
-                article.get('title', ''), 
-                article.get('summary', ''),
-                article.get('source_type', 'Google Alerts'),
-                article.get('source', '')
-            )
-        # Log the relevancy score for debugging
-        logging.info(f"Article relevancy: {article['relevancy']:.2f} - {article.get('title', '')[:50]}... (Source: {article.get('source', '')})")
-    
-    # Sort by relevancy (highest first)
-    articles.sort(key=lambda x: x.get("relevancy", 0), reverse=True)
-    
-    # Take top N articles
-    articles_to_add = articles[:TOP_ARTICLES_LIMIT]
-    logging.info(f"Adding top {len(articles_to_add)} articles (from {len(articles)} total)")
-    
-    # Add articles to Notion
-    for article in articles_to_add:
-        try:
-            if 'link' not in article or not article['link']:
-                logging.warning(f"Skipping article without link: {article.get('title', 'Unknown')}")
+
+def merge_alert_articles(article_lists):
+    """Merge per-source article lists, keeping the first copy of each link."""
+    merged = []
+    seen = set()
+    for articles in article_lists:
+        for article in articles:
+            if article["link"] in seen:
                 continue
-                
-            success, article_info = util_module.add_to_notion(article, last_run_time)
-            if success:
-                articles_added += 1
-                if article_info:
-                    added_articles_info.append(article_info)
-            
-            # Respect Notion's rate limits
-            time.sleep(0.5)
-            
+            seen.add(article["link"])
+            merged.append(article)
+    return merged
+
+def fetch_google_alerts(last_run_time, sources=None):
+    """
+    Fetch Google Alerts from every configured mailbox.
+
+    Each source is read over its own connection in parallel, so a run takes
+    about as long as the slowest mailbox. Articles are merged and
+    deduplicated by link.
+
+    Emails are tracked by UID: only UIDs above the stored high-water mark are
+    fetched, and processed emails are labelled rather than expunged. A date
+    search is used to bootstrap when there is no mark, when UIDVALIDITY has
+    changed, and in debug mode.
+    """
+    env = util_module.load_environment()
+    sources = sources if sources is not None else get_alert_sources(env)
+    if not sources:
+        logging.error("No Google Alert sources configured. Set EMAIL and APP_PASSWORD or ALERT_SOURCES.")
+        return []
+
+    def fetch(source):
+        try:
+            return fetch_alert_source(source, last_run_time, env["DEBUG_FETCH"])
         except Exception as e:
-            logging.error(f"Error adding article to Notion: {e} - Article: {article.get('title', 'Unknown')}")
-    
-    return articles_added, added_articles_info
+            # One failing mailbox leaves the others' articles and marks intact
+            logging.error(f"Error fetching Google Alerts from {source['email']}/{source['mailbox']}: {e}")
+            return None, [], None
+
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        results = list(pool.map(fetch, sources))
+
+    # Record the new high-water marks; they are saved once the articles are written
+    for state_key, _, mark in results:
+        if mark:
+            _pending_sync_state[state_key] = mark
+
+    fetched = sum(len(articles) for _, articles, _ in results)
+    articles = merge_alert_articles(articles for _, articles, _ in results)
+    logging.info(f"Successfully processed {len(articles)} articles from Google Alerts "
+                 f"({fetched - len(articles)} duplicates across {len(sources)} sources dropped)")
+    for i, article in enumerate(articles[:3]):  # Log first 3 articles for debugging
+        logging.info(f"Google Alert article {i+1}: {article['title'][:50]}... | Date: {article['published_date']}")
+    return articles
 
 def main():
     """Main function to run the Google Alerts fetcher independently."""
     # Load configuration and set up logging
-    util_module.load_environment()
+    env = util_module.load_environment()
     util_module.setup_logging()
-    
+
     logging.info("Starting Google Alerts fetch process...")
-    
-    # Get the last run time
     last_run_time = util_module.get_last_run_time()
-    if last_run_time:
-        logging.info(f"Using last run time: {last_run_time.isoformat()}")
-    else:
-        logging.info("First run or no last run time found. Will fetch all available articles.")
-    
-    # In debug mode, use a date 7 days ago instead of last run time
-    debug_mode = os.getenv("DEBUG_FETCH", "false").lower() == "true"
-    if debug_mode:
-        effective_last_run = datetime.now() - timedelta(days=30)  # Use 30 days for greater testing scope
-        logging.info(f"DEBUG MODE: Using effective date of {effective_last_run.isoformat()}")
-    else:
-        effective_last_run = last_run_time
-    
-    # Fetch articles from Google Alerts
-    articles = fetch_google_alerts(effective_last_run)
-    logging.info(f"Fetched {len(articles)} articles from Google Alerts")
-    
-    # Add articles to Notion
-    articles_added, added_articles_info = add_articles_to_notion(articles, effective_last_run)
-    
-    # Create an index of all downloaded PDFs
-    index_path = util_module.create_pdf_index(added_articles_info)
-    if index_path:
-        logging.info(f"PDF index created at {index_path}")
-    
-    # Do not save the last run time if in debug mode
-    if not debug_mode:
-        util_module.save_last_run_time()
-        logging.info("Updated last run time")
-    else:
-        logging.info("DEBUG MODE: Not updating last run time")
-    
-    # Show summary
-    logging.info("=" * 50)
-    logging.info(f"SUMMARY: Added {articles_added} new articles from Google Alerts")
-    logging.info(f"  - Articles fetched: {len(articles)}")
-    logging.info(f"  - Articles fetched but not added: {len(articles) - articles_added}")
-    logging.info("=" * 50)
+
+    # In debug mode, look further back than the last run time
+    if env["DEBUG_FETCH"]:
+        last_run_time = datetime.now() - timedelta(days=30)  # Use 30 days for greater testing scope
+        logging.info(f"DEBUG MODE: Using effective date of {last_run_time.isoformat()}")
+
+    checkpoint = pipeline.start_run("google_alerts_fetcher", last_run_time)
+    last_run_time = checkpoint.last_run_time
+    track_sync_state(checkpoint)
+    pipeline.run([partial(fetch_google_alerts, last_run_time)], last_run_time,
+                 profiles=profiles.load_profiles(env, TOP_ARTICLES_LIMIT), debug_mode=env["DEBUG_FETCH"],
+                 save_state=[save_alert_sync_state], checkpoint=checkpoint)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,168 @@
+import re
+import base64
+import codecs
+import quopri
+import logging
+
+FETCH_BATCH_SIZE = 100  # Messages per IMAP FETCH round trip
+
+LITERAL_MARKER = re.compile(rb"\{\d+\}$")
+
+def compress_message_set(ids):
+    """Collapse message numbers into an IMAP message set such as "1:5,7,9:10"."""
+    numbers = sorted({int(i) for i in ids})
+    ranges = []
+    for n in numbers:
+        if ranges and n == ranges[-1][1] + 1:
+            ranges[-1][1] = n
+        else:
+            ranges.append([n, n])
+    return ",".join(str(a) if a == b else f"{a}:{b}" for a, b in ranges)
+
+def _tokenize(parts):
+    """Split response text into parens, atoms, quoted strings and literals."""
+    for part in parts:
+        if isinstance(part, bytes):
+            yield "literal", part
+            continue
+        i = 0
+        while i < len(part):
+            c = part[i]
+            if c in " \r\n":
+                i += 1
+            elif c in "()":
+                yield c, None
+                i += 1
+            elif c == '"':
+                i += 1
+                value = []
+                while i < len(part) and part[i] != '"':
+                    if part[i] == "\\":
+                        i += 1
+                    value.append(part[i])
+                    i += 1
+                yield "string", "".join(value)
+                i += 1
+            else:
+                # Atoms like BODY[HEADER.FIELDS (DATE SUBJECT)] keep their bracketed section intact
+                start = i
+                depth = 0
+                while i < len(part) and (depth or part[i] not in ' ()\r\n'):
+                    if part[i] == "[":
+                        depth += 1
+                    elif part[i] == "]":
+                        depth -= 1
+                    i += 1
+                yield "atom", part[start:i]
+
+def _build(tokens):
+    """Turn a token stream into nested lists."""
+    stack = [[]]
+    for kind, value in tokens:
+        if kind == "(":
+            stack.append([])
+        elif kind == ")":
+            if len(stack) > 1:
+                done = stack.pop()
+                stack[-1].append(done)
+        elif kind == "atom":
+            stack[-1].append(None if value.upper() == "NIL" else value)
+        else:
+            stack[-1].append(value)
+    return stack[0]
+
+def parse_fetch_response(data):
+    """
+    Parse the data list returned by imaplib's fetch() or uid('FETCH').
+
+    Returns {message_number: {ITEM_NAME: value}}, where literal values are
+    bytes and BODYSTRUCTURE is a nested list.
+    """
+    parts = []
+    for item in data:
+        if isinstance(item, tuple):
+            head, literal = item
+            parts.append(LITERAL_MARKER.sub(b"", head).decode("utf-8", "replace"))
+            parts.append(literal)
+        elif isinstance(item, bytes):
+            parts.append(item.decode("utf-8", "replace"))
+    tree = _build(_tokenize(parts))
+
+    messages = {}
+    for number, fields in zip(tree[::2], tree[1::2]):
+        if not isinstance(fields, list):
+            continue
+        entry = messages.setdefault(str(number), {})
+        for key, value in zip(fields[::2], fields[1::2]):
+            if isinstance(key, str):
+                entry[key.upper()] = value
+    return messages
+
+def fetch_messages(imap, ids, query="(RFC822)", batch_size=FETCH_BATCH_SIZE, uid=False, failed=None):
+    """
+    Fetch messages over message-set ranges, one round trip per batch.
+
+    Yields (message_number, fields) pairs, fields being the parsed FETCH items.
+    The ids of batches the server refused are added to the failed list, if given.
+    """
+    ids = [i.decode() if isinstance(i, bytes) else str(i) for i in ids]
+    for start in range(0, len(ids), batch_size):
+        message_set = compress_message_set(ids[start:start + batch_size])
+        if uid:
+            status, data = imap.uid("FETCH", message_set, query)
+        else:
+            status, data = imap.fetch(message_set, query)
+        if status != 'OK':
+            logging.warning(f"IMAP fetch failed for message set {message_set}: {status}")
+            if failed is not None:
+                failed.extend(ids[start:start + batch_size])
+            continue
+        for number, fields in parse_fetch_response(data).items():
+            yield number, fields
+
+def find_html_part(structure, section=""):
+    """
+    Locate the first text/html part in a parsed BODYSTRUCTURE.
+
+    Returns (section, encoding, charset), or None if the message has no HTML part.
+    """
+    if not isinstance(structure, list) or not structure:
+        return None
+
+    # Multipart bodies list their parts first, followed by the subtype
+    if isinstance(structure[0], list):
+        index = 0
+        for part in structure:
+            if not isinstance(part, list):
+                break
+            index += 1
+            found = find_html_part(part, f"{section}.{index}" if section else str(index))
+            if found:
+                return found
+        return None
+
+    body_type = (structure[0] or "").lower()
+    subtype = (structure[1] or "").lower() if len(structure) > 1 else ""
+    if body_type != "text" or subtype != "html":
+        return None
+
+    params = structure[2] if len(structure) > 2 and isinstance(structure[2], list) else []
+    charset = "utf-8"
+    for key, value in zip(params[::2], params[1::2]):
+        if isinstance(key, str) and key.lower() == "charset" and value:
+            charset = value
+    encoding = (structure[5] or "7bit").lower() if len(structure) > 5 else "7bit"
+    # A single-part message still exposes its body as section 1
+    return section or "1", encoding, charset
+
+def decode_body_part(payload, encoding, charset):
+    """Decode a body section using its transfer encoding and declared charset."""
+    if encoding == "base64":
+        payload = base64.b64decode(payload)
+    elif encoding == "quoted-printable":
+        payload = quopri.decodestring(payload)
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        charset = "utf-8"
+    return payload.decode(charset, errors="replace")
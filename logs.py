@@ -0,0 +1,130 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# Logging settings
+LOG_FILE = os.getenv("LOG_FILE", "biotech_rss.log")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # Of the log file: "json" (one object per line) or "text"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_SAMPLE_FIRST = int(os.getenv("LOG_SAMPLE_FIRST", 20))  # Per-item records logged before sampling starts
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 100))  # After that, one record in this many is logged
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Pass as extra= on per-item log calls: {"sample": <name of the call site>}
+def sampled(name):
+    return {"sample": name}
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with extra= fields kept as keys."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class Sampler(logging.Filter):
+    """
+    Thin out per-item records, those logged with extra=sampled(name).
+
+    The first `first` records of each name pass, then one in every `every`,
+    carrying the number dropped since the last one as `skipped`. Other
+    records always pass.
+    """
+
+    def __init__(self, first=LOG_SAMPLE_FIRST, every=LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.first = first
+        self.every = max(every, 1)
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        name = getattr(record, "sample", None)
+        if name is None:
+            return True
+        with self._lock:
+            seen = self._seen[name] = self._seen.get(name, 0) + 1
+        if seen <= self.first:
+            return True
+        if (seen - self.first) % self.every:
+            return False
+        record.skipped = self.every - 1
+        return True
+
+    def counts(self):
+        with self._lock:
+            return dict(self._seen)
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Only merge the arguments here; the listener thread does the formatting
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_listener = None
+_lock = threading.Lock()
+
+def setup_logging(log_file=None, level=None, log_format=None):
+    """
+    Log to the console and log_file through a background writer thread.
+
+    Callers only put records on a queue; a QueueListener formats them and
+    writes them out, as text on the console and as JSON lines (LOG_FORMAT)
+    in the file. Per-item records are sampled. Calling it again replaces
+    the previous setup.
+    """
+    global _listener
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+    file_handler = logging.FileHandler(log_file or LOG_FILE)
+    file_handler.setFormatter(JsonFormatter() if (log_format or LOG_FORMAT) == "json"
+                              else logging.Formatter(TEXT_FORMAT))
+
+    records = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(Sampler())
+    listener = QueueListener(records, console, file_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    with _lock:
+        if _listener is not None:
+            stop_logging()
+        for old in list(root.handlers):
+            root.removeHandler(old)
+            old.close()
+        root.addHandler(handler)
+        root.setLevel(level or LOG_LEVEL)
+        listener.start()
+        _listener = listener
+
+def stop_logging():
+    """Write out the queued records and stop the writer thread."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+atexit.register(stop_logging)
@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Metrics settings
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+PROMETHEUS_FILE = os.getenv("METRICS_TEXTFILE", os.path.join(METRICS_DIR, "biotech_rss.prom"))
+REPORT_FILE = os.path.join(METRICS_DIR, "last_run.json")
+HISTORY_FILE = os.path.join(METRICS_DIR, "history.sqlite3")
+PREFIX = "biotech_rss_"
+
+class Metrics:
+    """
+    Counters and timings of the current run.
+
+    A counter adds up values under a name and label set; a timing keeps
+    the count, sum and maximum of the durations observed under one. Both
+    are cheap enough to update per article or per request from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._timings = {}
+            self.started = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                self._timings[key] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the with block under name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0)
+
+    def timing(self, name, **labels):
+        """(count, total seconds, max seconds) observed under name and labels."""
+        with self._lock:
+            return tuple(self._timings.get(self._key(name, labels), (0, 0.0, 0.0)))
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._counters.items()), sorted((key, list(value)) for key, value in self._timings.items())
+
+    def report(self, **run_info):
+        """JSON-serializable summary of the run, including cache hit rates."""
+        counters, timings = self._items()
+        caches = {}
+        for (name, labels), value in counters:
+            if name == "cache_requests":
+                labels = dict(labels)
+                caches.setdefault(labels["cache"], {"hit": 0, "miss": 0})[labels["result"]] += value
+        return {
+            **run_info,
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "duration_seconds": round(time.time() - self.started, 3),
+            "cache_hit_rates": {cache: round(c["hit"] / (c["hit"] + c["miss"]), 4)
+                                for cache, c in caches.items() if c["hit"] + c["miss"]},
+            "counters": [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in counters],
+            "timings": [{"name": name, "labels": dict(labels), "count": count, "seconds": round(total, 6),
+                         "max_seconds": round(longest, 6)} for (name, labels), (count, total, longest) in timings],
+        }
+
+    def prometheus(self):
+        """The metrics in Prometheus text exposition format, e.g. for node_exporter's textfile collector."""
+        counters, timings = self._items()
+        lines = []
+        declared = set()
+
+        def add(family, kind, sample, labels, value):
+            if family not in declared:
+                declared.add(family)
+                lines.append(f"# TYPE {family} {kind}")
+            lines.append(f"{sample}{_label_block(labels)} {value:g}")
+
+        # Items are sorted by name, so each family's samples stay together
+        for (name, labels), value in counters:
+            add(f"{PREFIX}{name}_total", "counter", f"{PREFIX}{name}_total", labels, value)
+        for (name, labels), (count, total, _) in timings:
+            family = f"{PREFIX}{name}_seconds"
+            add(family, "summary", f"{family}_count", labels, count)
+            add(family, "summary", f"{family}_sum", labels, total)
+        for (name, labels), (_, _, longest) in timings:
+            add(f"{PREFIX}{name}_seconds_max", "gauge", f"{PREFIX}{name}_seconds_max", labels, longest)
+        add(f"{PREFIX}last_run_timestamp_seconds", "gauge", f"{PREFIX}last_run_timestamp_seconds", (),
+            round(time.time()))
+        return "\n".join(lines) + "\n"
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_block(labels):
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}" if labels else ""
+
+def _write_atomic(path, text):
+    """Replace path in one rename, so collectors never read a half-written file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+class RunHistory:
+    """
+    Every run's report in SQLite, with one row per counter and timing so
+    a metric's trend across runs is one query.
+    """
+
+    def __init__(self, path=HISTORY_FILE):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, entry_point TEXT, started TEXT, duration REAL, report TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS run_metrics ("
+            "run_id TEXT NOT NULL, metric TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS run_metrics_metric ON run_metrics (metric, labels)")
+        self._db.commit()
+
+    def record(self, report):
+        rows = [(report["run_id"], item["name"], json.dumps(item["labels"], sort_keys=True), item["value"])
+                for item in report["counters"]]
+        for item in report["timings"]:
+            labels = json.dumps(item["labels"], sort_keys=True)
+            rows.append((report["run_id"], f"{item['name']}_seconds", labels, item["seconds"]))
+        rows.append((report["run_id"], "run_seconds", "{}", report["duration_seconds"]))
+        with self._db:
+            self._db.execute("DELETE FROM run_metrics WHERE run_id = ?", (report["run_id"],))
+            self._db.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+                             (report["run_id"], report.get("entry_point"), report["started"],
+                              report["duration_seconds"], json.dumps(report)))
+            self._db.executemany("INSERT INTO run_metrics VALUES (?, ?, ?, ?)", rows)
+
+    def trend(self, metric, labels=None, limit=20):
+        """(started, value) of metric in the latest runs, oldest first; labels None sums every label set."""
+        sql = ("SELECT runs.started, SUM(value) FROM run_metrics JOIN runs USING (run_id) WHERE metric = ?"
+               + (" AND labels = ?" if labels is not None else "")
+               + " GROUP BY run_id ORDER BY runs.started DESC LIMIT ?")
+        params = [metric] + ([json.dumps(labels, sort_keys=True)] if labels is not None else []) + [limit]
+        return list(reversed(self._db.execute(sql, params).fetchall()))
+
+    def close(self):
+        self._db.close()
+
+def export_run(run_id, entry_point, extra=None, metrics=None, prometheus_file=PROMETHEUS_FILE,
+               report_file=REPORT_FILE, history_file=HISTORY_FILE):
+    """Write the Prometheus textfile and JSON report for the finished run and add it to the history."""
+    metrics = metrics or get_metrics()
+    report = metrics.report(run_id=run_id, entry_point=entry_point, **(extra or {}))
+    try:
+        _write_atomic(prometheus_file, metrics.prometheus())
+        _write_atomic(report_file, json.dumps(report, indent=2, default=str))
+        history = RunHistory(history_file)
+        try:
+            history.record(report)
+        finally:
+            history.close()
+    except (OSError, sqlite3.Error) as e:
+        logging.error(f"Could not export run metrics: {e}")
+    return report
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """Get the process-wide Metrics, creating it on first use."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
+
+# Metrics shown by `python metrics.py` unless others are asked for
+TREND_METRICS = ["run_seconds", "pipeline_articles", "notion_requests", "notion_rate_limited", "feed_fetch_seconds"]
+
+def main(argv=None):
+    """Print how key metrics moved over the latest runs."""
+    parser = argparse.ArgumentParser(description="Show metric trends from the run history.")
+    parser.add_argument("metrics", nargs="*", default=TREND_METRICS, help="metric names")
+    parser.add_argument("--runs", type=int, default=10, help="number of latest runs")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(HISTORY_FILE):
+        print(f"No run history at {HISTORY_FILE}")
+        return 1
+    history = RunHistory()
+    try:
+        for metric in args.metrics:
+            points = history.trend(metric, limit=args.runs)
+            print(f"{metric}:")
+            for started, value in points:
+                print(f"  {started}  {value:g}")
+            previous = sorted(value for _, value in points[:-1])
+            median = previous[len(previous) // 2] if previous else 0
+            if median and abs(points[-1][1] / median - 1) > 0.5:
+                print(f"  latest run is {points[-1][1] / median - 1:+.0%} off the median of the previous {len(previous)}")
+    finally:
+        history.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import os
+import json
+import logging
+import time
+from datetime import datetime
+
+import utils
+from notion_writer import get_notion_writer
+
+# Property names in the Notion database
+ARTICLE_AGE_PROPERTY = "Article Age"
+PUBLICATION_DATE_PROPERTY = "Publication Date"
+
+# Query and time budget settings
+PAGE_SIZE = 100
+DEFAULT_TIME_BUDGET = int(os.getenv("REFRESH_TIME_BUDGET", 20 * 60))  # Seconds
+REFRESH_STATE_FILE = "article_age_refresh.json"
+
+def compute_article_age(published_date, now=None):
+    """Compute the age of an article in whole days, as add_to_notion does."""
+    now = now or datetime.now()
+    return (now - published_date).days
+
+def parse_notion_date(value):
+    """Parse a Notion date string into a naive local datetime."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def read_page_values(page):
+    """Return (published_date, current_age) for a Notion page."""
+    properties = page.get("properties", {})
+    date_prop = properties.get(PUBLICATION_DATE_PROPERTY, {}).get("date") or {}
+    age_prop = properties.get(ARTICLE_AGE_PROPERTY, {})
+    return parse_notion_date(date_prop.get("start")), age_prop.get("number")
+
+def load_refresh_cursor():
+    """Load the cursor left behind by a run that ran out of time."""
+    try:
+        with open(REFRESH_STATE_FILE, "r") as f:
+            return json.load(f).get("next_cursor")
+    except (FileNotFoundError, ValueError):
+        return None
+
+def save_refresh_cursor(cursor):
+    """Save the cursor to resume from, or clear it once a full pass completes."""
+    with open(REFRESH_STATE_FILE, "w") as f:
+        json.dump({"next_cursor": cursor, "saved_at": datetime.now().isoformat()}, f)
+
+def refresh_article_ages(writer, database_id, time_budget=DEFAULT_TIME_BUDGET, start_cursor=None, now=None):
+    """
+    Page through the database and rewrite Article Age where it is stale.
+
+    Ages are computed locally from the publication date, so the only
+    per-page requests are updates for pages whose value actually changed.
+    Stops once the time budget is spent and returns the cursor to resume from.
+    """
+    now = now or datetime.now()
+    deadline = time.monotonic() + time_budget
+    stats = {"scanned": 0, "updated": 0, "unchanged": 0, "failed": 0, "next_cursor": None}
+    query_filter = {"property": PUBLICATION_DATE_PROPERTY, "date": {"is_not_empty": True}}
+    cursor = start_cursor
+
+    while True:
+        if time.monotonic() >= deadline:
+            stats["next_cursor"] = cursor
+            break
+
+        query_args = {"filter": query_filter, "page_size": PAGE_SIZE}
+        if cursor:
+            query_args["start_cursor"] = cursor
+        response = writer.query_database(database_id, **query_args)
+
+        for page in response.get("results", []):
+            stats["scanned"] += 1
+            published_date, current_age = read_page_values(page)
+            if not published_date:
+                continue
+
+            new_age = compute_article_age(published_date, now)
+            if new_age == current_age:
+                stats["unchanged"] += 1
+                continue
+
+            # Leave the rest of this batch for the next run rather than overrun the budget;
+            # the cursor we resume from re-reads it, and already-updated pages are skipped
+            if time.monotonic() >= deadline:
+                stats["next_cursor"] = cursor
+                return stats
+
+            try:
+                writer.update_page(page["id"], {ARTICLE_AGE_PROPERTY: {"number": new_age}})
+                stats["updated"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                logging.error(f"Failed to refresh Article Age for page {page.get('id')}: {e}")
+
+        if not response.get("has_more"):
+            break
+        cursor = response.get("next_cursor")
+
+    return stats
+
+def main():
+    """Refresh Article Age across the whole Notion database."""
+    env = utils.load_environment()
+    utils.setup_logging()
+
+    writer = get_notion_writer()
+    if not writer or not env["DATABASE_ID"]:
+        logging.error("Notion client or database ID not available")
+        return
+
+    start_cursor = load_refresh_cursor()
+    if start_cursor:
+        logging.info(f"Resuming Article Age refresh from cursor {start_cursor}")
+
+    started = time.monotonic()
+    stats = refresh_article_ages(writer, env["DATABASE_ID"], start_cursor=start_cursor)
+    save_refresh_cursor(stats["next_cursor"])
+
+    logging.info("=" * 50)
+    logging.info(f"SUMMARY: Refreshed Article Age on {stats['updated']} pages in {time.monotonic() - started:.1f}s")
+    logging.info(f"  - Pages scanned: {stats['scanned']}")
+    logging.info(f"  - Already up to date: {stats['unchanged']}")
+    logging.info(f"  - Failed updates: {stats['failed']}")
+    if stats["next_cursor"]:
+        logging.info("  - Time budget exhausted, the next run will resume where this one stopped")
+    logging.info("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+
+import utils
+from metrics import get_metrics
+
+# Notion allows an average of three requests per second per integration
+NOTION_REQUESTS_PER_SECOND = 3
+MAX_RETRIES = 5
+
+class NotionWriter:
+    """Route Notion API calls through a shared rate limiter that retries 429s."""
+
+    def __init__(self, notion, requests_per_second=NOTION_REQUESTS_PER_SECOND, max_retries=MAX_RETRIES):
+        self.notion = notion
+        self.min_interval = 1.0 / requests_per_second
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _wait_for_slot(self):
+        """Block until the next request slot is free."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            get_metrics().inc("notion_throttle_wait_seconds", slot - now)
+            time.sleep(slot - now)
+
+    def call(self, func, **kwargs):
+        """Call a Notion endpoint, backing off on rate limits and transient errors."""
+        metrics = get_metrics()
+        endpoint = getattr(func, "__qualname__", "other")
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_slot()
+            metrics.inc("notion_requests", endpoint=endpoint)
+            try:
+                with metrics.timer("notion_request", endpoint=endpoint):
+                    return func(**kwargs)
+            except Exception as e:
+                status = getattr(e, "status", None)
+                metrics.inc("notion_errors", status=status or "none")
+                if status == 429:
+                    metrics.inc("notion_rate_limited")
+                if status not in (429, 500, 502, 503, 504) or attempt == self.max_retries:
+                    raise
+                metrics.inc("notion_retries")
+                headers = getattr(e, "headers", None) or {}
+                try:
+                    delay = float(headers.get("Retry-After", 0))
+                except (TypeError, ValueError):
+                    delay = 0
+                delay = max(delay, 2 ** attempt * self.min_interval)
+                logging.warning(f"Notion returned {status}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+    def query_database(self, database_id, **kwargs):
+        """Run a database query."""
+        return self.call(self.notion.databases.query, database_id=database_id, **kwargs)
+
+    def create_page(self, **kwargs):
+        """Create a page."""
+        return self.call(self.notion.pages.create, **kwargs)
+
+    def update_page(self, page_id, properties):
+        """Update the properties of an existing page."""
+        return self.call(self.notion.pages.update, page_id=page_id, properties=properties)
+
+    def append_blocks(self, block_id, children):
+        """Append child blocks to a page or block."""
+        return self.call(self.notion.blocks.children.append, block_id=block_id, children=children)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_notion_writer():
+    """Get the process-wide NotionWriter, creating it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            notion = utils.get_notion_client()
+            if not notion:
+                return None
+            _writer = NotionWriter(notion)
+        return _writer
@@ -0,0 +1,148 @@
+import os
+import hashlib
+import logging
+
+import requests
+
+from pdf_store import get_pdf_store
+from metrics import get_metrics
+
+# Download limits
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", 50 * 1024 * 1024))
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30  # Longest wait for the next chunk, not for the whole file
+CHUNK_SIZE = 65536
+MAX_RESUMES = 3
+
+PDF_MAGIC = b"%PDF-"
+PDF_CONTENT_TYPES = ("application/pdf", "application/x-pdf", "application/octet-stream", "binary/octet-stream")
+
+class PDFDownloadError(Exception):
+    """Raised when a URL does not yield an acceptable PDF."""
+
+def _check_content_type(response, url):
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and content_type not in PDF_CONTENT_TYPES:
+        raise PDFDownloadError(f"{url} returned Content-Type {content_type}, not a PDF")
+
+def _response_size(response, offset):
+    """Total size implied by the response headers, or None if unknown."""
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[1])
+    length = response.headers.get("Content-Length")
+    return offset + int(length) if length and length.isdigit() else None
+
+class _Partial:
+    """A download's partial file and the running SHA-256 of what it holds."""
+
+    def __init__(self, path):
+        self.path = path
+        self.sha = hashlib.sha256()
+        if os.path.exists(path):
+            # Left by an earlier run: hash the prefix once, then keep hashing as the rest streams in
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    self.sha.update(chunk)
+
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def restart(self):
+        self.sha = hashlib.sha256()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+def _stream_to_partial(session, url, partial, max_bytes):
+    """
+    Append the rest of url to the partial file, resuming with Range when
+    it already has data. Returns True when the body is complete.
+    """
+    partial_path = partial.path
+    offset = partial.size()
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+
+    metrics = get_metrics()
+    metrics.inc("http_requests", component="pdf_download")
+    with session.get(url, headers=headers, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+        if response.status_code == 416 and offset:
+            # The partial file reaches the end; it is complete only if it is exactly the file's size
+            content_range = response.headers.get("Content-Range", "")
+            if content_range.rsplit("/", 1)[-1] == str(offset):
+                return True
+            logging.info(f"Partial download of {url} does not match the file on the server, restarting")
+            partial.restart()
+            return False
+        response.raise_for_status()
+        _check_content_type(response, url)
+        if offset and response.status_code != 206:
+            logging.info(f"Server ignored Range for {url}, restarting download")
+            offset = 0
+            partial.restart()
+
+        total = _response_size(response, offset)
+        if total is not None and total > max_bytes:
+            raise PDFDownloadError(f"{url} is {total} bytes, over the {max_bytes} byte limit")
+
+        written = offset
+        head = b""
+        with open(partial_path, "ab" if offset else "wb") as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if not offset and len(head) < len(PDF_MAGIC):
+                    head += chunk[:len(PDF_MAGIC)]
+                    if len(head) >= len(PDF_MAGIC) and not head.startswith(PDF_MAGIC):
+                        raise PDFDownloadError(f"{url} does not start with a PDF header")
+                written += len(chunk)
+                metrics.inc("pdf_bytes", len(chunk))
+                if written > max_bytes:
+                    raise PDFDownloadError(f"{url} exceeded the {max_bytes} byte limit")
+                f.write(chunk)
+                partial.sha.update(chunk)
+        return total is None or written >= total
+
+def download_pdf_file(url, title, store=None, session=None, max_bytes=PDF_MAX_BYTES):
+    """
+    Stream a PDF into the PDF store and return its path.
+
+    Chunks go to a per-URL partial file, so memory use stays flat and an
+    interrupted download resumes with an HTTP Range request, in this run or
+    the next. The SHA-256 is computed while streaming. The file is checked
+    for a PDF Content-Type and magic bytes and kept under max_bytes before
+    it is renamed into the store.
+    Raises PDFDownloadError or requests.RequestException on failure.
+    """
+    store = store or get_pdf_store()
+    session = session or requests
+
+    known = store.path_for_url(url)
+    if known:
+        logging.info(f"PDF already downloaded from {url}: {known}")
+        return known
+
+    partial = _Partial(store.partial_path(url))
+    partial_path = partial.path
+    try:
+        for attempt in range(MAX_RESUMES + 1):
+            try:
+                if _stream_to_partial(session, url, partial, max_bytes):
+                    break
+                logging.warning(f"Download of {url} ended early, resuming")
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == MAX_RESUMES:
+                    raise
+                logging.warning(f"Download of {url} interrupted ({e}), resuming")
+        else:
+            raise PDFDownloadError(f"Download of {url} did not complete after {MAX_RESUMES} resumes")
+
+        with open(partial_path, "rb") as f:
+            if f.read(len(PDF_MAGIC)) != PDF_MAGIC:
+                raise PDFDownloadError(f"{url} does not start with a PDF header")
+    except PDFDownloadError:
+        # The content itself is wrong, so there is nothing worth resuming
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+        raise
+
+    return store.add_file(partial_path, partial.sha.hexdigest(), url, title)
@@ -0,0 +1,172 @@
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import utils
+from notion_writer import get_notion_writer
+from pdf_index import record_pdf
+from search_index import index_pdf
+
+# Enrichment settings
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 8))
+PDF_PER_HOST = int(os.getenv("PDF_PER_HOST", 2))  # Concurrent requests to any one publisher
+
+class PDFEnricher:
+    """
+    Find, download and read article PDFs in a worker pool, then patch the
+    already-created Notion pages with the results. Pages sharing a link,
+    e.g. one article picked by several profiles, share one fetch.
+    """
+
+    def __init__(self, writer, max_workers=PDF_WORKERS, per_host=PDF_PER_HOST):
+        self.writer = writer
+        self.per_host = per_host
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf")
+        self._host_limits = {}
+        self._lock = threading.Lock()
+        self._futures = []
+        self._jobs = {}  # Link -> {"pages": [(page_id, article_info)], "fetched": ..., "done": bool}
+
+    @contextmanager
+    def _host_slot(self, url):
+        """Hold one of the per-host request slots for url's host."""
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            limit = self._host_limits.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with limit:
+            yield
+
+    def submit(self, page_id, article_info):
+        """Queue enrichment for a created page; article_info gets its pdf_path filled in."""
+        link = article_info["link"]
+        with self._lock:
+            job = self._jobs.get(link)
+            if job is not None and not job["done"]:
+                job["pages"].append((page_id, article_info))  # Patched once the pending fetch is back
+                return job["future"]
+            if job is not None:
+                future = self._executor.submit(self._apply_all, [(page_id, article_info)], job["fetched"])
+            else:
+                job = self._jobs[link] = {"pages": [(page_id, article_info)], "fetched": None, "done": False}
+                future = self._executor.submit(self._enrich, job)
+            job["future"] = future
+            self._futures.append(future)
+        return future
+
+    def _enrich(self, job):
+        """Discover, download and extract one link's PDF and patch every page waiting on it."""
+        _, article_info = job["pages"][0]
+        try:
+            fetched = self.fetch(article_info)
+        except Exception as e:
+            logging.error(f"PDF enrichment failed for {article_info['title']}: {e}")
+            fetched = None
+        with self._lock:
+            job["fetched"], job["done"] = fetched, True
+            pages, job["pages"] = job["pages"], []
+        return self._apply_all(pages, fetched)
+
+    def _apply_all(self, pages, fetched):
+        """Patch pages with a fetched PDF; returns how many were patched."""
+        if not fetched:
+            return 0
+        patched = 0
+        for page_id, article_info in pages:
+            try:
+                self.apply(page_id, article_info, *fetched)
+                patched += 1
+            except Exception as e:
+                logging.error(f"PDF enrichment failed for {article_info['title']}: {e}")
+        return patched
+
+    def fetch(self, article_info):
+        """Find, download and read an article's PDF: (pdf_link, pdf_path, pdf_text), or None without one."""
+        logging.info(f"Attempting to fetch PDF for scientific article: {article_info['title']}")
+        with self._host_slot(article_info["link"]):
+            pdf_link = utils.fetch_pdf_link(article_info["link"])
+        if not pdf_link:
+            return None
+        logging.info(f"Found PDF link: {pdf_link}")
+
+        with self._host_slot(pdf_link):
+            pdf_path = utils.download_pdf(pdf_link, article_info["title"])
+        pdf_text = utils.extract_pdf_text(pdf_path) if pdf_path else ""
+        if pdf_text:
+            logging.info(f"Extracted {len(pdf_text)} characters of text from PDF")
+        return pdf_link, pdf_path, pdf_text
+
+    def apply(self, page_id, article_info, pdf_link, pdf_path, pdf_text):
+        """Patch the Notion page with a fetched PDF and add the PDF to the catalog and search index."""
+        properties = {"PDF Link": {"url": pdf_link}}
+        if pdf_path:
+            properties["PDF Local Path"] = {"rich_text": [{"text": {"content": pdf_path}}]}
+        if pdf_text:
+            properties["PDF Insights"] = {"rich_text": [{"text": {"content": pdf_text[:2000]}}]}
+            self.writer.append_blocks(page_id, pdf_text_blocks(pdf_text))
+        self.writer.update_page(page_id, properties)
+
+        article_info["pdf_path"] = pdf_path
+        if pdf_path:
+            record_pdf(article_info, pdf_path)
+            index_pdf(article_info["link"], pdf_path)
+        logging.info(f"Added PDF details to Notion page for: {article_info['title']}")
+
+    def wait(self):
+        """Block until every queued enrichment has finished; returns how many pages got a PDF."""
+        with self._lock:
+            futures, self._futures = self._futures, []
+        wait(futures)
+        with self._lock:
+            self._jobs = {}
+        return sum(future.result() for future in futures)
+
+def pdf_text_blocks(pdf_text):
+    """Notion blocks showing extracted PDF text under a heading."""
+    return [
+        {
+            "object": "block",
+            "type": "heading_2",
+            "heading_2": {
+                "rich_text": [{"type": "text", "text": {"content": "PDF Text"}}]
+            }
+        },
+        {
+            "object": "block",
+            "type": "paragraph",
+            "paragraph": {
+                "rich_text": [{"type": "text", "text": {"content": pdf_text}}]
+            }
+        }
+    ]
+
+_enricher = None
+_enricher_lock = threading.Lock()
+
+def get_pdf_enricher():
+    """Get the process-wide PDFEnricher, creating it on first use."""
+    global _enricher
+    with _enricher_lock:
+        if _enricher is None:
+            writer = get_notion_writer()
+            if not writer:
+                return None
+            _enricher = PDFEnricher(writer)
+        return _enricher
+
+def use_pdf_enricher(enricher):
+    """Send PDF enrichment to enricher instead, e.g. to workers in a sharded run; returns the previous one."""
+    global _enricher
+    with _enricher_lock:
+        previous, _enricher = _enricher, enricher
+        return previous
+
+def wait_for_pdf_enrichment():
+    """Wait for queued PDF enrichment, e.g. before building the PDF index."""
+    if _enricher is None:
+        return 0
+    found = _enricher.wait()
+    logging.info(f"PDF enrichment finished: {found} PDFs added")
+    return found
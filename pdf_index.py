@@ -0,0 +1,321 @@
+import os
+import re
+import json
+import logging
+import tempfile
+import threading
+from datetime import datetime
+
+from pdf_store import PDF_DIR
+
+# Catalog and generated index layout
+CATALOG_NAME = "catalog.jsonl"  # One line per downloaded PDF, only ever appended to
+STATE_NAME = "index_state.json"
+DATA_DIR_NAME = "index-data"
+PAGE_SIZE = 200  # Entries per data shard
+
+# Words too common in titles to be worth indexing
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "that", "the", "to", "with",
+}
+
+_catalog_lock = threading.Lock()
+
+def _write_atomic(path, text):
+    """Replace path with text without readers ever seeing a partial file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def record_pdf(article_info, pdf_path, root=PDF_DIR):
+    """Append a downloaded PDF and its article metadata to the catalog."""
+    published = article_info.get("published_date") or article_info.get("date")
+    if hasattr(published, "strftime"):
+        published = published.strftime("%Y-%m-%d")
+    entry = {
+        "title": article_info.get("title", ""),
+        "link": article_info.get("link", ""),
+        "source": article_info.get("source", ""),
+        "date": published or datetime.now().strftime("%Y-%m-%d"),
+        "pdf": os.path.relpath(str(pdf_path), root).replace(os.sep, "/"),
+        "notion_url": article_info.get("notion_url") or "",
+        "added": datetime.now().isoformat(timespec="seconds"),
+    }
+    os.makedirs(root, exist_ok=True)
+    with _catalog_lock:
+        with open(os.path.join(root, CATALOG_NAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+def read_new_entries(catalog_path, offset):
+    """Read complete catalog lines after offset; returns (entries, new_offset)."""
+    entries = []
+    try:
+        with open(catalog_path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # A line still being written; pick it up next time
+                offset += len(line)
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    logging.warning(f"Skipping unreadable PDF catalog line at byte {offset - len(line)}")
+    except FileNotFoundError:
+        pass
+    return entries, offset
+
+def tokenize(text):
+    """Index terms for text; the page's search box splits queries the same way."""
+    return {word for word in re.findall(r"[a-z0-9]+", text.lower()) if len(word) > 1 and word not in STOP_WORDS}
+
+def term_shard_key(term):
+    """Name of the term shard holding a term: its first two characters."""
+    return term[:2]
+
+# Data files are small scripts that hand their payload to the page, so the
+# index also works when opened straight from disk, where fetch() is blocked.
+def _script(call, key, payload):
+    return f"PDFIndex.{call}({json.dumps(key)}, {json.dumps(payload, separators=(',', ':'))});\n"
+
+def _read_script(path):
+    """Payload of a data script written by _script, or None if missing."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    return json.loads(text[text.index(", ") + 2:text.rindex(");")])
+
+def shard_path(data_dir, shard_no):
+    return os.path.join(data_dir, f"shard-{shard_no:05d}.js")
+
+def terms_path(data_dir, key):
+    return os.path.join(data_dir, f"terms-{key}.js")
+
+def add_postings(postings, ids):
+    """Append increasing ids to a delta-encoded posting list, skipping ids it already has."""
+    last = sum(postings) if postings else -1
+    for entry_id in ids:
+        if entry_id <= last:
+            continue  # Written by a build that stopped before saving its state
+        postings.append(entry_id - max(last, 0))
+        last = entry_id
+    return postings
+
+def build_pdf_index(root=PDF_DIR):
+    """
+    Bring the static PDF index up to date with the catalog.
+
+    Only catalog lines added since the last build are read. Entries are
+    appended to fixed-size data shards, and their title and source words
+    to a delta-encoded inverted index split into term shards, so only the
+    shards that received new entries are rewritten. The state is saved
+    last, and shards are rebuilt from its entry counts, so a build that
+    stops part way is redone without duplicates. index.html is a static
+    page that loads shards on demand. Returns the index path, or None when
+    there are no PDFs.
+    """
+    data_dir = os.path.join(root, DATA_DIR_NAME)
+    state_path = os.path.join(root, STATE_NAME)
+    try:
+        with open(state_path, "r") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        state = {"offset": 0, "page_counts": []}
+
+    new_entries, offset = read_new_entries(os.path.join(root, CATALOG_NAME), state["offset"])
+    page_counts = state["page_counts"]
+    if not page_counts and not new_entries:
+        return None
+
+    shards = {}
+    new_terms = {}
+    for entry in new_entries:
+        if not page_counts or page_counts[-1] >= PAGE_SIZE:
+            page_counts.append(0)
+        shard_no = len(page_counts) - 1
+        if shard_no not in shards:
+            # Rows past the saved count come from an interrupted build and are added again below
+            shards[shard_no] = (_read_script(shard_path(data_dir, shard_no)) or [])[:page_counts[-1]]
+        entry_id = shard_no * PAGE_SIZE + page_counts[-1]
+        source = entry.get("source") or ""
+        shards[shard_no].append([entry["title"], entry["date"], source, entry["pdf"],
+                                 entry["link"], entry.get("notion_url") or ""])
+        page_counts[-1] += 1
+        for term in tokenize(f"{entry['title']} {source}"):
+            new_terms.setdefault(term_shard_key(term), {}).setdefault(term, []).append(entry_id)
+
+    for shard_no, rows in shards.items():
+        _write_atomic(shard_path(data_dir, shard_no), _script("shard", shard_no, rows))
+    for key, terms in new_terms.items():
+        postings = _read_script(terms_path(data_dir, key)) or {}
+        for term, ids in terms.items():
+            add_postings(postings.setdefault(term, []), ids)
+        _write_atomic(terms_path(data_dir, key), _script("terms", key, postings))
+
+    index_path = os.path.join(root, "index.html")
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            current_page = f.read()
+    except FileNotFoundError:
+        current_page = None
+    if current_page != INDEX_PAGE:
+        _write_atomic(index_path, INDEX_PAGE)
+
+    if new_entries:
+        meta = {"pageSize": PAGE_SIZE, "pageCounts": page_counts, "total": sum(page_counts),
+                "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        _write_atomic(os.path.join(data_dir, "meta.js"), _script("meta", "meta", meta))
+        _write_atomic(state_path, json.dumps({"offset": offset, "page_counts": page_counts}))
+        logging.info(f"PDF index updated: {len(new_entries)} new PDFs, {len(shards)} data shards "
+                     f"and {len(new_terms)} term shards rewritten")
+    return index_path
+
+# Static viewer: a virtualized list that loads data shards as rows scroll into
+# view, and term shards for the first two letters of each search word.
+INDEX_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Biotech RSS PDFs</title>
+<style>
+    body { font-family: Arial, sans-serif; margin: 20px; }
+    h1 { color: #333; }
+    .search { margin-bottom: 10px; padding: 8px; width: 300px; }
+    #status { color: #666; margin-bottom: 10px; }
+    #viewport { height: 75vh; overflow-y: auto; border: 1px solid #ddd; }
+    #spacer { position: relative; }
+    .row { position: absolute; left: 0; right: 0; height: 32px; line-height: 32px; padding: 0 8px;
+           white-space: nowrap; overflow: hidden; text-overflow: ellipsis; border-bottom: 1px solid #eee; }
+    .date, .source { color: #666; margin-left: 8px; }
+    .row a { margin-left: 8px; color: #0066cc; }
+</style>
+</head>
+<body>
+<h1>Biotech RSS PDFs</h1>
+<input type="text" id="search" class="search" placeholder="Search titles and sources...">
+<div id="status">Loading...</div>
+<div id="viewport"><div id="spacer"></div></div>
+<script>
+var ROW_HEIGHT = 32;
+var STOP_WORDS = " a an and are as at be by for from in into is it of on or that the to with ";
+var PDFIndex = {
+    info: null, rows: {}, postings: {}, loading: {}, results: null, queued: false,
+
+    load: function (name) {
+        if (PDFIndex.loading[name]) return;
+        PDFIndex.loading[name] = true;
+        var script = document.createElement("script");
+        script.src = "index-data/" + name + ".js";
+        document.head.appendChild(script);
+    },
+    meta: function (key, info) { PDFIndex.info = info; PDFIndex.render(); },
+    shard: function (shardNo, rows) { PDFIndex.rows[shardNo] = rows; PDFIndex.schedule(); },
+    terms: function (key, postings) { PDFIndex.postings[key] = postings; PDFIndex.search(); },
+
+    count: function () { return PDFIndex.results ? PDFIndex.results.length : PDFIndex.info.total; },
+    // Newest first: without a search, display position i is entry total - 1 - i
+    entryId: function (i) { return PDFIndex.results ? PDFIndex.results[i] : PDFIndex.info.total - 1 - i; },
+    schedule: function () {
+        if (PDFIndex.queued) return;
+        PDFIndex.queued = true;
+        requestAnimationFrame(function () { PDFIndex.queued = false; PDFIndex.render(); });
+    },
+    render: function () {
+        if (!PDFIndex.info) return;
+        var viewport = document.getElementById("viewport");
+        var spacer = document.getElementById("spacer");
+        var count = PDFIndex.count();
+        spacer.style.height = (count * ROW_HEIGHT) + "px";
+        var first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - 10);
+        var last = Math.min(count, Math.ceil((viewport.scrollTop + viewport.clientHeight) / ROW_HEIGHT) + 10);
+        var fragment = document.createDocumentFragment();
+        for (var i = first; i < last; i++) {
+            var id = PDFIndex.entryId(i);
+            var shardNo = Math.floor(id / PDFIndex.info.pageSize);
+            var div = document.createElement("div");
+            div.className = "row";
+            div.style.top = (i * ROW_HEIGHT) + "px";
+            if (PDFIndex.rows[shardNo]) {
+                PDFIndex.fill(div, PDFIndex.rows[shardNo][id % PDFIndex.info.pageSize]);
+            } else {
+                div.textContent = "Loading...";
+                PDFIndex.load("shard-" + String(shardNo).padStart(5, "0"));
+            }
+            fragment.appendChild(div);
+        }
+        spacer.replaceChildren(fragment);
+        var status = PDFIndex.info.total + " PDFs";
+        if (PDFIndex.results) status = count + " of " + status;
+        document.getElementById("status").textContent = status + ". Last updated: " + PDFIndex.info.updated;
+    },
+    fill: function (div, row) {
+        var title = document.createElement("strong");
+        title.textContent = row[0];
+        div.appendChild(title);
+        [[row[1], "date"], [row[2], "source"]].forEach(function (part) {
+            var span = document.createElement("span");
+            span.className = part[1];
+            span.textContent = part[0];
+            div.appendChild(span);
+        });
+        [["PDF", row[3]], ["Source", row[4]], ["Notion", row[5]]].forEach(function (part) {
+            if (!part[1]) return;
+            var a = document.createElement("a");
+            a.textContent = part[0];
+            a.href = part[1];
+            a.target = "_blank";
+            div.appendChild(a);
+        });
+    },
+    // Each search word matches the terms it starts; results must match every word
+    search: function () {
+        var words = (document.getElementById("search").value.toLowerCase().match(/[a-z0-9]+/g) || [])
+            .filter(function (word) { return word.length > 1 && STOP_WORDS.indexOf(" " + word + " ") < 0; });
+        if (!words.length) {
+            PDFIndex.results = null;
+            return PDFIndex.render();
+        }
+        var sets = [];
+        for (var w = 0; w < words.length; w++) {
+            var key = words[w].slice(0, 2);
+            var postings = PDFIndex.postings[key];
+            if (postings === undefined) {
+                PDFIndex.load("terms-" + key);
+                if (PDFIndex.loading[key + "-missing"]) postings = {};
+                else return;
+            }
+            var ids = {};
+            for (var term in postings) {
+                if (term.lastIndexOf(words[w], 0) !== 0) continue;
+                var id = 0;
+                postings[term].forEach(function (delta) { id += delta; ids[id] = true; });
+            }
+            sets.push(ids);
+        }
+        PDFIndex.results = Object.keys(sets[0]).map(Number).filter(function (id) {
+            return sets.every(function (ids) { return ids[id]; });
+        }).sort(function (a, b) { return b - a; });
+        document.getElementById("viewport").scrollTop = 0;
+        PDFIndex.render();
+    }
+};
+// A term shard that does not exist means no entry has a word starting that way
+window.addEventListener("error", function (event) {
+    var match = event.target && event.target.src && event.target.src.match(/terms-([a-z0-9]+)\\.js$/);
+    if (match) {
+        PDFIndex.loading[match[1] + "-missing"] = true;
+        PDFIndex.search();
+    }
+}, true);
+document.getElementById("viewport").addEventListener("scroll", PDFIndex.schedule);
+document.getElementById("search").addEventListener("input", PDFIndex.search);
+PDFIndex.load("meta");
+</script>
+</body>
+</html>
+"""
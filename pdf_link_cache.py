@@ -0,0 +1,128 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from pdf_store import PDF_DIR
+from metrics import get_metrics
+
+# Cache settings
+PDF_LINK_CACHE_FILE = os.path.join(PDF_DIR, "pdf_links.sqlite3")
+MAX_ENTRIES = int(os.getenv("PDF_LINK_CACHE_SIZE", 20000))
+NEGATIVE_TTL = int(os.getenv("PDF_LINK_NEGATIVE_TTL", 7 * 24 * 3600))  # Re-check pages without a PDF weekly
+MEMORY_ENTRIES = int(os.getenv("PDF_LINK_MEMORY_ENTRIES", 0))  # In-memory tier, used by long-running processes
+
+# Returned by lookup when a URL has not been resolved yet
+MISS = object()
+
+class PDFLinkCache:
+    """
+    Persistent article URL -> PDF URL cache with LRU eviction.
+
+    A None PDF URL records that the page had no PDF; such entries expire
+    after negative_ttl seconds. The SQLite table is trimmed to max_entries
+    by least recent use. An optional in-memory LRU tier answers repeat
+    lookups without touching the database.
+    """
+
+    def __init__(self, path=PDF_LINK_CACHE_FILE, max_entries=MAX_ENTRIES, negative_ttl=NEGATIVE_TTL,
+                 memory_entries=MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pdf_links ("
+            "url TEXT PRIMARY KEY, pdf_url TEXT, resolved_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pdf_links_last_used ON pdf_links (last_used)")
+        self._db.commit()
+
+    def enable_memory_tier(self, entries):
+        """Keep up to entries recent results in memory, e.g. for the watcher daemon."""
+        with self._lock:
+            self.memory_entries = entries
+            self._trim_memory()
+
+    def _trim_memory(self):
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _remember(self, url, pdf_url, resolved_at):
+        if self.memory_entries:
+            self._memory[url] = (pdf_url, resolved_at)
+            self._memory.move_to_end(url)
+            self._trim_memory()
+
+    def _expired(self, pdf_url, resolved_at, now):
+        return pdf_url is None and now - resolved_at > self.negative_ttl
+
+    def lookup(self, url):
+        """Return the cached PDF URL, None for a cached "no PDF", or MISS."""
+        result = self._lookup(url)
+        get_metrics().inc("cache_requests", cache="pdf_link", result="miss" if result is MISS else "hit")
+        return result
+
+    def _lookup(self, url):
+        now = time.time()
+        with self._lock:
+            if url in self._memory:
+                pdf_url, resolved_at = self._memory[url]
+                if not self._expired(pdf_url, resolved_at, now):
+                    self._memory.move_to_end(url)
+                    return pdf_url
+                del self._memory[url]
+
+            row = self._db.execute("SELECT pdf_url, resolved_at FROM pdf_links WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return MISS
+            pdf_url, resolved_at = row
+            if self._expired(pdf_url, resolved_at, now):
+                self._db.execute("DELETE FROM pdf_links WHERE url = ?", (url,))
+                self._db.commit()
+                return MISS
+            self._db.execute("UPDATE pdf_links SET last_used = ? WHERE url = ?", (now, url))
+            self._db.commit()
+            self._remember(url, pdf_url, resolved_at)
+            return pdf_url
+
+    def store(self, url, pdf_url):
+        """Record a resolution; pass pdf_url=None when the page has no PDF."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pdf_links (url, pdf_url, resolved_at, last_used) VALUES (?, ?, ?, ?)",
+                (url, pdf_url, now, now),
+            )
+            # Evict the least recently used rows beyond the size bound
+            self._db.execute(
+                "DELETE FROM pdf_links WHERE url IN ("
+                "SELECT url FROM pdf_links ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+            self._remember(url, pdf_url, now)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pdf_links").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_pdf_link_cache():
+    """Get the process-wide PDFLinkCache, opening the database on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PDFLinkCache()
+        return _cache
@@ -0,0 +1,129 @@
+import logging
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from lxml import etree
+
+from metrics import get_metrics
+
+# Resolver settings
+CHUNK_SIZE = 8192
+MAX_PAGE_BYTES = 3 * 1024 * 1024  # Stop reading pages larger than this
+REQUEST_TIMEOUT = 5
+
+# <meta name=...> tags that point straight at the PDF (Highwire/Google Scholar tags)
+PDF_META_NAMES = ("citation_pdf_url", "eprints.document_url", "bepress_citation_pdf_url")
+
+# Per-publisher rules for pages without PDF metadata, checked in order.
+# Each rule applies when the article URL's host ends with one of its domains.
+PUBLISHER_RULES = [
+    {
+        "publisher": "Nature",
+        "domains": ("nature.com",),
+        "xpath": '//a[@data-track-label="Download PDF"]/@href',
+    },
+    {
+        "publisher": "Cell",
+        "domains": ("cell.com",),
+        "xpath": '//a[contains(concat(" ", normalize-space(@class), " "), " pdf-download ")]/@href',
+    },
+    {
+        "publisher": "Science",
+        "domains": ("science.org",),
+        "xpath": '//a[contains(translate(normalize-space(.), "pdf", "PDF"), "PDF")]/@href',
+    },
+    {
+        "publisher": "PLOS",
+        "domains": ("plos.org",),
+        "xpath": '//a[contains(concat(" ", normalize-space(@class), " "), " btn-multi-primary ")]'
+                 '[contains(translate(normalize-space(.), "abcdefghijklmnopqrstuvwxyz", "ABCDEFGHIJKLMNOPQRSTUVWXYZ"),'
+                 ' "DOWNLOAD PDF")]/@href',
+    },
+]
+
+def publisher_rule(url):
+    """Return the PUBLISHER_RULES entry for an article URL, or None."""
+    host = (urlsplit(url).hostname or "").lower()
+    for rule in PUBLISHER_RULES:
+        if any(host == domain or host.endswith("." + domain) for domain in rule["domains"]):
+            return rule
+    return None
+
+def metadata_pdf_link(element):
+    """PDF URL declared by a <meta> or <link> element, or None."""
+    if element.tag == "meta":
+        name = (element.get("name") or element.get("property") or "").lower()
+        if name in PDF_META_NAMES:
+            return (element.get("content") or "").strip() or None
+    elif element.tag == "link":
+        rel = (element.get("rel") or "").lower().split()
+        if "alternate" in rel and (element.get("type") or "").lower() == "application/pdf":
+            return (element.get("href") or "").strip() or None
+    return None
+
+def page_pdf_link(root, url):
+    """Search a fully parsed page with the publisher rule, then generic link heuristics."""
+    rule = publisher_rule(url)
+    if rule:
+        hrefs = root.xpath(rule["xpath"])
+        if hrefs:
+            return hrefs[0]
+
+    links = root.xpath("//a[@href]")
+    # General case - look for any PDF links, sometimes with the PDF in query parameters
+    for link in links:
+        href = link.get("href")
+        if href.endswith(".pdf") or ".pdf?" in href or "pdf=" in href:
+            return href
+    # Look for links with PDF in text
+    for link in links:
+        if "pdf" in "".join(link.itertext()).lower() and link.get("class") is None:
+            return link.get("href")
+    return None
+
+def resolve_pdf_link(url, session=None):
+    """
+    Find the PDF URL for an article page.
+
+    Streams the page into an incremental parser and stops reading as soon
+    as a citation_pdf_url meta tag or a PDF alternate link is seen in the
+    head. Otherwise the rest of the page is read (up to MAX_PAGE_BYTES) and
+    searched with the publisher rule and generic link heuristics.
+    Returns None when there is no PDF link; request errors propagate.
+    """
+    session = session or requests
+    headers = {"User-Agent": "Mozilla/5.0"}
+    get_metrics().inc("http_requests", component="pdf_resolver")
+    with session.get(url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        base_url = getattr(response, "url", None) or url
+        parser = etree.HTMLPullParser(events=("start",))
+        read = 0
+        found = None
+        in_head = True
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            parser.feed(chunk)
+            read += len(chunk)
+            for _, element in parser.read_events():
+                if element.tag == "body":
+                    in_head = False
+                elif in_head and element.tag in ("meta", "link"):
+                    found = found or metadata_pdf_link(element)
+            if found:
+                break
+            if read >= MAX_PAGE_BYTES:
+                logging.info(f"Stopped reading {url} after {read} bytes")
+                break
+
+    if found:
+        logging.info(f"PDF link for {url} found in page metadata after {read} bytes")
+        return urljoin(base_url, found)
+
+    try:
+        root = parser.close()
+    except etree.XMLSyntaxError:
+        root = None
+    if root is None:
+        return None
+    href = page_pdf_link(root, url)
+    return urljoin(base_url, href) if href else None
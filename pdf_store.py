@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: only one process may write the store at a time
+    fcntl = None
+
+# Downloaded PDFs live here, stored once per content hash
+PDF_DIR = os.getenv("PDF_DIR", "pdfs")
+MANIFEST_NAME = "manifest.json"
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on path + ".lock" against other processes sharing the directory."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".lock", "a") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def read_json(path, default):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+def write_json(path, data, **dump_args):
+    """Write a JSON file atomically so readers never see half a file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, **dump_args)
+    os.replace(tmp_path, path)
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+class PDFStore:
+    """
+    Content-addressed PDF storage.
+
+    Each PDF is saved once as objects/<aa>/<sha256>.pdf. A JSON manifest maps
+    every hash to the titles and URLs it was downloaded under, and every URL
+    to its hash, so known URLs are never downloaded again and the same paper
+    fetched from two URLs is stored once.
+
+    Several processes, e.g. sharded workers, may share one store: the
+    manifest is re-read under a file lock before each change and reloaded
+    when another process has rewritten it.
+    """
+
+    def __init__(self, root=PDF_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._manifest_mtime = None
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        self._manifest_mtime = _mtime(self.manifest_path)
+        manifest = read_json(self.manifest_path, {})
+        manifest.setdefault("objects", {})
+        manifest.setdefault("urls", {})
+        return manifest
+
+    def _refresh(self):
+        """Reload the manifest if another process changed it; call with _lock held."""
+        if _mtime(self.manifest_path) != self._manifest_mtime:
+            self._manifest = self._load_manifest()
+
+    def _save_manifest(self):
+        write_json(self.manifest_path, self._manifest, indent=2)
+        self._manifest_mtime = _mtime(self.manifest_path)
+
+    def object_path(self, digest):
+        """Path of the stored file for a SHA-256 hex digest."""
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.pdf")
+
+    def path_for_url(self, url):
+        """Return the stored path for a URL downloaded before, or None."""
+        with self._lock:
+            self._refresh()
+            digest = self._manifest["urls"].get(url)
+        if digest and os.path.exists(self.object_path(digest)):
+            return self.object_path(digest)
+        return None
+
+    def has(self, digest):
+        """Check whether a file with this SHA-256 digest is stored."""
+        return os.path.exists(self.object_path(digest))
+
+    def entry(self, digest):
+        """Manifest entry (titles, urls, size, added) for a digest, or None."""
+        with self._lock:
+            self._refresh()
+            return self._manifest["objects"].get(digest)
+
+    def entries(self):
+        """(path, entry) pairs for every stored PDF."""
+        with self._lock:
+            self._refresh()
+            objects = dict(self._manifest["objects"])
+        return [(self.object_path(digest), entry) for digest, entry in objects.items()]
+
+    def partial_path(self, url):
+        """Stable path for an in-progress download of url, so it can be resumed."""
+        os.makedirs(os.path.join(self.root, "partial"), exist_ok=True)
+        name = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.root, "partial", f"{name}.part")
+
+    def add_file(self, tmp_path, digest, url, title):
+        """
+        Move a fully written temporary file into the store under its digest.
+
+        If the content is already stored, the temporary file is dropped and
+        the URL and title are recorded against the existing copy.
+        """
+        path = self.object_path(digest)
+        with self._lock, file_lock(self.manifest_path):
+            self._manifest = self._load_manifest()  # Keep what other processes added since
+            if os.path.exists(path):
+                os.unlink(tmp_path)
+                logging.info(f"PDF already stored as {digest[:12]}, not keeping another copy")
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            entry = self._manifest["objects"].setdefault(digest, {
+                "titles": [],
+                "urls": [],
+                "size": os.path.getsize(path),
+                "added": datetime.now().isoformat(),
+            })
+            if title and title not in entry["titles"]:
+                entry["titles"].append(title)
+            if url and url not in entry["urls"]:
+                entry["urls"].append(url)
+            if url:
+                self._manifest["urls"][url] = digest
+            self._save_manifest()
+        return path
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_pdf_store():
+    """Get the process-wide PDFStore, loading the manifest on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PDFStore()
+        return _store
@@ -0,0 +1,155 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+import multiprocessing
+
+from pdf_store import PDF_DIR, file_lock, read_json, write_json
+from metrics import get_metrics
+
+# Extraction settings
+EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", 30))  # Wall-clock seconds per document
+EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", os.cpu_count() or 1))
+MAX_FAILURES = int(os.getenv("PDF_EXTRACT_MAX_FAILURES", 3))  # Attempts before a failing PDF is left alone
+MAX_PAGES = 3  # Only the first pages are used, to limit processing time
+MAX_CHARS = 1000  # Limit for Notion
+TEXT_CACHE_FILE = os.path.join(PDF_DIR, "text_cache.json")
+
+_HASH_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+def _read_pages(pdf_path, max_pages=MAX_PAGES, max_chars=MAX_CHARS):
+    """Extract and clean text from the first pages, parsing each page once; None means no limit."""
+    import PyPDF2  # Only needed in the worker process
+
+    with open(pdf_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        parts = []
+        for page in reader.pages[:max_pages]:
+            page_text = page.extract_text()
+            if page_text:
+                parts.append(page_text)
+    text = re.sub(r'\s+', ' ', " ".join(parts)).strip()
+    return text[:max_chars]
+
+def _extract_worker(pdf_path, conn, max_pages=MAX_PAGES, max_chars=MAX_CHARS):
+    """Worker process entry point; sends ("ok", text) or ("error", message)."""
+    try:
+        conn.send(("ok", _read_pages(pdf_path, max_pages, max_chars)))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+def pdf_digest(pdf_path):
+    """SHA-256 of a PDF, read from the file name for files in the PDF store."""
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    if _HASH_NAME.match(stem) and os.path.basename(os.path.dirname(pdf_path)) == stem[:2]:
+        return stem
+    sha = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+class PDFTextExtractor:
+    """
+    Extract PDF text in separate processes with a wall-clock timeout.
+
+    Each document is parsed in its own worker process, at most max_workers
+    at a time, and a worker that runs past the timeout is killed. Texts are
+    cached by PDF hash in a JSON file so a document is parsed once. Errors
+    and timeouts are cached with a failure count and retried on later
+    calls until a document has failed max_failures times. The file is merged under a file
+    lock on each write, so processes sharing it keep each other's entries.
+    """
+
+    def __init__(self, cache_file=TEXT_CACHE_FILE, timeout=EXTRACT_TIMEOUT, max_workers=EXTRACT_WORKERS,
+                 max_failures=MAX_FAILURES):
+        self.cache_file = cache_file
+        self.timeout = timeout
+        self.max_failures = max_failures
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self._cache = self._load_cache()
+
+    def _load_cache(self):
+        return read_json(self.cache_file, {})
+
+    def _save_entry(self, digest, entry):
+        """Add one entry to the cache file, keeping entries other processes wrote since it was loaded."""
+        with self._lock, file_lock(self.cache_file):
+            self._cache = self._load_cache()
+            self._cache[digest] = entry
+            write_json(self.cache_file, self._cache)
+
+    def _run_worker(self, pdf_path, max_pages=MAX_PAGES, max_chars=MAX_CHARS):
+        """Parse one PDF in a child process; returns (status, text_or_error)."""
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_extract_worker, args=(pdf_path, sender, max_pages, max_chars),
+                                          daemon=True)
+        with self._slots:
+            process.start()
+            sender.close()
+            try:
+                if receiver.poll(self.timeout):
+                    return receiver.recv()
+                return "timeout", f"no result after {self.timeout:.0f}s"
+            except EOFError:
+                return "error", f"worker exited with code {process.exitcode}"
+            finally:
+                if process.is_alive():
+                    process.kill()
+                process.join()
+                receiver.close()
+
+    def extract(self, pdf_path):
+        """Return cleaned text from the first pages of a PDF, or "" on failure."""
+        if not pdf_path:
+            return ""
+        try:
+            digest = pdf_digest(pdf_path)
+        except OSError as e:
+            logging.error(f"PDF text extraction failed for {pdf_path}: {e}")
+            return ""
+
+        with self._lock:
+            cached = self._cache.get(digest)
+        failures = cached.get("failures", 1) if cached and cached["status"] != "ok" else 0
+        settled = cached is not None and (cached["status"] == "ok" or failures >= self.max_failures)
+        get_metrics().inc("cache_requests", cache="pdf_text", result="hit" if settled else "miss")
+        if settled:
+            return cached["text"]
+
+        status, result = self._run_worker(str(pdf_path))
+        if status == "ok":
+            self._save_entry(digest, {"status": status, "text": result})
+            return result
+
+        logging.error(f"PDF text extraction failed for {pdf_path}: {status}: {result}")
+        self._save_entry(digest, {"status": status, "text": "", "failures": failures + 1})
+        return ""
+
+    def extract_full(self, pdf_path):
+        """
+        Return the text of every page, e.g. for the search index.
+
+        Runs under the same timeout but is not cached here, since full texts
+        are too large for the JSON cache; callers keep their own copy.
+        """
+        status, result = self._run_worker(str(pdf_path), None, None)
+        if status != "ok":
+            logging.error(f"Full PDF text extraction failed for {pdf_path}: {status}: {result}")
+            return ""
+        return result
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+def get_text_extractor():
+    """Get the process-wide PDFTextExtractor, loading the cache on first use."""
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = PDFTextExtractor()
+        return _extractor
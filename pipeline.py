@@ -0,0 +1,353 @@
+import os
+import queue
+import heapq
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import utils
+from article import Article, canonical_source_type
+from checkpoint import RunCheckpoint, new_run_id, source_key
+from logs import sampled
+from metrics import export_run, get_metrics
+from profiles import Profile
+
+# Pipeline settings
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 100))  # Articles buffered between two stages
+FETCH_WORKERS = int(os.getenv("PIPELINE_FETCH_WORKERS", 8))  # Sources fetched at once
+
+_DONE = object()  # Sent down a queue when the stage feeding it has finished
+
+def normalize_article(article):
+    """Turn a fetcher's dict into an Article; articles without a link are dropped."""
+    if not isinstance(article, Article):
+        article = Article.from_dict(article)
+    if not article.link:
+        logging.warning(f"Skipping article without link: {article.title}")
+        return None
+    return article
+
+def relevancy_score(article):
+    """Default scorer: keyword relevancy of the title and summary."""
+    return utils.relevancy_from_text(article.text, article.source_type, article.source)
+
+def _relevancy(article):
+    return article.relevancy
+
+def top_relevant(limit):
+    """Selector keeping the limit most relevant articles, without holding or sorting the rest."""
+    def select(articles):
+        return heapq.nlargest(limit, articles, key=_relevancy)
+    return select
+
+def recent_top_relevant(limit, max_age=timedelta(days=1)):
+    """Selector keeping the limit most relevant articles published within max_age."""
+    def select(articles):
+        cutoff = datetime.now() - max_age
+        recent = (article for article in articles if article.published_date and article.published_date > cutoff)
+        return heapq.nlargest(limit, recent, key=_relevancy)
+    return select
+
+# Fetched items may still be dicts before normalize
+def _source_type(article):
+    return article.source_type if isinstance(article, Article) else canonical_source_type(article.get("source_type"))
+
+def _title(item):
+    if isinstance(item, tuple) and not isinstance(item, Article):
+        item = item[1]  # A (profile, article) pair after selection
+    return item.title if isinstance(item, Article) else item.get("title", "Unknown")
+
+class Pipeline:
+    """
+    Stream articles through fetch, normalize, dedup, score, select, enrich
+    and write stages.
+
+    Each stage runs in its own thread and hands articles to the next over a
+    bounded queue, so scoring starts while sources are still being fetched
+    and a slow stage holds back the ones before it instead of letting
+    articles pile up. Selection is the one stage that needs every article
+    before it can emit any; it keeps only the ones it selects.
+
+    Fetching, parsing and the shared relevancy score are done once. Each
+    profile then gets every scored article over its own queue and filters,
+    rescores and selects in its own thread; the selected (profile, article)
+    pairs meet again in one write stage. Without profiles, select is used
+    for a single default profile.
+
+    sources are callables returning iterables of article dicts or Articles;
+    every later stage sees Articles. write takes an Article and its Profile
+    and returns (success, article_info) like utils.add_to_notion.
+
+    With a checkpoint.RunCheckpoint, fetched articles, selections and
+    writes are journaled as they happen. A resumed run replays sources that
+    finished before the crash, starts from the recorded selection once
+    selection had finished, and skips articles already written.
+    """
+
+    def __init__(self, sources, write, select=None, score=relevancy_score, enrich=None, profiles=None,
+                 queue_size=QUEUE_SIZE, fetch_workers=FETCH_WORKERS, checkpoint=None):
+        self.sources = list(sources)
+        self.write = write
+        self.profiles = list(profiles or [Profile("default", select=select or top_relevant(30))])
+        self.score = score
+        self.enrich = enrich
+        self.queue_size = queue_size
+        self.fetch_workers = fetch_workers
+        self.checkpoint = checkpoint
+        self._selections_left = len(self.profiles)
+        self._lock = threading.Lock()
+        self._seen = set()
+        self.stats = {"fetched": Counter(), "added": Counter(), "duplicates": 0, "selected": 0,
+                      "profiles": Counter(), "added_articles": []}
+
+    def _fetch(self, outbox):
+        checkpoint = self.checkpoint
+
+        def drain(index, source):
+            key = source_key(index, source) if checkpoint else None
+            articles = checkpoint.fetched(key) if checkpoint else None
+            replayed = articles is not None
+            try:
+                if not replayed:
+                    if checkpoint:
+                        checkpoint.source_started(key)
+                    articles = source()
+                for article in articles:
+                    if checkpoint and not replayed:
+                        checkpoint.record_article(key, article)
+                    outbox.put(article)
+                    with self._lock:
+                        self.stats["fetched"][_source_type(article)] += 1
+                    metrics.inc("pipeline_articles", stage="fetch")
+                if checkpoint and not replayed:
+                    checkpoint.source_finished(key)
+            except Exception as e:
+                logging.error(f"Error fetching from {getattr(source, '__name__', source)}: {e}")
+
+        metrics = get_metrics()
+        try:
+            if self.sources:
+                with metrics.timer("stage", stage="fetch"), \
+                        ThreadPoolExecutor(max_workers=min(self.fetch_workers, len(self.sources))) as pool:
+                    list(pool.map(drain, range(len(self.sources)), self.sources))
+        finally:
+            outbox.put(_DONE)
+
+    def _map(self, name, fn, inbox, outbox, producers=1):
+        """Apply fn to each item until every producer has finished; None drops it."""
+        def items():
+            for _ in range(producers):
+                yield from iter(inbox.get, _DONE)
+
+        metrics = get_metrics()
+        try:
+            for article in items():
+                try:
+                    with metrics.timer("stage", stage=name):
+                        article = fn(article)
+                except Exception as e:
+                    logging.error(f"Pipeline {name} stage failed for {_title(article)}: {e}")
+                    continue
+                if article is not None:
+                    metrics.inc("pipeline_articles", stage=name)
+                    outbox.put(article)
+        finally:
+            outbox.put(_DONE)
+
+    def _dedup(self, article):
+        if article.link in self._seen:
+            self.stats["duplicates"] += 1
+            return None
+        self._seen.add(article.link)
+        return article
+
+    def _score(self, article):
+        if article.relevancy is None:
+            article = article.with_relevancy(self.score(article))
+        # Arguments rather than an f-string: nothing is formatted unless DEBUG is on
+        logging.debug("Article relevancy: %.2f - %.50s... (Source: %s)", article.relevancy, article.title,
+                      article.source, extra=sampled("relevancy"))
+        return article
+
+    def _fan_out(self, inbox, outboxes):
+        """Hand every scored article to each profile."""
+        try:
+            for article in iter(inbox.get, _DONE):
+                for outbox in outboxes:
+                    outbox.put(article)
+        finally:
+            for outbox in outboxes:
+                outbox.put(_DONE)
+
+    def _select(self, profile, inbox, outbox):
+        articles = iter(inbox.get, _DONE)
+        try:
+            select = profile.select or top_relevant(profile.limit)
+            with get_metrics().timer("stage", stage="select", profile=profile.name):
+                selected = select(profile.candidates(articles))
+            get_metrics().inc("pipeline_articles", len(selected), stage="select", profile=profile.name)
+            with self._lock:
+                self.stats["selected"] += len(selected)
+            for article in selected:
+                if self.checkpoint:
+                    self.checkpoint.record_selected(profile.name, article)
+                outbox.put((profile, article))
+        except Exception as e:
+            logging.error(f"Pipeline select stage failed for profile {profile.name}: {e}")
+            for _ in articles:
+                pass  # Keep draining so earlier stages can finish
+        finally:
+            with self._lock:
+                self._selections_left -= 1
+                if self.checkpoint and not self._selections_left:
+                    self.checkpoint.selection_finished()
+            outbox.put(_DONE)
+
+    def _replay_selection(self, selection, outbox):
+        """Stand in for fetch to select when a resumed run had already selected."""
+        profiles = {profile.name: profile for profile in self.profiles}
+        try:
+            for name, record in selection:
+                if name in profiles:
+                    self.stats["selected"] += 1
+                    outbox.put((profiles[name], Article.from_dict(record)))
+        finally:
+            outbox.put(_DONE)
+
+    def _enrich(self, pair):
+        profile, article = pair
+        article = self.enrich(article)
+        return None if article is None else (profile, article)
+
+    def _write(self, profile, article):
+        checkpoint = self.checkpoint
+        if checkpoint and checkpoint.written(profile.name, article.link):
+            return
+        metrics = get_metrics()
+        with metrics.timer("stage", stage="write"):
+            success, article_info = self.write(article, profile)
+        if success:
+            metrics.inc("pipeline_articles", stage="write", profile=profile.name)
+        if checkpoint:
+            checkpoint.record_written(profile.name, article.link)  # Handled, even if skipped as already in Notion
+        if success:
+            self.stats["added"][article.source_type] += 1
+            self.stats["profiles"][profile.name] += 1
+            if article_info:
+                self.stats["added_articles"].append(article_info)
+
+    def run(self):
+        """Run every stage to completion and return the run statistics."""
+        queues = [queue.Queue(self.queue_size) for _ in range(6)]
+        profile_queues = [queue.Queue(self.queue_size) for _ in self.profiles]
+        selection = self.checkpoint.selection() if self.checkpoint else None
+        if selection is not None:
+            stages = [(self._replay_selection, (selection, queues[4]))]
+            selectors = 1
+        else:
+            stages = [
+                (self._fetch, (queues[0],)),
+                (self._map, ("normalize", normalize_article, queues[0], queues[1])),
+                (self._map, ("dedup", self._dedup, queues[1], queues[2])),
+                (self._map, ("score", self._score, queues[2], queues[3])),
+                (self._fan_out, (queues[3], profile_queues)),
+                *((self._select, (profile, inbox, queues[4])) for profile, inbox in zip(self.profiles, profile_queues)),
+            ]
+            selectors = len(self.profiles)
+            if self.checkpoint:
+                self.checkpoint.selection_started()
+        stages.append((self._map, ("enrich", self._enrich if self.enrich else (lambda pair: pair), queues[4], queues[5],
+                                   selectors)))
+        threads = [threading.Thread(target=target, args=args, daemon=True) for target, args in stages]
+        for thread in threads:
+            thread.start()
+
+        # Writes go to Notion one at a time from the calling thread, for every profile
+        for profile, article in iter(queues[5].get, _DONE):
+            try:
+                self._write(profile, article)
+            except Exception as e:
+                logging.error(f"Error adding article to Notion: {e} - Article: {article.title}")
+        for thread in threads:
+            thread.join()
+        return self.stats
+
+def log_summary(stats, title="SUMMARY"):
+    """Log what a run fetched and added, by source type."""
+    fetched = sum(stats["fetched"].values())
+    added = sum(stats["added"].values())
+    logging.info("=" * 50)
+    logging.info(f"{title}: Added {added} new articles")
+    for source_type, count in sorted(stats["fetched"].items()):
+        logging.info(f"  - From {source_type}: {stats['added'][source_type]} (of {count} fetched)")
+    if len(stats["profiles"]) > 1:
+        for name, count in sorted(stats["profiles"].items()):
+            logging.info(f"  - For profile {name}: {count}")
+    logging.info(f"  - Duplicates dropped: {stats['duplicates']}")
+    logging.info(f"  - Articles fetched but not added: {fetched - added}")
+    logging.info("=" * 50)
+
+def run(sources, last_run_time, select=None, debug_mode=False, write=None, score=relevancy_score,
+        create_index=None, save_state=(), profiles=None, checkpoint=None):
+    """
+    Run a pipeline into Notion and finish the run.
+
+    By default each profile's articles go to its own database through the
+    shared rate-limited Notion writer.
+
+    Waits for background PDF enrichment, updates the PDF index and, unless
+    in debug mode, saves the last run time and calls each save_state
+    function. With a checkpoint the last run time saved is when the run
+    first started, so articles published while it was down are fetched
+    next time. The checkpoint, if any, is removed only after all that, so a
+    crash at any point resumes the run. Returns the run statistics.
+    """
+    if write is None:
+        def write(article, profile):
+            return utils.add_to_notion(article, last_run_time, profile.database_id)
+
+    metrics = get_metrics()
+    metrics.reset()
+    stats = Pipeline(sources, write, select=select, score=score, profiles=profiles, checkpoint=checkpoint).run()
+
+    from pdf_enrichment import wait_for_pdf_enrichment  # Brings in Notion and PDF modules
+    with metrics.timer("stage", stage="pdf_enrichment_wait"):
+        wait_for_pdf_enrichment()
+    with metrics.timer("stage", stage="pdf_index"):
+        index_path = (create_index or utils.create_pdf_index)(stats["added_articles"])
+    if index_path:
+        logging.info(f"PDF index created at {index_path}")
+
+    if not debug_mode:
+        utils.save_last_run_time(checkpoint.started if checkpoint else None)
+        for save in save_state:
+            save()
+        logging.info("Updated last run time")
+    else:
+        logging.info("DEBUG MODE: Not updating last run time")
+    if checkpoint:
+        checkpoint.finish()
+
+    log_summary(stats)
+    export_run(checkpoint.run_id if checkpoint else new_run_id(), checkpoint.name if checkpoint else "pipeline",
+               extra={"stats": {key: stats[key] for key in ("fetched", "added", "duplicates", "selected", "profiles")}})
+    return stats
+
+def start_run(name, last_run_time=None):
+    """
+    Open the checkpoint of the entry point name, resuming its unfinished run
+    if there is one. The run's last run time is checkpoint.last_run_time.
+    """
+    if last_run_time is None:
+        last_run_time = utils.get_last_run_time()
+    checkpoint = RunCheckpoint.open(name, last_run_time)
+    log_last_run_time(checkpoint.last_run_time)
+    return checkpoint
+
+def log_last_run_time(last_run_time):
+    if last_run_time:
+        logging.info(f"Using last run time: {last_run_time.isoformat()}")
+    else:
+        logging.info("First run or no last run time found. Will fetch all available articles.")
@@ -0,0 +1,80 @@
+import logging
+from typing import Callable, NamedTuple, Optional
+
+DEFAULT_LIMIT = 30
+
+class Profile(NamedTuple):
+    """
+    One team's view of a run: which articles it wants and where they go.
+
+    sources limits the profile to articles whose source name or source
+    type is listed (None means all). keywords are extra weights added to
+    the shared relevancy score when they occur in an article's text.
+    database_id None means the configured DATABASE_ID.
+    """
+    name: str
+    database_id: Optional[str] = None
+    limit: int = DEFAULT_LIMIT
+    min_relevancy: float = 0.0
+    sources: Optional[frozenset] = None
+    keywords: tuple = ()
+    select: Optional[Callable] = None  # Overrides the top-limit selection
+
+    def accepts(self, article):
+        return self.sources is None or article.source in self.sources or article.source_type in self.sources
+
+    def score(self, article):
+        """The shared relevancy plus this profile's keyword weights, capped at 1.0."""
+        score = article.relevancy + sum(weight for keyword, weight in self.keywords if keyword in article.text)
+        return min(score, 1.0)
+
+    def candidates(self, articles):
+        """The articles this profile would consider, rescored for it."""
+        for article in articles:
+            if not self.accepts(article):
+                continue
+            if self.keywords:
+                article = article.with_relevancy(self.score(article))
+            if article.relevancy >= self.min_relevancy:
+                yield article
+
+def load_profiles(config, limit=DEFAULT_LIMIT, select=None):
+    """
+    Profiles from the PROFILES setting, or one default profile.
+
+    PROFILES is a JSON list of {"name", "database_id", "sources", "limit",
+    "min_relevancy", "keywords"} entries; only name is required. The
+    default profile writes to DATABASE_ID and uses limit and select.
+    """
+    profiles = []
+    for i, entry in enumerate(config["PROFILES"]):
+        name = entry.get("name") or f"profile-{i + 1}"
+        try:
+            profiles.append(Profile(
+                name,
+                entry.get("database_id") or config["DATABASE_ID"],
+                int(entry.get("limit", limit)),
+                float(entry.get("min_relevancy", 0.0)),
+                frozenset(entry["sources"]) if entry.get("sources") else None,
+                tuple((keyword.lower(), float(weight)) for keyword, weight in entry.get("keywords", {}).items()),
+            ))
+        except (TypeError, ValueError, AttributeError) as e:
+            logging.error(f"Invalid profile {name}, skipping it: {e}")
+    return profiles or [Profile("default", config["DATABASE_ID"], limit, select=select)]
+
+def wanted_feeds(profiles, feeds):
+    """The feeds at least one profile reads, so nothing is fetched for nobody."""
+    if any(profile.sources is None for profile in profiles):
+        return dict(feeds)
+    wanted = frozenset().union(*(profile.sources for profile in profiles))
+    if "RSS Feed" in wanted:
+        return dict(feeds)
+    return {name: url for name, url in feeds.items() if name in wanted}
+
+def wants_alerts(profiles):
+    """Whether any profile reads Google Alerts, whose sources are per-topic names."""
+    return any(
+        profile.sources is None
+        or any(source == "Google Alerts" or source.startswith("Google Alerts:") for source in profile.sources)
+        for profile in profiles
+    )
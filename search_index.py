@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+
+# Full-text index over article titles, summaries and PDF text
+SEARCH_INDEX_FILE = os.getenv("SEARCH_INDEX_FILE", "search_index.sqlite3")
+DEFAULT_LIMIT = 10
+
+# bm25 column weights: title, summary, pdf_text
+RANK_WEIGHTS = (10.0, 4.0, 1.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    link TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    summary TEXT NOT NULL DEFAULT '',
+    pdf_text TEXT NOT NULL DEFAULT '',
+    source TEXT,
+    published TEXT,
+    pdf_path TEXT,
+    pdf_digest TEXT,
+    notion_page_id TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, summary, pdf_text,
+    content='articles', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts(rowid, title, summary, pdf_text) VALUES (new.id, new.title, new.summary, new.pdf_text);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, summary, pdf_text)
+    VALUES ('delete', old.id, old.title, old.summary, old.pdf_text);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, summary, pdf_text)
+    VALUES ('delete', old.id, old.title, old.summary, old.pdf_text);
+    INSERT INTO articles_fts(rowid, title, summary, pdf_text) VALUES (new.id, new.title, new.summary, new.pdf_text);
+END;
+"""
+
+def to_match_query(text):
+    """Turn free text into an FTS5 query that ANDs every word, ignoring FTS syntax."""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+class SearchIndex:
+    """SQLite FTS5 index of articles, updated one article at a time."""
+
+    def __init__(self, path=SEARCH_INDEX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def add_article(self, link, title="", summary="", source=None, published=None, notion_page_id=None):
+        """Add an article or refresh its title and summary."""
+        published = published.isoformat() if hasattr(published, "isoformat") else published
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO articles (link, title, summary, source, published, notion_page_id) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(link) DO UPDATE SET title = excluded.title, summary = excluded.summary, "
+                "source = excluded.source, published = excluded.published, "
+                "notion_page_id = COALESCE(excluded.notion_page_id, notion_page_id)",
+                (link, title or "", summary or "", source, published, notion_page_id),
+            )
+            self._db.commit()
+
+    def pdf_digest(self, link):
+        """Digest of the PDF text indexed for an article, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT pdf_digest FROM articles WHERE link = ?", (link,)).fetchone()
+        return row["pdf_digest"] if row else None
+
+    def set_pdf_text(self, link, pdf_path, pdf_digest, pdf_text):
+        """Attach a PDF's extracted text to an indexed article."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE articles SET pdf_path = ?, pdf_digest = ?, pdf_text = ? WHERE link = ?",
+                (str(pdf_path), pdf_digest, pdf_text or "", link),
+            )
+            self._db.commit()
+
+    def search(self, text, limit=DEFAULT_LIMIT):
+        """Return the best matching articles for free text, best first."""
+        match = to_match_query(text)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT a.link, a.title, a.source, a.published, a.pdf_path, a.notion_page_id, "
+                "snippet(articles_fts, -1, '[', ']', ' ... ', 12) AS snippet, "
+                "bm25(articles_fts, ?, ?, ?) AS rank "
+                "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+                "WHERE articles_fts MATCH ? ORDER BY rank LIMIT ?",
+                (*RANK_WEIGHTS, match, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_search_index():
+    """Get the process-wide SearchIndex, opening the database on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex()
+        return _index
+
+def index_article(article_info, summary=""):
+    """Add a newly created Notion article to the search index; failures are logged, not raised."""
+    try:
+        get_search_index().add_article(
+            article_info["link"], article_info.get("title", ""), summary,
+            article_info.get("source"), article_info.get("published_date"), article_info.get("notion_page_id"),
+        )
+    except sqlite3.Error as e:
+        logging.error(f"Could not add {article_info.get('link')} to the search index: {e}")
+
+def index_pdf(link, pdf_path):
+    """Index the full text of an article's PDF unless that exact PDF is already indexed."""
+    from pdf_text import get_text_extractor, pdf_digest
+    try:
+        index = get_search_index()
+        digest = pdf_digest(pdf_path)
+        if index.pdf_digest(link) == digest:
+            return
+        index.set_pdf_text(link, pdf_path, digest, get_text_extractor().extract_full(pdf_path))
+    except (sqlite3.Error, OSError) as e:
+        logging.error(f"Could not index PDF text for {link}: {e}")
+
+def main(argv=None):
+    """Query the search index from the command line."""
+    parser = argparse.ArgumentParser(description="Search indexed articles and PDFs.")
+    parser.add_argument("query", nargs="+", help="words to search for")
+    parser.add_argument("-n", "--limit", type=int, default=DEFAULT_LIMIT, help="number of results")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(SEARCH_INDEX_FILE):
+        print(f"No search index at {SEARCH_INDEX_FILE} yet; it is built as articles are added.")
+        return 1
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    results = index.search(" ".join(args.query), args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for i, result in enumerate(results, 1):
+        date = (result["published"] or "")[:10]
+        print(f"{i:2}. {result['title']}  ({result['source'] or 'Unknown'}, {date})")
+        print(f"    {result['link']}")
+        if result["pdf_path"]:
+            print(f"    PDF: {result['pdf_path']}")
+        print(f"    {result['snippet']}")
+    print(f"{len(results)} results from {len(index)} articles in {elapsed:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
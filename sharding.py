@@ -0,0 +1,279 @@
+import os
+import sys
+import time
+import socket
+import logging
+import argparse
+import threading
+import itertools
+from datetime import datetime, timedelta
+
+import utils
+from article import article_record
+from checkpoint import new_run_id
+from work_queue import WorkQueue
+
+# Sharding settings
+LOCAL_WORKERS = int(os.getenv("SHARD_LOCAL_WORKERS", 2))  # The coordinator's own workers, so a run never stalls
+POLL_SECONDS = float(os.getenv("SHARD_POLL_SECONDS", 1.0))
+RUN_RETENTION = timedelta(days=int(os.getenv("SHARD_RUN_RETENTION_DAYS", 7)))  # Units of older runs are purged
+
+FETCH_KINDS = ("feed", "alerts")
+
+_worker_numbers = itertools.count(1)
+
+def worker_name():
+    """A worker id unique across hosts sharing the queue."""
+    return f"{socket.gethostname()}-{os.getpid()}-{next(_worker_numbers)}"
+
+def _time_payload(value):
+    return value.isoformat() if value else None
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+def fetch_feed_unit(payload):
+    """Fetch and parse one RSS feed."""
+    import rss_fetcher
+    articles = rss_fetcher.process_rss_feed(payload["url"], payload["name"], _parse_time(payload["last_run_time"]))
+    return {"articles": [article_record(article) for article in articles]}
+
+def fetch_alerts_unit(payload):
+    """
+    Fetch one mailbox's Google Alerts.
+
+    Credentials come from this worker's own configuration rather than the
+    shared queue. The high-water mark goes back to the coordinator, which
+    saves it once the articles are written.
+    """
+    import google_alerts_fetcher
+    source = next((source for source in google_alerts_fetcher.get_alert_sources()
+                   if source["email"] == payload["email"] and source["mailbox"] == payload["mailbox"]), None)
+    if source is None:
+        raise LookupError(f"No credentials configured for {payload['email']}/{payload['mailbox']}")
+    _, articles, mark = google_alerts_fetcher.fetch_alert_source(source, _parse_time(payload["last_run_time"]),
+                                                                 payload["debug"])
+    return {"articles": [article_record(article) for article in articles], "mark": mark}
+
+_pdf_fetcher = None
+_pdf_fetcher_lock = threading.Lock()
+
+def fetch_pdf_unit(payload):
+    """Find, download and read one article's PDF; the coordinator patches its Notion page."""
+    global _pdf_fetcher
+    from pdf_enrichment import PDFEnricher
+    with _pdf_fetcher_lock:
+        if _pdf_fetcher is None:
+            _pdf_fetcher = PDFEnricher(writer=None, max_workers=1)  # Only fetch, which needs no Notion access
+    fetched = _pdf_fetcher.fetch(payload)
+    return {"pdf": list(fetched) if fetched else None}
+
+HANDLERS = {"feed": fetch_feed_unit, "alerts": fetch_alerts_unit, "pdf": fetch_pdf_unit}
+
+class Worker:
+    """
+    Claim units from a WorkQueue and run them, renewing each lease while
+    its handler works. A unit whose handler raises is given back for a
+    retry.
+    """
+
+    def __init__(self, queue, handlers=None, worker_id=None, kinds=None):
+        self.queue = queue
+        self.handlers = handlers or HANDLERS
+        self.worker_id = worker_id or worker_name()
+        self.kinds = kinds or list(self.handlers)
+
+    def _heartbeat(self, unit, done):
+        while not done.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(unit, self.worker_id):
+                logging.warning(f"Worker {self.worker_id} lost its lease on {unit.kind} {unit.key}")
+                return
+
+    def run_unit(self, unit):
+        """Run one claimed unit to completion or failure."""
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(unit, done), daemon=True)
+        heartbeat.start()
+        try:
+            result = self.handlers[unit.kind](unit.payload)
+        except Exception as e:
+            logging.error(f"Work unit {unit.kind} {unit.key} failed (attempt {unit.attempts}): {e}")
+            self.queue.fail(unit, self.worker_id, e)
+            return False
+        finally:
+            done.set()
+            heartbeat.join()
+        if not self.queue.complete(unit, self.worker_id, result):
+            logging.warning(f"Discarding result of {unit.kind} {unit.key}: lease was taken over")
+            return False
+        return True
+
+    def run(self, stop=None, poll=POLL_SECONDS, exit_when_idle=False):
+        """Work until stop is set, or until the queue is empty with exit_when_idle. Returns units completed."""
+        stop = stop or threading.Event()
+        completed = 0
+        while not stop.is_set():
+            unit = self.queue.claim(self.worker_id, self.kinds)
+            if unit is None:
+                if exit_when_idle:
+                    break
+                stop.wait(poll)
+                continue
+            completed += self.run_unit(unit)
+        return completed
+
+class ShardedPDFEnricher:
+    """
+    Stand-in for the PDFEnricher during a sharded run: PDF jobs become work
+    units, and wait patches each Notion page from this process as its PDF
+    comes back, so every Notion write still goes through one rate limiter.
+    PDF paths are read here, so PDF_DIR must be on the shared volume.
+    """
+
+    def __init__(self, coordinator, enricher):
+        self.coordinator = coordinator
+        self.enricher = enricher
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, page_id, article_info):
+        link = article_info["link"]
+        with self._lock:
+            pages = self._jobs.setdefault(link, [])
+            pages.append((page_id, article_info))
+            if len(pages) > 1:
+                return  # Another profile's page for the same article; one unit serves both
+        self.coordinator.queue.add(self.coordinator.run_id, "pdf", link,
+                                   {"title": article_info["title"], "link": link})
+
+    def wait(self):
+        """Patch pages as their PDFs arrive until every PDF unit has finished; returns how many got a PDF."""
+        found = 0
+        for link, result in self.coordinator.completed(("pdf",)):
+            with self._lock:
+                pages = self._jobs.pop(link, [])
+            if not result["pdf"]:
+                continue
+            for page_id, article_info in pages:
+                try:
+                    self.enricher.apply(page_id, article_info, *result["pdf"])
+                    found += 1
+                except Exception as e:
+                    logging.error(f"PDF enrichment failed for {article_info['title']}: {e}")
+        return found
+
+class Coordinator:
+    """
+    Drive a sharded run from the process that selects and writes.
+
+    Feeds and mailboxes are queued as work units for any worker sharing the
+    queue file (`python sharding.py` on this or another host), plus
+    local_workers threads here so the run finishes without them. collect
+    is a pipeline source yielding each unit's articles as it completes.
+    While the coordinator is open, PDF enrichment is also handed out as
+    work units.
+    """
+
+    def __init__(self, queue, last_run_time, debug_mode=False, local_workers=LOCAL_WORKERS, handlers=None,
+                 poll=POLL_SECONDS):
+        self.queue = queue
+        self.last_run_time = last_run_time
+        self.debug_mode = debug_mode
+        self.poll = poll
+        self.run_id = new_run_id()
+        self.alert_marks = {}  # High-water marks to save once the run's articles are written
+        self._units = []
+        self._workers = [Worker(queue, handlers) for _ in range(local_workers)]
+        self._threads = []
+        self._stop = threading.Event()
+        self._previous_enricher = None
+
+    def add_feeds(self, feeds):
+        for name, url in feeds.items():
+            self._units.append(("feed", name,
+                                {"name": name, "url": url, "last_run_time": _time_payload(self.last_run_time)}))
+
+    def add_alert_sources(self, sources):
+        for source in sources:
+            self._units.append(("alerts", f"{source['email']}/{source['mailbox']}", {
+                "email": source["email"], "mailbox": source["mailbox"],
+                "last_run_time": _time_payload(self.last_run_time), "debug": self.debug_mode,
+            }))
+
+    def start(self):
+        purged = self.queue.purge((datetime.now() - RUN_RETENTION).timestamp())
+        if purged:
+            logging.info(f"Purged {purged} work units of old runs")
+        from pdf_enrichment import PDFEnricher, use_pdf_enricher
+        from notion_writer import get_notion_writer
+        self._previous_enricher = use_pdf_enricher(
+            ShardedPDFEnricher(self, PDFEnricher(get_notion_writer(), max_workers=1)))
+        for worker in self._workers:
+            thread = threading.Thread(target=worker.run, args=(self._stop, self.poll), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logging.info(f"Sharded run {self.run_id} started with {len(self._workers)} local workers")
+
+    def completed(self, kinds):
+        """(key, result) of the run's units of kinds as they complete, until none is left to run."""
+        after = 0
+        while True:
+            finished = self.queue.finished(self.run_id, kinds)  # Checked first so no late result is missed
+            for seq, _, key, result in self.queue.results(self.run_id, after, kinds):
+                after = seq
+                yield key, result
+            if finished:
+                return
+            self.queue.expire()
+            time.sleep(self.poll)
+
+    def collect(self):
+        """
+        Pipeline source: articles from every fetch unit, merged as units
+        complete. Units are queued only now, so a resumed run that replays
+        this source from its checkpoint hands out no work.
+        """
+        for kind, key, payload in self._units:
+            self.queue.add(self.run_id, kind, key, payload)
+        for key, result in self.completed(FETCH_KINDS):
+            if result.get("mark"):
+                self.alert_marks[key] = result["mark"]
+            yield from result["articles"]
+        for kind, key, error in self.queue.failures(self.run_id):
+            logging.error(f"Gave up on {kind} {key}: {error}")
+        logging.info(f"Sharded run {self.run_id} fetched: {dict(self.queue.counts(self.run_id))}")
+
+    def close(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        from pdf_enrichment import use_pdf_enricher
+        use_pdf_enricher(self._previous_enricher)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def main(argv=None):
+    """Run a standalone worker against the shared work queue."""
+    parser = argparse.ArgumentParser(description="Work on fetch and PDF units of sharded runs.")
+    parser.add_argument("--kinds", help=f"comma-separated unit kinds to take (default: {','.join(HANDLERS)})")
+    parser.add_argument("--once", action="store_true", help="exit when no unit is left instead of polling")
+    args = parser.parse_args(argv)
+
+    utils.load_environment()
+    utils.setup_logging()
+    worker = Worker(WorkQueue(), kinds=args.kinds.split(",") if args.kinds else None)
+    logging.info(f"Worker {worker.worker_id} started")
+    try:
+        completed = worker.run(exit_when_idle=args.once)
+    except KeyboardInterrupt:
+        return 0
+    logging.info(f"Worker {worker.worker_id} completed {completed} units")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+A small local IMAP server standing in for Gmail in tests.
+
+Speaks just enough IMAP4rev1 for the alert fetcher and watcher: LOGIN,
+SELECT, UID SEARCH, UID FETCH (BODYSTRUCTURE, header fields and body
+sections), UID STORE, NOOP, IDLE and LOGOUT.
+"""
+
+import re
+import select
+import socketserver
+import threading
+from email.utils import format_datetime
+from datetime import datetime, timezone
+
+STRUCTURE = (
+    '(("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "7BIT" 20 1 NIL NIL NIL)'
+    '("TEXT" "HTML" ("CHARSET" "UTF-8") NIL NIL "7BIT" {size} 1 NIL NIL NIL) "ALTERNATIVE" ("BOUNDARY" "b1") NIL NIL)'
+)
+
+class StandinMailbox:
+    """Messages shared by every connection to the server."""
+
+    def __init__(self, uidvalidity=1):
+        self.uidvalidity = uidvalidity
+        self.messages = []  # (uid, header bytes, html bytes)
+        self.flags = {}
+        self.changed = threading.Condition()
+
+    def add_alert(self, topic, html, date=None):
+        """Deliver a Google Alert email and wake any IDLE connections."""
+        date = date or datetime.now(timezone.utc)
+        header = f"Date: {format_datetime(date)}\r\nSubject: Google Alert - {topic}\r\n\r\n".encode()
+        with self.changed:
+            uid = (self.messages[-1][0] + 1) if self.messages else 1
+            self.messages.append((uid, header, html.encode()))
+            self.changed.notify_all()
+        return uid
+
+class StandinHandler(socketserver.StreamRequestHandler):
+    """Handle one client connection."""
+
+    reported = 0  # Message count this client has been told about
+
+    def send(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections.append(self)
+        mailbox = self.server.mailbox
+        self.send("* OK IMAP4rev1 stand-in ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            tag, _, rest = line.decode().rstrip("\r\n").partition(" ")
+            command, _, args = rest.partition(" ")
+            command = command.upper()
+            if command == "UID":
+                command, _, args = args.partition(" ")
+                command = "UID " + command.upper()
+
+            if command == "CAPABILITY":
+                self.send("* CAPABILITY IMAP4rev1 IDLE")
+            elif command == "LOGIN":
+                pass
+            elif command == "SELECT":
+                self.reported = len(mailbox.messages)
+                self.send(f"* {self.reported} EXISTS")
+                self.send(f"* OK [UIDVALIDITY {mailbox.uidvalidity}] UIDs valid")
+            elif command == "UID SEARCH":
+                self.send("* SEARCH " + " ".join(str(uid) for uid in self.search(args)))
+            elif command == "UID FETCH":
+                self.fetch(args)
+            elif command == "UID STORE":
+                message_set, _, flags = args.partition(" ")
+                for uid in self.expand(message_set):
+                    mailbox.flags.setdefault(uid, []).append(flags)
+            elif command == "IDLE":
+                if not self.idle():
+                    return
+            elif command == "LOGOUT":
+                self.send("* BYE")
+                self.send(f"{tag} OK LOGOUT completed")
+                return
+            self.send(f"{tag} OK {command} completed")
+
+    def expand(self, message_set):
+        """Expand a UID message set into known UIDs."""
+        uids = [m[0] for m in self.server.mailbox.messages]
+        highest = uids[-1] if uids else 0
+        found = []
+        for part in message_set.split(","):
+            start, _, end = part.partition(":")
+            low = int(start)
+            high = highest if end == "*" else int(end or start)
+            low, high = min(low, high), max(low, high)
+            found.extend(uid for uid in uids if low <= uid <= high)
+        return found
+
+    def search(self, criteria):
+        """Support the UID-range and SINCE searches the fetcher issues."""
+        match = re.search(r"UID (\S+)", criteria)
+        if match:
+            return self.expand(match.group(1))
+        return [m[0] for m in self.server.mailbox.messages]
+
+    def fetch(self, args):
+        message_set, _, query = args.partition(" ")
+        messages = {m[0]: m for m in self.server.mailbox.messages}
+        for uid in self.expand(message_set):
+            _, header, html = messages[uid]
+            if "BODYSTRUCTURE" in query:
+                structure = STRUCTURE.format(size=len(html))
+                self.wfile.write(
+                    f"* {uid} FETCH (UID {uid} BODYSTRUCTURE {structure} "
+                    f"BODY[HEADER.FIELDS (DATE SUBJECT)] {{{len(header)}}}\r\n".encode() + header + b")\r\n"
+                )
+            else:
+                self.wfile.write(f"* {uid} FETCH (UID {uid} BODY[2] {{{len(html)}}}\r\n".encode() + html + b")\r\n")
+
+    def idle(self):
+        """Push EXISTS for unreported messages until the client sends DONE."""
+        mailbox = self.server.mailbox
+        self.send("+ idling")
+        while True:
+            with mailbox.changed:
+                if len(mailbox.messages) == self.reported:
+                    mailbox.changed.wait(0.05)
+                if len(mailbox.messages) != self.reported:
+                    self.reported = len(mailbox.messages)
+                    self.send(f"* {self.reported} EXISTS")
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            if readable:
+                line = self.rfile.readline()
+                return line.strip().upper() == b"DONE"
+
+class StandinIMAPServer(socketserver.ThreadingTCPServer):
+    """Threaded stand-in server bound to an ephemeral localhost port."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mailbox=None):
+        super().__init__(("127.0.0.1", 0), StandinHandler)
+        self.mailbox = mailbox or StandinMailbox()
+        self.connections = []
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def drop_connections(self):
+        """Simulate the server hanging up on every client."""
+        for handler in list(self.connections):
+            try:
+                handler.connection.shutdown(2)
+            except OSError:
+                pass
+        self.connections.clear()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
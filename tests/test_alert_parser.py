@@ -0,0 +1,93 @@
+"""
+Tests for the Google Alert email extractor.
+"""
+
+import unittest
+import os
+import sys
+import threading
+from datetime import datetime
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import alert_parser
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "google_alert_crispr.html")
+
+class TestAlertParser(unittest.TestCase):
+    """Tests for extract_alert_articles."""
+
+    @classmethod
+    def setUpClass(cls):
+        with open(FIXTURE, encoding="utf-8") as f:
+            cls.body = f.read()
+        cls.email_date = datetime(2025, 3, 10, 8, 0)
+
+    def test_recorded_alert_layout(self):
+        articles = alert_parser.extract_alert_articles(self.body, "Google Alerts: CRISPR", self.email_date)
+
+        self.assertEqual(len(articles), 3)
+        first = articles[0]
+        self.assertEqual(first["title"], "First CRISPR base editing trial reports durable results")
+        self.assertEqual(first["link"], "https://www.statnews.com/2025/03/10/crispr-base-editing-trial-results/")
+        self.assertTrue(first["summary"].startswith("Patients treated with a single dose"))
+        self.assertEqual(first["source"], "Google Alerts: CRISPR")
+        self.assertEqual(first["published_parsed"], (2025, 3, 10, 8, 0, 0))
+
+    def test_google_links_are_ignored(self):
+        articles = alert_parser.extract_alert_articles(self.body, "Google Alerts", self.email_date)
+        self.assertFalse(any("google.com" in a["link"] for a in articles))
+
+    def test_fields_after_an_item_stay_out_of_it(self):
+        body = (
+            '<html><body><table>'
+            '<tr itemscope itemtype="http://schema.org/Article"><td>'
+            '<a itemprop="url" href="https://a.org/item">Item A</a>'
+            '<div itemprop="description">Summary of A</div></td></tr>'
+            '<tr><td><p><a href="https://b.org/plain">Plain link B</a> snippet of B</p></td></tr>'
+            '<tr><td><div itemprop="description">Stray description</div></td></tr>'
+            '</table></body></html>'
+        )
+        articles = alert_parser.extract_alert_articles(body, "Google Alerts", self.email_date)
+
+        self.assertEqual([(a["link"], a["summary"]) for a in articles], [
+            ("https://a.org/item", "Summary of A"),
+            ("https://b.org/plain", "snippet of B"),
+        ])
+
+    def test_unwrap_google_url(self):
+        wrapped = "https://www.google.com/url?rct=j&sa=t&url=https://example.com/a%3Fb%3D1&ct=ga"
+        self.assertEqual(alert_parser.unwrap_google_url(wrapped), "https://example.com/a?b=1")
+        self.assertEqual(alert_parser.unwrap_google_url("https://example.com/x"), "https://example.com/x")
+
+    def test_parallel_results_keep_order(self):
+        jobs = [(self.body, f"Google Alerts: {n}", self.email_date) for n in range(alert_parser.PARALLEL_MIN_EMAILS)]
+        results = alert_parser.extract_many(jobs, max_workers=2)
+        self.assertEqual([r[0]["source"] for r in results], [job[1] for job in jobs])
+
+    def test_mailbox_threads_share_one_pool(self):
+        jobs = [(self.body, f"Google Alerts: {n}", self.email_date) for n in range(alert_parser.PARALLEL_MIN_EMAILS)]
+        get_pool = alert_parser._get_pool
+        pools = []
+        results = []
+
+        def recording_get_pool(max_workers=None):
+            pool = get_pool(max_workers)
+            pools.append(pool)
+            return pool
+
+        with mock.patch.object(alert_parser, "_get_pool", side_effect=recording_get_pool):
+            threads = [threading.Thread(target=lambda: results.append(alert_parser.extract_many(jobs, max_workers=2)))
+                       for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(pools), 3)
+        self.assertEqual(len(set(map(id, pools))), 1)
+
+if __name__ == '__main__':
+    unittest.main()
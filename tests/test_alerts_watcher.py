@@ -0,0 +1,113 @@
+"""
+Tests for the Google Alerts IDLE watcher against a local IMAP stand-in.
+"""
+
+import unittest
+import os
+import sys
+import queue
+import time
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import config
+import alerts_watcher
+import google_alerts_fetcher
+from imap_standin import StandinIMAPServer
+
+ALERT_HTML = (
+    '<html><body><table><tr><td>'
+    '<a href="https://example.com/{slug}">{title}</a>'
+    '<div>New results on gene editing</div>'
+    '</td></tr></table></body></html>'
+)
+
+class TestAlertsWatcher(unittest.TestCase):
+    """End-to-end tests for watch_google_alerts."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_state_file = google_alerts_fetcher.SYNC_STATE_FILE
+        google_alerts_fetcher.SYNC_STATE_FILE = os.path.join(self.tmp.name, "state.json")
+
+        self.server = StandinIMAPServer().start()
+        os.environ.update({
+            "EMAIL": "alerts@example.com",
+            "APP_PASSWORD": "secret",
+            "DEBUG_FETCH": "false",
+            "IMAP_HOST": "127.0.0.1",
+            "IMAP_PORT": str(self.server.port),
+            "IMAP_SSL": "false",
+        })
+        config.reload_config()
+
+        self.received = queue.Queue()
+        self.stop = threading.Event()
+        self.thread = threading.Thread(
+            target=alerts_watcher.watch_google_alerts,
+            kwargs={"on_articles": self.received.put, "stop_event": self.stop, "keepalive": 0.3},
+            daemon=True,
+        )
+
+    def tearDown(self):
+        self.stop.set()
+        if self.thread.ident is not None:
+            self.thread.join(5)
+        self.server.stop()
+        google_alerts_fetcher.SYNC_STATE_FILE = self.original_state_file
+        for key in ("IMAP_HOST", "IMAP_PORT", "IMAP_SSL"):
+            os.environ.pop(key, None)
+        config.reload_config()
+        self.tmp.cleanup()
+
+    def deliver(self, slug, title):
+        self.server.mailbox.add_alert("CRISPR", ALERT_HTML.format(slug=slug, title=title))
+
+    def test_new_alert_is_pushed_while_idling(self):
+        self.thread.start()
+        self.deliver("one", "Base editing trial opens")
+
+        articles = self.received.get(timeout=5)
+        self.assertEqual(articles[0]["title"], "Base editing trial opens")
+        self.assertEqual(articles[0]["source"], "Google Alerts: CRISPR")
+
+        # Keepalive cycles pass and the next alert still arrives exactly once
+        self.deliver("two", "Prime editing in primates")
+        articles = self.received.get(timeout=5)
+        self.assertEqual([a["title"] for a in articles], ["Prime editing in primates"])
+
+        self.stop.set()
+        self.thread.join(5)
+        self.assertTrue(self.received.empty())
+        self.assertEqual(google_alerts_fetcher.load_sync_state()["alerts@example.com/inbox"]["last_uid"], 2)
+
+    def test_reconnects_after_connection_drop(self):
+        self.thread.start()
+        self.deliver("one", "Base editing trial opens")
+        self.received.get(timeout=5)
+
+        self.server.drop_connections()
+        self.deliver("two", "Prime editing in primates")
+
+        articles = self.received.get(timeout=10)
+        self.assertEqual([a["title"] for a in articles], ["Prime editing in primates"])
+
+    def test_idle_timeout_leaves_connection_usable(self):
+        imap, _ = google_alerts_fetcher.connect_imap("alerts@example.com", "secret")
+        try:
+            self.assertFalse(alerts_watcher.idle_once(imap, 0.2))
+            self.assertEqual(imap.noop()[0], "OK")
+
+            threading.Timer(0.1, self.deliver, ("one", "Base editing trial opens")).start()
+            started = time.monotonic()
+            self.assertTrue(alerts_watcher.idle_once(imap, 5))
+            self.assertLess(time.monotonic() - started, 2)
+            self.assertEqual(imap.uid("SEARCH", None, "UID 1:*")[1], [b"1"])
+        finally:
+            imap.logout()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+"""
+Tests for the Article record.
+"""
+
+import unittest
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from article import Article, make_article
+
+class TestArticle(unittest.TestCase):
+    """Tests for normalization on construction."""
+
+    def test_from_dict_normalizes_fields(self):
+        article = Article.from_dict({
+            "title": " CRISPR Screen ", "link": " https://a.org/1 ", "summary": "In Mice",
+            "source": "".join(["Nature ", "Biotechnology"]), "source_type": "RSS",
+            "published_parsed": (2025, 3, 1, 12, 30, 0, 5, 60, 0),
+        })
+        self.assertEqual((article.title, article.link), ("CRISPR Screen", "https://a.org/1"))
+        self.assertEqual(article.source_type, "RSS Feed")
+        self.assertIs(article.source, make_article("t", "l", source="Nature Biotechnology").source)
+        self.assertEqual(article.published_date, datetime(2025, 3, 1, 12, 30))
+        self.assertEqual(article.text, "crispr screen in mice")
+        self.assertIsNone(article.relevancy)
+        self.assertEqual(article.to_dict()["published_parsed"], (2025, 3, 1, 12, 30, 0))
+
+if __name__ == '__main__':
+    unittest.main()
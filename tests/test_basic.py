@@ -5,6 +5,8 @@ Basic tests for the biotech-rss-notion package.
 import unittest
 import os
 import sys
+import tempfile
+import subprocess
 
 # Add the src directory to the path so we can import our module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
@@ -26,5 +28,19 @@ class TestBasic(unittest.TestCase):
         self.assertTrue(hasattr(rss_to_notion, 'RSS_FEEDS'), 
                         "RSS_FEEDS constant not defined in module")
 
+    def test_import_has_no_side_effects(self):
+        """Importing the entry points needs no configuration, writes nothing and loads no heavy libraries."""
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        env = {key: value for key, value in os.environ.items() if key not in ("NOTION_TOKEN", "DATABASE_ID")}
+        env["PYTHONPATH"] = root
+        code = ("import sys, rss_to_notion, app, alerts_watcher; "
+                "print(sorted(m for m in ('requests', 'notion_client', 'feedparser', 'bs4', 'lxml', 'dotenv') "
+                "if m in sys.modules))")
+        with tempfile.TemporaryDirectory() as cwd:
+            result = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stdout.strip(), "[]")
+            self.assertEqual(os.listdir(cwd), [])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
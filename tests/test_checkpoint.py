@@ -0,0 +1,136 @@
+"""
+Tests for resuming crashed runs from their checkpoint.
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pipeline
+from checkpoint import RunCheckpoint
+
+class Crash(BaseException):
+    """Stands in for the process dying; the pipeline does not catch it."""
+
+def article(n, relevancy):
+    return {"title": f"Paper {n}", "link": f"https://a.org/{n}", "relevancy": relevancy,
+            "source_type": "RSS Feed", "published_date": datetime.now()}
+
+class TestCheckpoint(unittest.TestCase):
+    """Tests for journaling stage outputs and resuming from them."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.last_run_time = datetime(2025, 3, 1, 8, 0)
+        self.fetches = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open(self, last_run_time=None):
+        return RunCheckpoint.open("app", last_run_time or self.last_run_time, directory=self.tmp.name)
+
+    def source(self, *articles):
+        def fetch():
+            self.fetches.append(articles[0]["link"])
+            return list(articles)
+        return fetch
+
+    def run_pipeline(self, checkpoint, sources, write):
+        return pipeline.Pipeline(sources, write, select=pipeline.top_relevant(3), checkpoint=checkpoint).run()
+
+    def test_crash_during_writes_resumes_without_refetching(self):
+        sources = [self.source(article(1, 0.9), article(2, 0.8)), self.source(article(3, 0.7), article(4, 0.1))]
+        written = []
+
+        def crash_on_second(item, profile):
+            if written:
+                raise Crash()
+            written.append(item.link)
+            return True, None
+
+        checkpoint = self.open()
+        with self.assertRaises(Crash):
+            self.run_pipeline(checkpoint, sources, crash_on_second)
+        checkpoint.close()
+
+        resumed = self.open(last_run_time=datetime.now())
+        self.assertEqual((resumed.run_id, resumed.last_run_time), (checkpoint.run_id, self.last_run_time))
+
+        def write(item, profile):
+            written.append(item.link)
+            return True, None
+
+        stats = self.run_pipeline(resumed, sources, write)
+        self.assertEqual(self.fetches, ["https://a.org/1", "https://a.org/3"])
+        self.assertEqual(written, ["https://a.org/1", "https://a.org/2", "https://a.org/3"])
+        self.assertEqual(stats["selected"], 3)
+
+        resumed.finish()
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_only_unfinished_sources_are_fetched_again(self):
+        checkpoint = self.open()
+        finished, unfinished = self.source(article(1, 0.9)), self.source(article(2, 0.8))
+        keys = [pipeline.source_key(i, source) for i, source in enumerate([finished, unfinished])]
+        checkpoint.source_started(keys[0])
+        checkpoint.record_article(keys[0], article(1, 0.9))
+        checkpoint.source_finished(keys[0])
+        checkpoint.source_started(keys[1])
+        checkpoint.record_article(keys[1], article(2, 0.8))  # Crashed before this source finished
+        checkpoint.close()
+
+        written = []
+
+        def write(item, profile):
+            written.append(item.link)
+            return True, None
+
+        resumed = self.open()
+        stats = self.run_pipeline(resumed, [finished, unfinished], write)
+        resumed.close()
+        self.assertEqual(self.fetches, ["https://a.org/2"])
+        self.assertEqual(written, ["https://a.org/1", "https://a.org/2"])
+        self.assertEqual(stats["duplicates"], 0)
+
+    def test_resumed_run_saves_start_time_and_replayed_source_state(self):
+        marks = {}
+
+        def alerts():
+            marks["me/inbox"] = {"uidvalidity": 1, "last_uid": 42}
+            return [article(1, 0.9)]
+
+        def crash(item, profile):
+            raise Crash()
+
+        checkpoint = self.open()
+        checkpoint.track_state("alert_sync", marks)
+        with self.assertRaises(Crash):
+            self.run_pipeline(checkpoint, [alerts], crash)
+        checkpoint.close()
+
+        resumed = self.open()
+        restored, saved = {}, []
+        resumed.track_state("alert_sync", restored)
+        with mock.patch.object(pipeline.utils, "save_last_run_time") as save_last_run_time, \
+                mock.patch.object(pipeline, "export_run"):
+            pipeline.run([alerts], resumed.last_run_time, write=lambda item, profile: (True, None),
+                         create_index=lambda articles: None, save_state=[lambda: saved.append(dict(restored))],
+                         checkpoint=resumed)
+        save_last_run_time.assert_called_once_with(checkpoint.started)
+        self.assertEqual(saved, [{"me/inbox": {"uidvalidity": 1, "last_uid": 42}}])
+
+    def test_stale_checkpoint_starts_a_new_run(self):
+        old = self.open()
+        old.close()
+        fresh = RunCheckpoint.open("app", datetime.now(), directory=self.tmp.name, max_age=timedelta(0))
+        fresh.close()
+        self.assertNotEqual(fresh.run_id, old.run_id)
+
+if __name__ == '__main__':
+    unittest.main()
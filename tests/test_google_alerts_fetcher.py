@@ -0,0 +1,289 @@
+"""
+Tests for the Google Alerts fetcher.
+"""
+
+import unittest
+import os
+import re
+import sys
+import time
+import base64
+import tempfile
+from datetime import datetime
+from functools import partial
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+import google_alerts_fetcher
+import imap_utils
+
+HTML_BODY = (
+    '<html><body><table><tr><td>'
+    '<a href="https://example.com/crispr">CRISPR therapy enters trial</a>'
+    '<div>Caf\u00e9 researchers report gene editing results</div>'
+    '</td></tr></table></body></html>'
+)
+
+class FakeIMAP:
+    """Answer FETCH commands the way imaplib returns them and count round trips."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.fetch_calls = []
+
+    def fetch(self, message_set, query):
+        self.fetch_calls.append(message_set)
+        numbers = []
+        for part in message_set.split(","):
+            start, _, end = part.partition(":")
+            numbers.extend(range(int(start), int(end or start) + 1))
+        data = []
+        for n in numbers:
+            payload = self.messages[n]
+            data.append((f"{n} (RFC822 {{{len(payload)}}}".encode(), payload))
+            data.append(b")")
+        return "OK", data
+
+class TestBatchedFetch(unittest.TestCase):
+    """Tests for message-set batching."""
+
+    def test_compress_message_set(self):
+        ids = [b"9", b"1", b"2", b"3", b"7", b"10"]
+        self.assertEqual(google_alerts_fetcher.compress_message_set(ids), "1:3,7,9:10")
+
+    def test_fetch_messages_batches_round_trips(self):
+        imap = FakeIMAP({n: f"message {n}".encode() for n in range(1, 251)})
+        ids = [str(n).encode() for n in range(1, 251)]
+        fetched = list(google_alerts_fetcher.fetch_messages(imap, ids, batch_size=100))
+
+        self.assertEqual(imap.fetch_calls, ["1:100", "101:200", "201:250"])
+        self.assertEqual(len(fetched), 250)
+        self.assertEqual(fetched[41], ("42", {"RFC822": b"message 42"}))
+
+class TestBodyStructure(unittest.TestCase):
+    """Tests for fetching only the HTML part of alert emails."""
+
+    HEADER = b"Date: Mon, 10 Mar 2025 08:00:00 +0000\r\nSubject: Google Alert - CRISPR\r\n\r\n"
+    STRUCTURE = (
+        '1 (BODYSTRUCTURE (("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "QUOTED-PRINTABLE" 120 4 NIL NIL NIL)'
+        '("TEXT" "HTML" ("CHARSET" "ISO-8859-1") NIL NIL "BASE64" 400 6 NIL NIL NIL) "ALTERNATIVE" ("BOUNDARY" "xyz") NIL NIL)'
+        ' BODY[HEADER.FIELDS (DATE SUBJECT)] {%d}'
+    )
+
+    def test_parse_fetch_response_and_find_html_part(self):
+        data = [((self.STRUCTURE % len(self.HEADER)).encode(), self.HEADER), b")"]
+        fields = imap_utils.parse_fetch_response(data)["1"]
+
+        self.assertEqual(fields["BODY[HEADER.FIELDS (DATE SUBJECT)]"], self.HEADER)
+        self.assertEqual(imap_utils.find_html_part(fields["BODYSTRUCTURE"]), ("2", "base64", "ISO-8859-1"))
+
+    def test_decode_body_part_uses_declared_charset(self):
+        payload = base64.b64encode("Caf\u00e9".encode("latin-1"))
+        self.assertEqual(imap_utils.decode_body_part(payload, "base64", "ISO-8859-1"), "Caf\u00e9")
+
+    def test_fetch_alert_emails_peeks_html_section_only(self):
+        html = base64.b64encode(HTML_BODY.encode("latin-1"))
+
+        class StructureIMAP:
+            queries = []
+
+            def fetch(inner, message_set, query):
+                inner.queries.append(query)
+                if query.startswith("(BODYSTRUCTURE"):
+                    return "OK", [((self.STRUCTURE % len(self.HEADER)).encode(), self.HEADER), b")"]
+                return "OK", [(b"1 (BODY[2] {%d}" % len(html), html), b")"]
+
+        imap = StructureIMAP()
+        emails = google_alerts_fetcher.fetch_alert_emails(imap, [b"1"])
+        results = google_alerts_fetcher.parse_alert_emails(emails, datetime(2025, 3, 1))
+
+        self.assertEqual(imap.queries[1], "(BODY.PEEK[2])")
+        num, processed, articles = results[0]
+        self.assertTrue(processed)
+        self.assertEqual(articles[0]["source"], "Google Alerts: CRISPR")
+        self.assertIn("Caf\u00e9", articles[0]["summary"])
+
+class FakeMailbox:
+    """An IMAP connection over a fixed set of alert emails keyed by UID."""
+
+    capabilities = ("IMAP4REV1", "X-GM-EXT-1")
+
+    def __init__(self, uids, uidvalidity=7, links=None, delay=0, fail_uids=()):
+        self.uids = uids
+        self.fail_uids = set(fail_uids)  # Body FETCHes including these UIDs are refused
+        self.uidvalidity = uidvalidity
+        self.links = links or {}
+        self.delay = delay
+        self.searches = []
+        self.stores = []
+
+    def login(self, user, password):
+        time.sleep(self.delay)
+        return "OK", [b"LOGIN completed"]
+
+    def select(self, mailbox):
+        return "OK", [str(len(self.uids)).encode()]
+
+    def response(self, code):
+        return code, [str(self.uidvalidity).encode()]
+
+    def logout(self):
+        return "BYE", []
+
+    def uid(self, command, *args):
+        if command == "SEARCH":
+            criteria = args[1]
+            self.searches.append(criteria)
+            if criteria.startswith("(UID "):
+                low = int(criteria[5:].split(":", 1)[0])
+                # Like real servers, "n:*" still matches the newest message
+                found = [u for u in self.uids if u >= low] or self.uids[-1:]
+            else:
+                found = self.uids
+            return "OK", [" ".join(map(str, found)).encode()]
+        if command == "STORE":
+            self.stores.append(args)
+            return "OK", []
+        message_set, query = args
+        if not query.startswith("(BODYSTRUCTURE") and self.fail_uids & set(map(int, re.split("[,:]", message_set))):
+            return "NO", [b"FETCH failed"]
+        data = []
+        for part in message_set.split(","):
+            start, _, end = part.partition(":")
+            for uid in range(int(start), int(end or start) + 1):
+                if query.startswith("(BODYSTRUCTURE"):
+                    header = TestBodyStructure.HEADER
+                    head = (TestBodyStructure.STRUCTURE % len(header)).replace("1 (", f"{uid} (UID {uid} ", 1)
+                    data.extend([(head.encode(), header), b")"])
+                else:
+                    link = self.links.get(uid, f"https://example.com/crispr-{uid}")
+                    body = base64.b64encode(HTML_BODY.replace("https://example.com/crispr", link).encode("latin-1"))
+                    data.extend([(f"{uid} (UID {uid} BODY[2] {{{len(body)}}}".encode(), body), b")"])
+        return "OK", data
+
+class TestUIDSync(unittest.TestCase):
+    """Tests for UID high-water-mark syncing."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_state_file = google_alerts_fetcher.SYNC_STATE_FILE
+        self.original_imap = google_alerts_fetcher.imaplib.IMAP4_SSL
+        google_alerts_fetcher.SYNC_STATE_FILE = os.path.join(self.tmp.name, "state.json")
+        os.environ.update({"EMAIL": "alerts@example.com", "APP_PASSWORD": "secret", "DEBUG_FETCH": "false"})
+        config.reload_config()
+
+    def tearDown(self):
+        google_alerts_fetcher.SYNC_STATE_FILE = self.original_state_file
+        google_alerts_fetcher.imaplib.IMAP4_SSL = self.original_imap
+        google_alerts_fetcher._pending_sync_state.clear()
+        self.tmp.cleanup()
+
+    def run_fetch(self, mailbox):
+        google_alerts_fetcher.imaplib.IMAP4_SSL = lambda host, port: mailbox
+        return google_alerts_fetcher.fetch_google_alerts(datetime(2025, 3, 1))
+
+    def test_resumes_from_saved_high_water_mark(self):
+        first = FakeMailbox([3, 4, 5])
+        self.assertEqual(len(self.run_fetch(first)), 3)
+        self.assertTrue(first.searches[0].startswith("(SINCE"))
+        self.assertEqual(first.stores, [("3:5", "+X-GM-LABELS", '("Processed Alerts")')])
+        google_alerts_fetcher.save_alert_sync_state()
+
+        second = FakeMailbox([3, 4, 5, 6])
+        self.assertEqual(len(self.run_fetch(second)), 1)
+        self.assertTrue(second.searches[0].startswith("(UID 6:*"))
+
+    def test_unsaved_run_is_fetched_again(self):
+        self.run_fetch(FakeMailbox([3, 4]))
+        google_alerts_fetcher._pending_sync_state.clear()
+
+        retry = FakeMailbox([3, 4])
+        self.assertEqual(len(self.run_fetch(retry)), 2)
+
+    def test_failed_batch_stops_the_mark_below_it(self):
+        fetch_in_pairs = partial(imap_utils.fetch_messages, batch_size=2)
+        with mock.patch("google_alerts_fetcher.fetch_messages", fetch_in_pairs):
+            self.assertEqual(len(self.run_fetch(FakeMailbox([3, 4, 5, 6], fail_uids=[5]))), 2)
+        google_alerts_fetcher.save_alert_sync_state()
+
+        retry = FakeMailbox([3, 4, 5, 6])
+        self.assertEqual(len(self.run_fetch(retry)), 2)
+        self.assertTrue(retry.searches[0].startswith("(UID 5:*"))
+
+    def test_nothing_new_above_mark(self):
+        self.run_fetch(FakeMailbox([3, 4]))
+        google_alerts_fetcher.save_alert_sync_state()
+
+        again = FakeMailbox([3, 4])
+        self.assertEqual(self.run_fetch(again), [])
+        self.assertEqual(again.stores, [])
+
+    def test_uidvalidity_change_falls_back_to_date_search(self):
+        self.run_fetch(FakeMailbox([3, 4]))
+        google_alerts_fetcher.save_alert_sync_state()
+
+        rebuilt = FakeMailbox([1, 2], uidvalidity=8)
+        self.assertEqual(len(self.run_fetch(rebuilt)), 2)
+        self.assertTrue(rebuilt.searches[0].startswith("(SINCE"))
+
+class TestMultipleSources(unittest.TestCase):
+    """Tests for reading several mailboxes in parallel."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_state_file = google_alerts_fetcher.SYNC_STATE_FILE
+        self.original_imap = google_alerts_fetcher.imaplib.IMAP4_SSL
+        google_alerts_fetcher.SYNC_STATE_FILE = os.path.join(self.tmp.name, "state.json")
+        os.environ.update({"EMAIL": "alerts@example.com", "APP_PASSWORD": "secret", "DEBUG_FETCH": "false"})
+        config.reload_config()
+
+    def tearDown(self):
+        google_alerts_fetcher.SYNC_STATE_FILE = self.original_state_file
+        google_alerts_fetcher.imaplib.IMAP4_SSL = self.original_imap
+        google_alerts_fetcher._pending_sync_state.clear()
+        os.environ.pop("ALERT_SOURCES", None)
+        config.reload_config()
+        self.tmp.cleanup()
+
+    def test_alert_sources_fall_back_to_email_inbox(self):
+        sources = google_alerts_fetcher.get_alert_sources()
+        self.assertEqual([(s["email"], s["mailbox"]) for s in sources], [("alerts@example.com", "inbox")])
+
+        os.environ["ALERT_SOURCES"] = (
+            '[{"mailboxes": ["inbox", "Alerts/Biotech"]},'
+            ' {"email": "lab@example.com", "app_password": "pw", "host": "imap.lab"}]'
+        )
+        config.reload_config()
+        sources = google_alerts_fetcher.get_alert_sources()
+        self.assertEqual(
+            [(s["email"], s["mailbox"], s["host"]) for s in sources],
+            [("alerts@example.com", "inbox", None), ("alerts@example.com", "Alerts/Biotech", None),
+             ("lab@example.com", "inbox", "imap.lab")],
+        )
+
+    def test_sources_fetched_in_parallel_and_deduplicated(self):
+        mailboxes = {
+            "one": FakeMailbox([1, 2], delay=0.3, links={2: "https://example.com/shared"}),
+            "two": FakeMailbox([5], delay=0.3, links={5: "https://example.com/shared"}),
+            "three": FakeMailbox([9], delay=0.3),
+        }
+        google_alerts_fetcher.imaplib.IMAP4_SSL = lambda host, port: mailboxes[host]
+        sources = [{"email": "alerts@example.com", "app_password": "secret", "mailbox": host, "host": host}
+                   for host in mailboxes]
+
+        start = time.monotonic()
+        articles = google_alerts_fetcher.fetch_google_alerts(datetime(2025, 3, 1), sources)
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual(sorted(a["link"] for a in articles), [
+            "https://example.com/crispr-1", "https://example.com/crispr-9", "https://example.com/shared",
+        ])
+        self.assertEqual(sorted(google_alerts_fetcher._pending_sync_state), [
+            "alerts@example.com/one", "alerts@example.com/three", "alerts@example.com/two",
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
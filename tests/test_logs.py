@@ -0,0 +1,63 @@
+"""
+Tests for the queued, structured logging setup.
+"""
+
+import unittest
+import os
+import sys
+import json
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import logs
+
+class TestLogs(unittest.TestCase):
+    """Tests for sampling, JSON records and the background writer."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = logging.getLogger()
+        self.saved = list(root.handlers), root.level
+
+    def tearDown(self):
+        logs.stop_logging()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handlers, level = self.saved
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+        self.tmp.cleanup()
+
+    def test_sampler_passes_first_then_one_in_every(self):
+        sampler = logs.Sampler(first=3, every=5)
+        records = [logging.makeLogRecord({"msg": str(n), **logs.sampled("entry")}) for n in range(20)]
+        passed = [record for record in records if sampler.filter(record)]
+
+        self.assertEqual([record.msg for record in passed], ["0", "1", "2", "7", "12", "17"])
+        self.assertEqual(passed[3].skipped, 4)
+        self.assertTrue(sampler.filter(logging.makeLogRecord({"msg": "not sampled"})))
+        self.assertEqual(sampler.counts(), {"entry": 20})
+
+    def test_setup_writes_json_lines_from_the_listener(self):
+        path = os.path.join(self.tmp.name, "run.log")
+        logs.setup_logging(log_file=path)
+        logging.info("Fetched %d articles from %s", 3, "STAT", extra={"feed": "STAT"})
+        try:
+            raise ValueError("bad feed")
+        except ValueError:
+            logging.exception("Feed failed")
+        logs.stop_logging()
+
+        with open(path) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(entries[0]["msg"], "Fetched 3 articles from STAT")
+        self.assertEqual(entries[0]["feed"], "STAT")
+        self.assertEqual(entries[0]["level"], "INFO")
+        self.assertIn("ValueError: bad feed", entries[1]["exc"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Tests for run metrics and their exports.
+"""
+
+import unittest
+import os
+import sys
+import json
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pipeline
+from metrics import Metrics, RunHistory, export_run, get_metrics
+
+class TestMetrics(unittest.TestCase):
+    """Tests for counters, timings, the Prometheus textfile and run history."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def export(self, metrics, run_id):
+        return export_run(run_id, "app", metrics=metrics,
+                          prometheus_file=os.path.join(self.tmp.name, "biotech_rss.prom"),
+                          report_file=os.path.join(self.tmp.name, "last_run.json"),
+                          history_file=os.path.join(self.tmp.name, "history.sqlite3"))
+
+    def test_counters_timings_and_prometheus(self):
+        metrics = Metrics()
+        metrics.inc("cache_requests", cache="pdf_link", result="hit")
+        metrics.inc("cache_requests", 3, cache="pdf_link", result="miss")
+        metrics.observe("feed_fetch", 0.5, feed='Say "hi"')
+        metrics.observe("feed_fetch", 1.5, feed='Say "hi"')
+
+        self.assertEqual(metrics.counter("cache_requests", result="miss", cache="pdf_link"), 3)
+        self.assertEqual(metrics.timing("feed_fetch", feed='Say "hi"'), (2, 2.0, 1.5))
+        text = metrics.prometheus()
+        self.assertIn("# TYPE biotech_rss_cache_requests_total counter\n", text)
+        self.assertEqual(text.count("# TYPE biotech_rss_cache_requests_total"), 1)
+        self.assertIn('biotech_rss_cache_requests_total{cache="pdf_link",result="miss"} 3\n', text)
+        self.assertIn('biotech_rss_feed_fetch_seconds_count{feed="Say \\"hi\\""} 2\n', text)
+        self.assertIn('biotech_rss_feed_fetch_seconds_max{feed="Say \\"hi\\""} 1.5\n', text)
+        self.assertEqual(metrics.report()["cache_hit_rates"], {"pdf_link": 0.25})
+
+    def test_export_writes_files_and_history(self):
+        for run_no, requests in enumerate((10, 12, 30)):
+            metrics = Metrics()
+            metrics.started = datetime(2025, 3, run_no + 1).timestamp()
+            metrics.inc("notion_requests", requests, endpoint="pages")
+            self.export(metrics, f"run-{run_no}")
+
+        with open(os.path.join(self.tmp.name, "last_run.json")) as f:
+            self.assertEqual(json.load(f)["run_id"], "run-2")
+        with open(os.path.join(self.tmp.name, "biotech_rss.prom")) as f:
+            self.assertIn('biotech_rss_notion_requests_total{endpoint="pages"} 30', f.read())
+        history = RunHistory(os.path.join(self.tmp.name, "history.sqlite3"))
+        try:
+            self.assertEqual([value for _, value in history.trend("notion_requests")], [10, 12, 30])
+            self.assertEqual(len(history.trend("notion_requests", {"endpoint": "pages"}, limit=2)), 2)
+        finally:
+            history.close()
+
+    def test_pipeline_counts_articles_per_stage(self):
+        metrics = get_metrics()
+        metrics.reset()
+        sources = [lambda: [{"title": f"Paper {n}", "link": f"https://a.org/{n}", "relevancy": n / 10,
+                             "source_type": "RSS Feed", "published_date": datetime.now()} for n in range(5)]]
+        pipeline.Pipeline(sources, lambda article, profile: (True, None), select=pipeline.top_relevant(2)).run()
+
+        self.assertEqual(metrics.counter("pipeline_articles", stage="fetch"), 5)
+        self.assertEqual(metrics.counter("pipeline_articles", stage="select", profile="default"), 2)
+        self.assertEqual(metrics.counter("pipeline_articles", stage="write", profile="default"), 2)
+        self.assertEqual(metrics.timing("stage", stage="write")[0], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests for the Article Age refresher.
+"""
+
+import unittest
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import notion_refresher
+
+def make_page(page_id, published, age):
+    """Build a minimal Notion page with the properties the refresher reads."""
+    return {
+        "id": page_id,
+        "properties": {
+            "Publication Date": {"date": {"start": published}},
+            "Article Age": {"number": age},
+        },
+    }
+
+class FakeWriter:
+    """Serve canned query results and record updates."""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.queries = []
+        self.updates = []
+
+    def query_database(self, database_id, **kwargs):
+        self.queries.append(kwargs)
+        index = len(self.queries) - 1
+        has_more = index + 1 < len(self.batches)
+        return {"results": self.batches[index], "has_more": has_more, "next_cursor": f"c{index + 1}" if has_more else None}
+
+    def update_page(self, page_id, properties):
+        self.updates.append((page_id, properties))
+
+class TestArticleAgeRefresh(unittest.TestCase):
+    """Tests for refresh_article_ages."""
+
+    def test_only_changed_pages_are_updated(self):
+        now = datetime(2025, 3, 10, 12, 0)
+        writer = FakeWriter([
+            [make_page("a", "2025-03-05T08:00:00", 5), make_page("b", "2025-03-01T08:00:00", 3)],
+            [make_page("c", "2025-03-09", 0)],
+        ])
+        stats = notion_refresher.refresh_article_ages(writer, "db", now=now)
+
+        self.assertEqual(writer.updates, [
+            ("b", {"Article Age": {"number": 9}}),
+            ("c", {"Article Age": {"number": 1}}),
+        ])
+        self.assertEqual(writer.queries[1]["start_cursor"], "c1")
+        self.assertEqual(stats["scanned"], 3)
+        self.assertEqual(stats["unchanged"], 1)
+        self.assertIsNone(stats["next_cursor"])
+
+    def test_exhausted_budget_returns_resume_cursor(self):
+        writer = FakeWriter([[make_page("a", "2025-03-01", 0)]])
+        stats = notion_refresher.refresh_article_ages(writer, "db", time_budget=0, start_cursor="c7")
+
+        self.assertEqual(writer.queries, [])
+        self.assertEqual(stats["next_cursor"], "c7")
+
+    def test_timezone_aware_dates_are_converted(self):
+        parsed = notion_refresher.parse_notion_date("2025-03-05T08:00:00.000Z")
+        self.assertIsNone(parsed.tzinfo)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Tests for streaming PDF downloads against a local HTTP server.
+"""
+
+import unittest
+import os
+import sys
+import hashlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pdf_store
+import pdf_download
+
+PDF_BYTES = b"%PDF-1.7\n" + bytes(range(256)) * 800 + b"\n%%EOF\n"
+
+class PDFHandler(BaseHTTPRequestHandler):
+    """Serve /paper.pdf with Range support; /flaky.pdf drops the first response halfway."""
+
+    ranges = []
+    flaky_drops = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/page.html":
+            body = b"<html>Sign in to read</html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        requested = self.headers.get("Range")
+        type(self).ranges.append(requested)
+        start = int(requested[6:].rstrip("-")) if requested else 0
+        if start >= len(PDF_BYTES):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(PDF_BYTES)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = PDF_BYTES[start:]
+        self.send_response(206 if requested else 200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        if requested:
+            self.send_header("Content-Range", f"bytes {start}-{len(PDF_BYTES) - 1}/{len(PDF_BYTES)}")
+        self.end_headers()
+
+        if self.path == "/flaky.pdf" and type(self).flaky_drops == 0:
+            type(self).flaky_drops += 1
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+class TestPDFDownload(unittest.TestCase):
+    """Tests for the streaming downloader."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), PDFHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = pdf_store.PDFStore(self.tmp.name)
+        PDFHandler.ranges = []
+        PDFHandler.flaky_drops = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_downloads_into_store(self):
+        path = pdf_download.download_pdf_file(f"{self.base}/paper.pdf", "Paper", store=self.store)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), PDF_BYTES)
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, "partial")), [])
+
+    def test_resumes_interrupted_download_with_range(self):
+        path = pdf_download.download_pdf_file(f"{self.base}/flaky.pdf", "Paper", store=self.store)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), PDF_BYTES)
+        self.assertIsNone(PDFHandler.ranges[0])
+        self.assertTrue(PDFHandler.ranges[1].startswith("bytes="))
+        self.assertGreater(int(PDFHandler.ranges[1][6:].rstrip("-")), 0)
+
+    def leave_partial(self, url, content):
+        """A partial file as an earlier, interrupted run leaves it."""
+        with open(self.store.partial_path(url), "wb") as f:
+            f.write(content)
+
+    def test_resumes_partial_from_earlier_run_and_hashes_it(self):
+        url = f"{self.base}/paper.pdf"
+        self.leave_partial(url, PDF_BYTES[:1000])
+        path = pdf_download.download_pdf_file(url, "Paper", store=self.store)
+
+        self.assertEqual(PDFHandler.ranges, ["bytes=1000-"])
+        self.assertEqual(path, self.store.object_path(hashlib.sha256(PDF_BYTES).hexdigest()))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), PDF_BYTES)
+
+    def test_oversized_partial_is_discarded_on_416(self):
+        url = f"{self.base}/paper.pdf"
+        self.leave_partial(url, PDF_BYTES + b"stale trailing bytes")
+        path = pdf_download.download_pdf_file(url, "Paper", store=self.store)
+
+        self.assertEqual(PDFHandler.ranges, [f"bytes={len(PDF_BYTES) + 20}-", None])
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), PDF_BYTES)
+
+    def test_rejects_oversized_and_non_pdf_responses(self):
+        with self.assertRaises(pdf_download.PDFDownloadError):
+            pdf_download.download_pdf_file(f"{self.base}/paper.pdf", "Paper", store=self.store, max_bytes=1000)
+        with self.assertRaises(pdf_download.PDFDownloadError):
+            pdf_download.download_pdf_file(f"{self.base}/page.html", "Paper", store=self.store)
+        self.assertEqual(self.store.entries(), [])
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, "partial")), [])
+
+if __name__ == '__main__':
+    unittest.main()
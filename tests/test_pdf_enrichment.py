@@ -0,0 +1,118 @@
+"""
+Tests for background PDF enrichment.
+"""
+
+import unittest
+import os
+import sys
+import time
+import threading
+from datetime import datetime
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pdf_enrichment
+import pipeline
+import profiles
+import utils
+from article import make_article
+
+class FakeWriter:
+    """Record page patches."""
+
+    def __init__(self):
+        self.updates = []
+        self.appends = []
+        self.pages = []
+
+    def query_database(self, database_id, filter):
+        return {"results": []}
+
+    def create_page(self, parent, properties, children):
+        self.pages.append(parent["database_id"])
+        return {"id": f"page-{len(self.pages)}", "url": None}
+
+    def update_page(self, page_id, properties):
+        self.updates.append((page_id, properties))
+
+    def append_blocks(self, block_id, children):
+        self.appends.append((block_id, children))
+
+class TestPDFEnricher(unittest.TestCase):
+    """Tests for the PDF enrichment worker pool."""
+
+    def test_patches_page_with_pdf_details(self):
+        writer = FakeWriter()
+        enricher = pdf_enrichment.PDFEnricher(writer, max_workers=2)
+        info = {"title": "Base editing", "link": "https://www.nature.com/articles/x", "pdf_path": None}
+
+        with mock.patch("utils.fetch_pdf_link", return_value="https://www.nature.com/articles/x.pdf"), \
+             mock.patch("utils.download_pdf", return_value="PDFs/x.pdf"), \
+             mock.patch("utils.extract_pdf_text", return_value="Abstract text"), \
+             mock.patch("pdf_enrichment.record_pdf") as record_pdf, \
+             mock.patch("pdf_enrichment.index_pdf") as index_pdf:
+            enricher.submit("page-1", info)
+            self.assertEqual(enricher.wait(), 1)
+
+        page_id, properties = writer.updates[0]
+        self.assertEqual(page_id, "page-1")
+        self.assertEqual(properties["PDF Link"], {"url": "https://www.nature.com/articles/x.pdf"})
+        self.assertEqual(properties["PDF Insights"]["rich_text"][0]["text"]["content"], "Abstract text")
+        self.assertEqual(writer.appends[0][0], "page-1")
+        self.assertEqual(info["pdf_path"], "PDFs/x.pdf")
+        record_pdf.assert_called_once_with(info, "PDFs/x.pdf")
+        index_pdf.assert_called_once_with("https://www.nature.com/articles/x", "PDFs/x.pdf")
+
+    def test_limits_concurrent_requests_per_host(self):
+        active = {}
+        peak = {}
+        lock = threading.Lock()
+
+        def slow_fetch(url):
+            host = url.split("/")[2]
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+            time.sleep(0.05)
+            with lock:
+                active[host] -= 1
+            return None
+
+        enricher = pdf_enrichment.PDFEnricher(FakeWriter(), max_workers=8, per_host=2)
+        with mock.patch("utils.fetch_pdf_link", side_effect=slow_fetch):
+            for i in range(6):
+                enricher.submit(f"n{i}", {"title": "t", "link": f"https://www.nature.com/articles/{i}"})
+                enricher.submit(f"c{i}", {"title": "t", "link": f"https://www.cell.com/fulltext/{i}"})
+            self.assertEqual(enricher.wait(), 0)
+
+        self.assertEqual(peak, {"www.nature.com": 2, "www.cell.com": 2})
+
+    def test_article_in_two_profiles_fetches_its_pdf_once(self):
+        writer = FakeWriter()
+        enricher = pdf_enrichment.PDFEnricher(writer, max_workers=2)
+        article = make_article("Prime editing in vivo", "https://www.nature.com/articles/y", relevancy=0.9,
+                               source="Nature Biotechnology", source_type="RSS Feed", published_date=datetime.now())
+        crispr = profiles.Profile("crispr", "crispr-db")
+        delivery = profiles.Profile("delivery", "delivery-db")
+
+        def write(article, profile):
+            return utils.add_to_notion(article, None, profile.database_id)
+
+        with mock.patch("notion_writer.get_notion_writer", return_value=writer), \
+             mock.patch("pdf_enrichment.get_pdf_enricher", return_value=enricher), \
+             mock.patch("search_index.index_article"), \
+             mock.patch("utils.fetch_pdf_link", return_value="https://www.nature.com/articles/y.pdf"), \
+             mock.patch("utils.download_pdf", return_value="PDFs/y.pdf") as download_pdf, \
+             mock.patch("utils.extract_pdf_text", return_value="Abstract text"), \
+             mock.patch("pdf_enrichment.record_pdf"), \
+             mock.patch("pdf_enrichment.index_pdf"):
+            pipeline.Pipeline([lambda: [article]], write, profiles=[crispr, delivery]).run()
+            self.assertEqual(enricher.wait(), 2)
+
+        self.assertEqual(sorted(writer.pages), ["crispr-db", "delivery-db"])
+        download_pdf.assert_called_once()
+        self.assertEqual(sorted(page_id for page_id, _ in writer.updates), ["page-1", "page-2"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Tests for the incremental static PDF index.
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from datetime import datetime
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pdf_index
+
+class TestPDFIndex(unittest.TestCase):
+    """Tests for catalog-driven index generation."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, n):
+        info = {"title": f"Paper <{n}>", "link": f"https://a.org/{n}", "source": "Cell",
+                "published_date": datetime(2025, 3, n), "notion_url": f"https://notion.so/{n}"}
+        pdf_index.record_pdf(info, os.path.join(self.root, "objects", "ab", f"{n}.pdf"), root=self.root)
+
+    def build(self):
+        written = []
+        original = pdf_index._write_atomic
+
+        def spy(path, text):
+            written.append(os.path.relpath(path, self.root))
+            original(path, text)
+
+        with mock.patch.object(pdf_index, "PAGE_SIZE", 2), mock.patch.object(pdf_index, "_write_atomic", spy):
+            index_path = pdf_index.build_pdf_index(self.root)
+        return index_path, written
+
+    def test_only_shards_with_new_pdfs_are_rewritten(self):
+        self.assertIsNone(self.build()[0])
+        for n in (1, 2, 3):
+            self.record(n)
+        index_path, written = self.build()
+        data = pdf_index.DATA_DIR_NAME
+        self.assertIn(os.path.join(data, "shard-00000.js"), written)
+        self.assertIn(os.path.join(data, "shard-00001.js"), written)
+        self.assertIn(os.path.join(data, "terms-pa.js"), written)
+        self.assertIn("index.html", written)
+
+        self.record(4)
+        _, written = self.build()
+        self.assertNotIn(os.path.join(data, "shard-00000.js"), written)
+        self.assertIn(os.path.join(data, "shard-00001.js"), written)
+        self.assertNotIn("index.html", written)
+
+        # Nothing new: nothing is rewritten
+        self.assertEqual(self.build()[1], [])
+
+        rows = pdf_index._read_script(os.path.join(self.root, data, "shard-00001.js"))
+        self.assertEqual([row[0] for row in rows], ["Paper <3>", "Paper <4>"])
+        self.assertEqual(rows[1][3], "objects/ab/4.pdf")
+        meta = pdf_index._read_script(os.path.join(self.root, data, "meta.js"))
+        self.assertEqual((meta["total"], meta["pageCounts"]), (4, [2, 2]))
+        with open(index_path) as f:
+            self.assertIn("index-data/", f.read())
+
+    def test_term_index_is_delta_encoded(self):
+        for n in (1, 2, 3, 4):
+            self.record(n)
+        self.build()
+        postings = pdf_index._read_script(os.path.join(self.root, pdf_index.DATA_DIR_NAME, "terms-pa.js"))
+        self.assertEqual(postings["paper"], [0, 1, 1, 1])
+        cell = pdf_index._read_script(os.path.join(self.root, pdf_index.DATA_DIR_NAME, "terms-ce.js"))
+        self.assertEqual(cell["cell"], [0, 1, 1, 1])
+        self.assertEqual(pdf_index.tokenize("The Cas9 of a cell"), {"cas9", "cell"})
+
+    def test_build_stopped_before_saving_state_is_redone_without_duplicates(self):
+        self.record(1)
+        self.build()
+        for n in (2, 3):
+            self.record(n)
+        original = pdf_index._write_atomic
+
+        def crash_on_state(path, text):
+            if path.endswith(pdf_index.STATE_NAME):
+                raise OSError("disk full")
+            original(path, text)
+
+        with mock.patch.object(pdf_index, "_write_atomic", crash_on_state):
+            with self.assertRaises(OSError):
+                self.build()
+        self.build()
+
+        data = os.path.join(self.root, pdf_index.DATA_DIR_NAME)
+        self.assertEqual([row[0] for row in pdf_index._read_script(os.path.join(data, "shard-00000.js"))],
+                         ["Paper <1>", "Paper <2>"])
+        self.assertEqual([row[0] for row in pdf_index._read_script(os.path.join(data, "shard-00001.js"))],
+                         ["Paper <3>"])
+        self.assertEqual(pdf_index._read_script(os.path.join(data, "terms-pa.js"))["paper"], [0, 1, 1])
+        self.assertEqual(pdf_index._read_script(os.path.join(data, "meta.js"))["total"], 3)
+
+    def test_partial_catalog_line_waits_for_next_build(self):
+        self.record(1)
+        with open(os.path.join(self.root, pdf_index.CATALOG_NAME), "a") as f:
+            f.write('{"title": "half')
+        self.build()
+        with open(os.path.join(self.root, pdf_index.STATE_NAME)) as f:
+            self.assertIn('"page_counts": [1]', f.read())
+
+if __name__ == '__main__':
+    unittest.main()
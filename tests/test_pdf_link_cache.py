@@ -0,0 +1,68 @@
+"""
+Tests for the landing page to PDF URL cache.
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils
+import pdf_link_cache
+
+class TestPDFLinkCache(unittest.TestCase):
+    """Tests for cached PDF link resolution."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "links.sqlite3")
+        self.cache = pdf_link_cache.PDFLinkCache(self.path, max_entries=3, negative_ttl=60)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_positive_and_negative_entries(self):
+        self.cache.store("https://a.org/1", "https://a.org/1.pdf")
+        self.cache.store("https://a.org/2", None)
+        self.assertEqual(self.cache.lookup("https://a.org/1"), "https://a.org/1.pdf")
+        self.assertIsNone(self.cache.lookup("https://a.org/2"))
+        self.assertIs(self.cache.lookup("https://a.org/3"), pdf_link_cache.MISS)
+
+        # "No PDF" expires after the negative TTL; found links do not
+        with mock.patch("pdf_link_cache.time.time", return_value=pdf_link_cache.time.time() + 120):
+            self.assertIs(self.cache.lookup("https://a.org/2"), pdf_link_cache.MISS)
+            self.assertEqual(self.cache.lookup("https://a.org/1"), "https://a.org/1.pdf")
+
+    def test_evicts_least_recently_used(self):
+        for n in range(3):
+            self.cache.store(f"https://a.org/{n}", f"https://a.org/{n}.pdf")
+        self.cache.lookup("https://a.org/0")
+        self.cache.store("https://a.org/3", "https://a.org/3.pdf")
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertIs(self.cache.lookup("https://a.org/1"), pdf_link_cache.MISS)
+        self.assertEqual(self.cache.lookup("https://a.org/0"), "https://a.org/0.pdf")
+
+    def test_memory_tier_answers_without_database(self):
+        self.cache.enable_memory_tier(10)
+        self.cache.store("https://a.org/1", "https://a.org/1.pdf")
+        self.cache._db.execute("DELETE FROM pdf_links")
+        self.assertEqual(self.cache.lookup("https://a.org/1"), "https://a.org/1.pdf")
+
+    def test_fetch_pdf_link_caches_results_but_not_errors(self):
+        with mock.patch("pdf_link_cache.get_pdf_link_cache", return_value=self.cache), \
+             mock.patch("utils.find_pdf_link", side_effect=[None, requests.ConnectionError("down")]) as find:
+            self.assertIsNone(utils.fetch_pdf_link("https://a.org/none"))
+            self.assertIsNone(utils.fetch_pdf_link("https://a.org/none"))
+            self.assertIsNone(utils.fetch_pdf_link("https://a.org/down"))
+        self.assertEqual(find.call_count, 2)
+        self.assertIs(self.cache.lookup("https://a.org/down"), pdf_link_cache.MISS)
+
+if __name__ == '__main__':
+    unittest.main()
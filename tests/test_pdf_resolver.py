@@ -0,0 +1,94 @@
+"""
+Tests for streaming PDF link resolution.
+"""
+
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pdf_resolver
+
+class FakeResponse:
+    """A streamed response that records how many chunks were read."""
+
+    def __init__(self, url, chunks):
+        self.url = url
+        self.chunks = chunks
+        self.read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, url, **kwargs):
+        return self.response
+
+def page(head, body):
+    return [f"<html><head>{head}</head>".encode(), f"<body>{body}".encode(), b"<p>" + b"filler " * 2000 + b"</p>", b"</body></html>"]
+
+class TestResolvePDFLink(unittest.TestCase):
+    """Tests for metadata, publisher-rule and generic resolution."""
+
+    def resolve(self, url, chunks):
+        response = FakeResponse(url, chunks)
+        return pdf_resolver.resolve_pdf_link(url, session=FakeSession(response)), response
+
+    def test_citation_meta_stops_at_head(self):
+        link, response = self.resolve(
+            "https://journals.example.org/article/1",
+            page('<meta name="citation_pdf_url" content="/article/1.pdf">', '<a href="/other.pdf">PDF</a>'),
+        )
+        self.assertEqual(link, "https://journals.example.org/article/1.pdf")
+        self.assertEqual(response.read, 1)
+
+    def test_pdf_alternate_link(self):
+        link, _ = self.resolve(
+            "https://www.biorxiv.org/content/1",
+            page('<link rel="alternate" type="application/pdf" href="https://www.biorxiv.org/content/1.full.pdf">', ""),
+        )
+        self.assertEqual(link, "https://www.biorxiv.org/content/1.full.pdf")
+
+    def test_publisher_rule_fallback(self):
+        link, response = self.resolve(
+            "https://www.nature.com/articles/s41587-025-0001",
+            page("<title>Nature</title>",
+                 '<a href="/articles/other.pdf">Related</a>'
+                 '<a data-track-label="Download PDF" href="/articles/s41587-025-0001.pdf">Download PDF</a>'),
+        )
+        self.assertEqual(link, "https://www.nature.com/articles/s41587-025-0001.pdf")
+        self.assertEqual(response.read, 4)
+
+    def test_plos_rule_matches_any_case(self):
+        href = "/plosbiology/article/file?id=10.1371/journal.pbio.0001&type=printable"
+        for label in ("Download PDF", "download pdf", "Download\n   pdf"):
+            link, _ = self.resolve(
+                "https://journals.plos.org/plosbiology/article?id=10.1371/journal.pbio.0001",
+                page("<title>PLOS</title>", f'<a class="btn-multi-primary" href="{href}">{label}</a>'),
+            )
+            self.assertEqual(link, "https://journals.plos.org" + href, label)
+
+    def test_generic_fallback_and_no_pdf(self):
+        link, _ = self.resolve("https://news.example.com/story", page("", '<a href="files/report.pdf">Report</a>'))
+        self.assertEqual(link, "https://news.example.com/files/report.pdf")
+
+        link, _ = self.resolve("https://news.example.com/story", page("", '<a href="/about">About</a>'))
+        self.assertIsNone(link)
+
+if __name__ == '__main__':
+    unittest.main()
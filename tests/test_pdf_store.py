@@ -0,0 +1,73 @@
+"""
+Tests for the content-addressed PDF store.
+"""
+
+import unittest
+import os
+import sys
+import hashlib
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils
+import pdf_store
+
+PDF_BYTES = b"%PDF-1.7\n" + b"x" * 5000 + b"\n%%EOF\n"
+
+def add(store, content, url, title):
+    """Add content to the store the way a finished download does."""
+    tmp_path = store.partial_path(url)
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    return store.add_file(tmp_path, hashlib.sha256(content).hexdigest(), url, title)
+
+class TestPDFStore(unittest.TestCase):
+    """Tests for storing PDFs by SHA-256."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = pdf_store.PDFStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_same_content_is_stored_once(self):
+        first = add(self.store, PDF_BYTES, "https://a.org/x.pdf", "Paper A")
+        second = add(self.store, PDF_BYTES, "https://mirror.org/x.pdf", "Paper A (mirror)")
+
+        digest = hashlib.sha256(PDF_BYTES).hexdigest()
+        self.assertEqual(first, second)
+        self.assertEqual(first, self.store.object_path(digest))
+        self.assertEqual(len(self.store.entries()), 1)
+        self.assertEqual(self.store.entry(digest)["titles"], ["Paper A", "Paper A (mirror)"])
+        leftovers = [name for name in os.listdir(self.tmp.name) if name.endswith((".part", ".tmp"))]
+        self.assertEqual(leftovers + os.listdir(os.path.join(self.tmp.name, "partial")), [])
+
+    def test_manifest_survives_reload(self):
+        path = add(self.store, PDF_BYTES, "https://a.org/x.pdf", "Paper A")
+        reloaded = pdf_store.PDFStore(self.tmp.name)
+        self.assertEqual(reloaded.path_for_url("https://a.org/x.pdf"), path)
+        self.assertIsNone(reloaded.path_for_url("https://a.org/other.pdf"))
+
+    def test_stores_sharing_a_directory_keep_each_others_entries(self):
+        other = pdf_store.PDFStore(self.tmp.name)  # E.g. another sharded worker
+        add(self.store, PDF_BYTES, "https://a.org/x.pdf", "Paper")
+        add(other, PDF_BYTES + b"more", "https://b.org/y.pdf", "Paper")
+
+        reloaded = pdf_store.PDFStore(self.tmp.name)
+        self.assertIsNotNone(reloaded.path_for_url("https://a.org/x.pdf"))
+        self.assertIsNotNone(reloaded.path_for_url("https://b.org/y.pdf"))
+        self.assertIsNotNone(self.store.path_for_url("https://b.org/y.pdf"))
+
+    def test_download_pdf_skips_known_url(self):
+        add(self.store, PDF_BYTES, "https://a.org/x.pdf", "Paper A")
+        with mock.patch("pdf_download.get_pdf_store", return_value=self.store), \
+             mock.patch("pdf_download.requests.get") as get:
+            path = utils.download_pdf("https://a.org/x.pdf", "Paper A")
+        get.assert_not_called()
+        self.assertEqual(path, self.store.path_for_url("https://a.org/x.pdf"))
+
+if __name__ == '__main__':
+    unittest.main()
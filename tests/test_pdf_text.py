@@ -0,0 +1,96 @@
+"""
+Tests for process-isolated PDF text extraction.
+"""
+
+import unittest
+import os
+import sys
+import time
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pdf_text
+
+def make_pdf(text):
+    """Build a one-page PDF that draws text, with a valid xref table."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R"
+        b" /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+class TestPDFTextExtractor(unittest.TestCase):
+    """Tests for extraction, caching and timeouts."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "paper.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(make_pdf("CRISPR base editing in vivo"))
+        self.cache_file = os.path.join(self.tmp.name, "text_cache.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_extracts_once_and_caches_by_hash(self):
+        extractor = pdf_text.PDFTextExtractor(self.cache_file)
+        self.assertEqual(extractor.extract(self.pdf_path), "CRISPR base editing in vivo")
+
+        # A new extractor reads the cache instead of starting a worker
+        reloaded = pdf_text.PDFTextExtractor(self.cache_file)
+        with mock.patch.object(reloaded, "_run_worker", side_effect=AssertionError("parsed again")):
+            self.assertEqual(reloaded.extract(self.pdf_path), "CRISPR base editing in vivo")
+
+    def test_extractors_sharing_a_cache_file_keep_each_others_entries(self):
+        other_path = os.path.join(self.tmp.name, "other.pdf")
+        with open(other_path, "wb") as f:
+            f.write(make_pdf("Senolytics in aged mice"))
+        first = pdf_text.PDFTextExtractor(self.cache_file)
+        second = pdf_text.PDFTextExtractor(self.cache_file)  # E.g. another sharded worker
+        first.extract(self.pdf_path)
+        second.extract(other_path)
+
+        reloaded = pdf_text.PDFTextExtractor(self.cache_file)
+        self.assertEqual(set(reloaded._cache), {pdf_text.pdf_digest(self.pdf_path), pdf_text.pdf_digest(other_path)})
+
+    def test_slow_document_is_killed_after_timeout(self):
+        extractor = pdf_text.PDFTextExtractor(self.cache_file, timeout=0.5)
+        with mock.patch("pdf_text._read_pages", side_effect=lambda *args: time.sleep(30)):
+            start = time.monotonic()
+            self.assertEqual(extractor.extract(self.pdf_path), "")
+            self.assertLess(time.monotonic() - start, 5)
+
+        digest = pdf_text.pdf_digest(self.pdf_path)
+        self.assertEqual(extractor._cache[digest]["status"], "timeout")
+
+    def test_failures_are_retried_up_to_the_limit(self):
+        extractor = pdf_text.PDFTextExtractor(self.cache_file, max_failures=2)
+        with mock.patch.object(extractor, "_run_worker", return_value=("timeout", "no result")) as run:
+            self.assertEqual(extractor.extract(self.pdf_path), "")
+            self.assertEqual(extractor.extract(self.pdf_path), "")
+            self.assertEqual(extractor.extract(self.pdf_path), "")
+        self.assertEqual(run.call_count, 2)
+
+        # A transient failure does not stop a later run from extracting the text
+        retried = pdf_text.PDFTextExtractor(self.cache_file, max_failures=3)
+        self.assertEqual(retried.extract(self.pdf_path), "CRISPR base editing in vivo")
+        self.assertEqual(retried.extract(self.pdf_path), "CRISPR base editing in vivo")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Tests for the staged article pipeline.
+"""
+
+import unittest
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pipeline
+from article import Article
+
+def article(n, relevancy, source_type="RSS Feed", **extra):
+    return dict({"title": f" Paper {n} ", "link": f"https://a.org/{n}", "relevancy": relevancy,
+                 "source_type": source_type, "published_date": datetime.now()}, **extra)
+
+class TestPipeline(unittest.TestCase):
+    """Tests for stage wiring, selection and backpressure."""
+
+    def test_dedups_selects_and_writes(self):
+        written = []
+
+        def write(item, profile):
+            written.append(item)
+            return True, {"link": item.link}
+
+        sources = [
+            lambda: [article(1, 0.1), article(2, 0.9), article(3, 0.5), {"title": "no link"}],
+            lambda: [article(2, 0.9, "Google Alerts"), article(4, 0.7, "Google Alerts")],
+        ]
+        stats = pipeline.Pipeline(sources, write, select=pipeline.top_relevant(3)).run()
+
+        self.assertEqual([item.link for item in written],
+                         ["https://a.org/2", "https://a.org/4", "https://a.org/3"])
+        self.assertEqual(written[0].title, "Paper 2")
+        self.assertEqual(stats["duplicates"], 1)
+        self.assertEqual(stats["selected"], 3)
+        self.assertEqual(sum(stats["fetched"].values()), 6)
+        self.assertEqual(len(stats["added_articles"]), 3)
+
+    def test_recent_selector_skips_old_and_undated_articles(self):
+        select = pipeline.recent_top_relevant(5, timedelta(days=1))
+        old = article(1, 0.9, published_date=datetime.now() - timedelta(days=2))
+        undated = article(2, 0.8, published_date=None)
+        articles = [Article.from_dict(item) for item in (old, undated, article(3, 0.1))]
+        self.assertEqual(select(iter(articles)), articles[2:])
+
+    def test_slow_stage_holds_back_fetching(self):
+        yielded = []
+        release = threading.Event()
+
+        def source():
+            for n in range(100):
+                yielded.append(n)
+                item = article(n, 0.0)
+                del item["relevancy"]  # Make every article go through score
+                yield item
+
+        def score(item):
+            release.wait()
+            return 0.0
+
+        runner = pipeline.Pipeline([source], lambda item, profile: (True, None), score=score, queue_size=1)
+        thread = threading.Thread(target=runner.run)
+        thread.start()
+        release.wait(0.3)
+        self.assertLess(len(yielded), 10)
+
+        release.set()
+        thread.join(5)
+        self.assertEqual(len(yielded), 100)
+        self.assertEqual(runner.stats["selected"], 30)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Tests for per-team profiles sharing one fetch.
+"""
+
+import unittest
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pipeline
+import profiles
+from article import make_article
+
+CONFIG = {"DATABASE_ID": "main-db", "PROFILES": []}
+
+class TestProfiles(unittest.TestCase):
+    """Tests for profile configuration and fan-out."""
+
+    def test_default_profile_writes_to_database_id(self):
+        [profile] = profiles.load_profiles(CONFIG, limit=15)
+        self.assertEqual((profile.name, profile.database_id, profile.limit), ("default", "main-db", 15))
+
+    def test_profiles_from_config(self):
+        config = dict(CONFIG, PROFILES=[
+            {"name": "neuro", "database_id": "neuro-db", "sources": ["STAT News", "Google Alerts"],
+             "keywords": {"Neural": 0.5}, "limit": 5},
+            {"name": "everything"},
+        ])
+        neuro, everything = profiles.load_profiles(config)
+        self.assertEqual(neuro.keywords, (("neural", 0.5),))
+        self.assertEqual(everything.database_id, "main-db")
+
+        feeds = {"STAT News": "https://stat", "Cell": "https://cell"}
+        self.assertEqual(profiles.wanted_feeds([neuro], feeds), {"STAT News": "https://stat"})
+        self.assertEqual(profiles.wanted_feeds([neuro, everything], feeds), feeds)
+        self.assertTrue(profiles.wants_alerts([neuro]))
+        self.assertFalse(profiles.wants_alerts([profiles.Profile("cell", sources=frozenset(["Cell"]))]))
+
+    def test_one_fetch_fans_out_to_each_database(self):
+        calls = []
+
+        def source():
+            calls.append(1)
+            return [
+                make_article("Neural implant trial", "https://a.org/1", source="STAT News", source_type="RSS Feed",
+                             published_date=datetime.now()),
+                make_article("CRISPR screen in cancer", "https://a.org/2", source="Cell", source_type="RSS Feed",
+                             published_date=datetime.now()),
+                make_article("Funding round", "https://a.org/3", source="Cell", source_type="RSS Feed",
+                             published_date=datetime.now()),
+            ]
+
+        neuro = profiles.Profile("neuro", "neuro-db", limit=5, sources=frozenset(["STAT News"]),
+                                 keywords=(("neural", 0.5),))
+        oncology = profiles.Profile("oncology", "onc-db", limit=1, min_relevancy=0.1)
+        written = []
+
+        def write(article, profile):
+            written.append((profile.database_id, article.link, article.relevancy))
+            return True, None
+
+        stats = pipeline.Pipeline([source], write, profiles=[neuro, oncology]).run()
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(sorted(written), [
+            ("neuro-db", "https://a.org/1", 0.5),
+            ("onc-db", "https://a.org/2", 0.7),
+        ])
+        self.assertEqual(stats["profiles"], {"neuro": 1, "oncology": 1})
+
+if __name__ == '__main__':
+    unittest.main()
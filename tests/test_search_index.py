@@ -0,0 +1,61 @@
+"""
+Tests for the full-text search index.
+"""
+
+import unittest
+import os
+import sys
+import time
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import search_index
+
+class TestSearchIndex(unittest.TestCase):
+    """Tests for indexing and ranked search."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = search_index.SearchIndex(os.path.join(self.tmp.name, "search.sqlite3"))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_ranks_title_matches_above_pdf_text(self):
+        self.index.add_article("https://a.org/1", "Trial update", "Phase 2 readout", "STAT News", datetime(2025, 3, 1))
+        self.index.set_pdf_text("https://a.org/1", "pdfs/1.pdf", "d1", "methods used prime editing in mice")
+        self.index.add_article("https://a.org/2", "Prime editing corrects sickle cell", "Base and prime editors", "Nature")
+
+        results = self.index.search("prime editing")
+        self.assertEqual([r["link"] for r in results], ["https://a.org/2", "https://a.org/1"])
+        self.assertEqual(results[1]["pdf_path"], "pdfs/1.pdf")
+        self.assertIn("[prime]", results[1]["snippet"])
+
+    def test_updates_in_place_and_ignores_query_syntax(self):
+        self.index.add_article("https://a.org/1", "CRISPR screen", "old summary")
+        self.index.add_article("https://a.org/1", "CRISPR screen", "new summary about senolytics")
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.search("old summary"), [])
+        self.assertEqual(len(self.index.search("senolytics")), 1)
+        self.assertEqual(self.index.search('AND "( NEAR'), [])
+
+    def test_search_stays_fast_at_scale(self):
+        words = "gene cell protein tumor neuron aging editing therapy trial model".split()
+        with self.index._lock:
+            self.index._db.executemany(
+                "INSERT INTO articles (link, title, summary, pdf_text) VALUES (?, ?, ?, ?)",
+                ((f"https://a.org/{n}", f"{words[n % 10]} study {n}", " ".join(words[(n + k) % 10] for k in range(5)),
+                  " ".join(words[(n * k) % 10] for k in range(200))) for n in range(20000)),
+            )
+            self.index._db.commit()
+
+        start = time.perf_counter()
+        results = self.index.search("tumor neuron")
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(len(results), search_index.DEFAULT_LIMIT)
+
+if __name__ == '__main__':
+    unittest.main()
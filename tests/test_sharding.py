@@ -0,0 +1,157 @@
+"""
+Tests for the leased work queue and sharded fetch runs.
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import time
+import threading
+from datetime import datetime
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pipeline
+import sharding
+import pdf_enrichment
+from work_queue import WorkQueue
+
+def feed_handler(payload):
+    n = int(payload["name"])
+    return {"articles": [{"title": f"Paper {n}", "link": f"https://a.org/{n}", "source": payload["name"],
+                          "source_type": "RSS Feed", "relevancy": n / 10,
+                          "published_parsed": datetime.now().timetuple()[:6]}]}
+
+def alerts_handler(payload):
+    return {"articles": [{"title": "Alert", "link": "https://a.org/1", "source_type": "Google Alerts"}],
+            "mark": {"uidvalidity": 1, "last_uid": 42}}
+
+def pdf_handler(payload):
+    return {"pdf": [payload["link"] + ".pdf", None, ""]}
+
+HANDLERS = {"feed": feed_handler, "alerts": alerts_handler, "pdf": pdf_handler}
+
+class TestWorkQueue(unittest.TestCase):
+    """Tests for claiming, leases and retries."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "queue.sqlite3")
+        self.queue = WorkQueue(self.path, lease_seconds=60, max_attempts=2)
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def test_expired_lease_is_taken_over(self):
+        self.queue.add("run", "feed", "Cell", {"url": "https://cell"})
+        unit = self.queue.claim("a")
+        self.assertEqual((unit.key, unit.payload, unit.attempts), ("Cell", {"url": "https://cell"}, 1))
+        self.assertIsNone(self.queue.claim("b"))
+        self.assertTrue(self.queue.heartbeat(unit, "a"))
+
+        with mock.patch("work_queue.time.time", return_value=time.time() + 120):
+            retry = self.queue.claim("b")
+        self.assertEqual((retry.id, retry.attempts), (unit.id, 2))
+        self.assertFalse(self.queue.heartbeat(unit, "a"))
+        self.assertFalse(self.queue.complete(unit, "a", {"from": "a"}))
+        self.assertTrue(self.queue.complete(retry, "b", {"from": "b"}))
+        self.assertEqual(self.queue.results("run"), [(1, "feed", "Cell", {"from": "b"})])
+
+    def test_failed_units_are_retried_then_given_up(self):
+        self.queue.add("run", "feed", "Cell", {})
+        self.queue.fail(self.queue.claim("a"), "a", "timeout")
+        self.assertFalse(self.queue.finished("run"))
+        self.queue.fail(self.queue.claim("a"), "a", "timeout again")
+        self.assertIsNone(self.queue.claim("a"))
+        self.assertTrue(self.queue.finished("run"))
+        self.assertEqual(self.queue.failures("run"), [("feed", "Cell", "timeout again")])
+
+    def test_concurrent_workers_never_share_a_unit(self):
+        for n in range(40):
+            self.queue.add("run", "feed", str(n), {})
+        claimed = []
+
+        def work(name):
+            queue = WorkQueue(self.path)  # Own connection, like a separate process
+            while True:
+                unit = queue.claim(name)
+                if unit is None:
+                    break
+                claimed.append(unit.key)
+                queue.complete(unit, name, {})
+            queue.close()
+
+        threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(claimed, key=int), [str(n) for n in range(40)])
+        self.assertEqual(self.queue.counts("run"), {"done": 40})
+
+class TestShardedRun(unittest.TestCase):
+    """Tests for merging worker results into one pipeline run."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "queue.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_coordinator_merges_results_from_all_workers(self):
+        queue = WorkQueue(self.path)
+        external = sharding.Worker(WorkQueue(self.path), HANDLERS)
+        enricher = pdf_enrichment._enricher
+        written = []
+
+        def write(article, profile):
+            written.append(article.link)
+            return True, None
+
+        with mock.patch("notion_writer.get_notion_writer", return_value=None), \
+             sharding.Coordinator(queue, None, local_workers=1, handlers=HANDLERS, poll=0.01) as coordinator:
+            coordinator.add_feeds({str(n): f"https://feeds/{n}" for n in range(1, 9)})
+            coordinator.add_alert_sources([{"email": "me@example.org", "mailbox": "inbox"}])
+            other_host = threading.Thread(target=external.run, kwargs={"exit_when_idle": True})
+            other_host.start()
+            stats = pipeline.Pipeline([coordinator.collect], write, select=pipeline.top_relevant(3)).run()
+            other_host.join()
+
+        self.assertEqual(written, ["https://a.org/8", "https://a.org/7", "https://a.org/6"])
+        self.assertEqual(stats["fetched"], {"RSS Feed": 8, "Google Alerts": 1})
+        self.assertEqual(stats["duplicates"], 1)
+        self.assertEqual(coordinator.alert_marks, {"me@example.org/inbox": {"uidvalidity": 1, "last_uid": 42}})
+        self.assertIs(pdf_enrichment._enricher, enricher)
+        queue.close()
+
+    def test_failed_mailbox_unit_is_left_for_retry(self):
+        queue = WorkQueue(self.path)
+        queue.add("run", "alerts", "me@example.org/inbox", {"email": "me@example.org", "mailbox": "inbox",
+                                                            "last_run_time": None, "debug": False})
+        source = {"email": "me@example.org", "app_password": "pw", "mailbox": "inbox"}
+        with mock.patch("google_alerts_fetcher.get_alert_sources", return_value=[source]), \
+             mock.patch("google_alerts_fetcher.connect_imap", side_effect=OSError("connection refused")):
+            worker = sharding.Worker(queue, sharding.HANDLERS)
+            worker.run_unit(queue.claim(worker.worker_id, ["alerts"]))
+
+        self.assertEqual(queue.results("run"), [])
+        self.assertIsNotNone(queue.claim("w", ["alerts"]))  # Queued again for another attempt
+        queue.close()
+
+    def test_pdf_jobs_are_fetched_by_workers_and_applied_here(self):
+        queue = WorkQueue(self.path)
+        info = {"title": "Paper", "link": "https://a.org/1", "pdf_path": None}
+        with mock.patch("notion_writer.get_notion_writer", return_value=None), \
+             mock.patch.object(pdf_enrichment.PDFEnricher, "apply") as apply, \
+             sharding.Coordinator(queue, None, local_workers=1, handlers=HANDLERS, poll=0.01):
+            pdf_enrichment.get_pdf_enricher().submit("page-1", info)
+            self.assertEqual(pdf_enrichment.wait_for_pdf_enrichment(), 1)
+        apply.assert_called_once_with("page-1", info, "https://a.org/1.pdf", None, "")
+        queue.close()
+
+if __name__ == '__main__':
+    unittest.main()
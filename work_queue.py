@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import Counter
+from typing import NamedTuple, Optional
+
+# Work queue settings
+WORK_QUEUE_FILE = os.getenv("WORK_QUEUE_FILE", "work_queue.sqlite3")  # Put it on the volume the workers share
+LEASE_SECONDS = int(os.getenv("WORK_LEASE_SECONDS", 120))  # A unit is handed out again if not renewed in time
+MAX_ATTEMPTS = int(os.getenv("WORK_MAX_ATTEMPTS", 3))
+
+class WorkUnit(NamedTuple):
+    id: int
+    run_id: str
+    kind: str
+    key: str
+    payload: dict
+    attempts: int
+
+class WorkQueue:
+    """
+    Leased units of work in a SQLite file shared by worker processes.
+
+    A unit is pending until a worker claims it, which leases it for
+    lease_seconds. The worker renews the lease with heartbeat while it
+    works and ends it with complete or fail. A unit whose lease runs out,
+    because its worker died or hung, can be claimed by another worker;
+    after max_attempts claims it is marked failed. complete and heartbeat
+    only succeed for the worker holding the lease, so a worker that lost
+    its unit cannot overwrite the new owner's result.
+
+    Claims take SQLite's write lock, so they are atomic across processes
+    and hosts as long as the file system supports locking.
+    """
+
+    def __init__(self, path=WORK_QUEUE_FILE, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit; claim opens its own transaction
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS work_units ("
+            "id INTEGER PRIMARY KEY, run_id TEXT NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL, "
+            "payload TEXT NOT NULL, state TEXT NOT NULL DEFAULT 'pending', owner TEXT, lease_until REAL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, result TEXT, done_seq INTEGER, error TEXT, "
+            "created_at REAL NOT NULL, "
+            "UNIQUE (run_id, kind, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS work_units_state ON work_units (state, lease_until)")
+
+    def add(self, run_id, kind, key, payload):
+        """Queue a unit; adding the same (run_id, kind, key) twice keeps the first."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO work_units (run_id, kind, key, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, kind, key, json.dumps(payload), time.time()),
+            )
+
+    def claim(self, owner, kinds=None) -> Optional[WorkUnit]:
+        """Lease the oldest available unit to owner, or return None when there is none."""
+        now = time.time()
+        kind_filter, params = self._kind_filter(kinds)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._expire(now)
+                row = self._db.execute(
+                    "SELECT id, run_id, kind, key, payload, attempts FROM work_units "
+                    "WHERE (state = 'pending' OR (state = 'leased' AND lease_until < ?)) AND attempts < ?"
+                    f"{kind_filter} ORDER BY id LIMIT 1",
+                    [now, self.max_attempts, *params],
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE work_units SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 "
+                        "WHERE id = ?",
+                        (owner, now + self.lease_seconds, row[0]),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        unit_id, run_id, kind, key, payload, attempts = row
+        return WorkUnit(unit_id, run_id, kind, key, json.loads(payload), attempts + 1)
+
+    def _expire(self, now):
+        # Units whose last allowed lease ran out will not be retried
+        self._db.execute(
+            "UPDATE work_units SET state = 'failed', error = 'lease expired' "
+            "WHERE state = 'leased' AND lease_until < ? AND attempts >= ?",
+            (now, self.max_attempts),
+        )
+
+    def expire(self):
+        """Fail units whose last lease ran out; claim does this too."""
+        with self._lock:
+            self._expire(time.time())
+
+    def _update_leased(self, sql, params):
+        with self._lock:
+            return self._db.execute(f"{sql} WHERE id = ? AND owner = ? AND state = 'leased'", params).rowcount == 1
+
+    def heartbeat(self, unit, owner):
+        """Extend owner's lease on unit; False means the lease was lost."""
+        return self._update_leased("UPDATE work_units SET lease_until = ?",
+                                   (time.time() + self.lease_seconds, unit.id, owner))
+
+    def complete(self, unit, owner, result):
+        """Store unit's JSON-serializable result; False if owner no longer holds it."""
+        # done_seq numbers completions in order, so results can be read incrementally
+        return self._update_leased("UPDATE work_units SET state = 'done', result = ?, lease_until = NULL, "
+                                   "done_seq = (SELECT COALESCE(MAX(done_seq), 0) + 1 FROM work_units)",
+                                   (json.dumps(result), unit.id, owner))
+
+    def fail(self, unit, owner, error):
+        """Give unit back for a retry, or mark it failed after its last attempt."""
+        state = "failed" if unit.attempts >= self.max_attempts else "pending"
+        return self._update_leased("UPDATE work_units SET state = ?, error = ?, owner = NULL, lease_until = NULL",
+                                   (state, str(error), unit.id, owner))
+
+    def counts(self, run_id):
+        """Number of a run's units in each state."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT state, COUNT(*) FROM work_units WHERE run_id = ? GROUP BY state", (run_id,)
+            ).fetchall()
+        return Counter(dict(rows))
+
+    @staticmethod
+    def _kind_filter(kinds):
+        if not kinds:
+            return "", []
+        return f" AND kind IN ({', '.join('?' * len(kinds))})", list(kinds)
+
+    def finished(self, run_id, kinds=None):
+        """Whether every unit of the run, or of the given kinds, is done or failed."""
+        kind_filter, params = self._kind_filter(kinds)
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM work_units WHERE run_id = ? AND state IN ('pending', 'leased')" + kind_filter,
+                [run_id, *params],
+            ).fetchone()[0] == 0
+
+    def results(self, run_id, after=0, kinds=None):
+        """
+        (seq, kind, key, result) of the run's units completed after the
+        completion numbered after, in completion order.
+        """
+        kind_filter, params = self._kind_filter(kinds)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT done_seq, kind, key, result FROM work_units "
+                "WHERE run_id = ? AND state = 'done' AND done_seq > ?" + kind_filter + " ORDER BY done_seq",
+                [run_id, after, *params],
+            ).fetchall()
+        return [(seq, kind, key, json.loads(result)) for seq, kind, key, result in rows]
+
+    def failures(self, run_id):
+        """(kind, key, error) of the run's units that gave up."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT kind, key, error FROM work_units WHERE run_id = ? AND state = 'failed' ORDER BY id", (run_id,)
+            ).fetchall()
+
+    def purge(self, before):
+        """Delete units created before a timestamp, e.g. those of abandoned runs."""
+        with self._lock:
+            return self._db.execute("DELETE FROM work_units WHERE created_at < ?", (before,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()